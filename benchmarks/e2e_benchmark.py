@@ -0,0 +1,266 @@
+"""
+Offline end-to-end benchmark of the architect pipeline.
+
+Every LLM call is served by the scripted fake provider (LLM_PROVIDER=fake,
+core/fake_llm.py), so what remains is the cost of our own code:
+
+  compile     create_main_agent() graph compile time
+  e2e         one full architect run (setup -> decide -> task manager ->
+              manifest write -> final response) per iteration; framework
+              overhead is the run's wall time minus the time spent inside
+              the fake LLM, with a per-stage breakdown from telemetry spans
+  manifest    manage_tasks add/update/delete throughput on manifests of
+              10, 1k and 50k tasks
+  scanner     ContextScanner cost on synthetic project trees
+
+Results are written as JSON. With --compare, every metric is checked
+against a baseline file and the script exits with status 1 when one
+regresses by more than --tolerance.
+
+Usage:
+    python benchmarks/e2e_benchmark.py --output benchmark_results.json
+    python benchmarks/e2e_benchmark.py --compare baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "src"))
+
+# Model seçimi import sırasında değil, get_llm çağrısında okunur
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ.setdefault("FAKE_LLM_LATENCY", "0")
+
+from langchain_core.messages import HumanMessage
+
+import core.telemetry as telemetry_module
+from agents.task_manager.tools.task_manager import ManageTasks
+from core.context_scanner import ContextScanner
+from core.progress import astream_run
+from core.request_context import RequestContext, request_scope
+from core.telemetry import Telemetry
+
+MANIFEST_SIZES = (10, 1_000, 50_000)
+SCANNER_TREES = {"small": (5, 20), "large": (40, 100)}  # (dizin sayısı, dizin başına dosya)
+
+
+def metric(value: float, unit: str, better: str = "lower") -> dict:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def median_ms(samples) -> float:
+    return statistics.median(samples) * 1000
+
+
+def percentile_ms(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))] * 1000
+
+
+# --- compile ---------------------------------------------------------------
+
+async def bench_compile(runs: int) -> dict:
+    from agents.main_agent.agent_flow import create_main_agent
+
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await create_main_agent()
+        samples.append(time.perf_counter() - start)
+    return {"compile.create_main_agent_ms": metric(median_ms(samples), "ms")}
+
+
+# --- e2e -------------------------------------------------------------------
+
+async def bench_e2e(iterations: int) -> tuple:
+    """Full runs against the scripted model; returns (metrics, per-stage breakdown)."""
+    from agents.main_agent.agent_flow import create_main_agent
+
+    manifest_path = ROOT_DIR / ".ai_state.json"
+    backup = manifest_path.read_bytes() if manifest_path.exists() else None
+    # Span'lar trace dosyasına değil, yalnızca bellekteki toplama gitsin
+    recorder = Telemetry(trace_path=None)
+    previous, telemetry_module._telemetry = telemetry_module._telemetry, recorder
+
+    app = await create_main_agent()
+    samples = []
+    try:
+        for i in range(iterations + 1):
+            graph_input = {
+                "messages": [HumanMessage(content=f"User Request: add JWT authentication ({i})")],
+                "manifest": {},
+                "history": [],
+                "current_agent": "start",
+            }
+            config = {"configurable": {"thread_id": f"bench_e2e_{i}"}}
+            if i == 0:
+                # Isınma turu: model/tool önbellekleri ve lazy importlar ölçüme girmesin
+                await astream_run(app, graph_input, config)
+                recorder.stages.clear()
+                continue
+            start = time.perf_counter()
+            with request_scope(RequestContext(f"bench-{i}")):
+                await astream_run(app, graph_input, config)
+            samples.append(time.perf_counter() - start)
+    finally:
+        telemetry_module._telemetry = previous
+        # Araçlar kök manifest'e yazar; benchmark onu değiştirmiş olarak bırakmasın
+        if backup is not None:
+            manifest_path.write_bytes(backup)
+
+    llm_stats = recorder.stages.get(("llm", "fake"))
+    llm_seconds = llm_stats.total / iterations if llm_stats else 0.0
+    overhead = [max(0.0, s - llm_seconds) for s in samples]
+    metrics = {
+        "e2e.iteration_p50_ms": metric(median_ms(samples), "ms"),
+        "e2e.iteration_p95_ms": metric(percentile_ms(samples, 95), "ms"),
+        "e2e.framework_overhead_ms": metric(median_ms(overhead), "ms"),
+        "e2e.llm_calls_per_iteration": metric((llm_stats.count if llm_stats else 0) / iterations, "calls"),
+    }
+    stages = {f"{kind}/{name}": stats.summary() for (kind, name), stats in sorted(recorder.stages.items())}
+    return metrics, stages
+
+
+# --- manifest --------------------------------------------------------------
+
+def _write_manifest(path: Path, task_count: int) -> None:
+    tasks = [
+        {
+            "id": f"T{i}",
+            "title": f"Task {i}",
+            "status": "todo",
+            "description": "Synthetic benchmark task.",
+            "outcome": "",
+            "dependencies": [f"T{i - 1}"] if i else [],
+        }
+        for i in range(task_count)
+    ]
+    manifest = {"project_meta": {"name": "bench"}, "status": {}, "tasks": tasks, "global_rules": []}
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+
+
+def bench_manifest(ops: int) -> dict:
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in MANIFEST_SIZES:
+            path = Path(tmp) / f"manifest_{size}.json"
+            _write_manifest(path, size)
+            tool = ManageTasks(filename=str(path))
+            # Büyük manifest'lerde her işlem tüm dosyayı yeniden yazar; işlem sayısını sınırla
+            count = max(3, min(ops, ops * 1_000 // size))
+            for action in ("add", "update", "delete"):
+                start = time.perf_counter()
+                for i in range(count):
+                    result = tool._run(action=action, task_id=f"B{i}", title=f"Bench {i}", status="in_progress")
+                    if result.startswith("Error"):
+                        raise RuntimeError(result)
+                elapsed = time.perf_counter() - start
+                metrics[f"manifest.{size}.{action}_ops_per_s"] = metric(count / elapsed, "ops/s", "higher")
+    return metrics
+
+
+# --- scanner ---------------------------------------------------------------
+
+def _build_tree(root: Path, dirs: int, files_per_dir: int) -> None:
+    (root / "package.json").write_text('{"dependencies": {"react": "^18.0.0"}}', encoding="utf-8")
+    (root / "requirements.txt").write_text("fastapi\nlanggraph\n", encoding="utf-8")
+    extensions = (".py", ".ts", ".js", ".md", ".go")
+    for d in range(dirs):
+        directory = root / f"pkg_{d}" / "sub"
+        directory.mkdir(parents=True)
+        for f in range(files_per_dir):
+            (directory / f"module_{f}{extensions[f % len(extensions)]}").write_text("x = 1\n", encoding="utf-8")
+    ignored = root / "node_modules" / "dep"
+    ignored.mkdir(parents=True)
+    (ignored / "index.js").write_text("module.exports = {}\n", encoding="utf-8")
+
+
+def bench_scanner(runs: int) -> dict:
+    metrics = {}
+    for label, (dirs, files_per_dir) in SCANNER_TREES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            _build_tree(Path(tmp), dirs, files_per_dir)
+            scanner = ContextScanner(tmp)
+            for name, call in (
+                ("scan_directory", scanner.scan_directory),
+                ("language_stats", scanner.get_language_stats),
+                ("detect_frameworks", scanner.detect_frameworks),
+            ):
+                samples = []
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    call()
+                    samples.append(time.perf_counter() - start)
+                metrics[f"scanner.{label}.{name}_ms"] = metric(median_ms(samples), "ms")
+    return metrics
+
+
+# --- compare ---------------------------------------------------------------
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics that got worse than the baseline by more than `tolerance` (fraction)."""
+    regressions = []
+    for name, entry in current["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if not base or not base["value"]:
+            continue
+        change = (entry["value"] - base["value"]) / base["value"]
+        worse = change > tolerance if entry["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append(
+                f"{name}: {base['value']} -> {entry['value']} {entry['unit']} ({change:+.0%})"
+            )
+    return regressions
+
+
+async def main(args) -> dict:
+    metrics = {}
+    metrics.update(await bench_compile(args.compile_runs))
+    e2e_metrics, stages = await bench_e2e(args.iterations)
+    metrics.update(e2e_metrics)
+    metrics.update(bench_manifest(args.manifest_ops))
+    metrics.update(bench_scanner(args.scanner_runs))
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics": metrics,
+        "stages": stages,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20, help="Measured end-to-end runs")
+    parser.add_argument("--compile-runs", type=int, default=5)
+    parser.add_argument("--manifest-ops", type=int, default=100, help="Operations per action on the 1k manifest")
+    parser.add_argument("--scanner-runs", type=int, default=5)
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="Fail when a metric regresses against this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    for name, entry in results["metrics"].items():
+        print(f"{name:<45} {entry['value']:>12} {entry['unit']}")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%} against {args.compare}")
@@ -0,0 +1,151 @@
+"""
+Connection reuse benchmark for the shared provider HTTP pools.
+
+Starts a local mock of the OpenAI chat completions endpoint that counts
+accepted TCP connections, then sends the same concurrent load through
+ChatOpenAI models in three modes:
+
+  per_call    every call gets a fresh HTTP client (no reuse at all)
+  per_config  SDK defaults: one client per distinct model configuration,
+              here four per-node timeouts as with `models:` tiering
+  shared      every model is built on core.http_clients' pooled client
+
+Usage:
+    python benchmarks/http_pool_benchmark.py --requests 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import openai
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+from core.http_clients import close_http_clients, get_async_http_client
+
+COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "ok"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+}
+
+
+class MockOpenAIServer:
+    """Minimal keep-alive HTTP/1.1 server answering every POST with COMPLETION."""
+
+    def __init__(self, latency: float = 0.005):
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer) -> None:
+        self.connections += 1
+        body = json.dumps(COMPLETION).encode()
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value.strip())
+                await reader.readexactly(length)
+                self.requests += 1
+                await asyncio.sleep(self.latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n".encode()
+                    + b"Connection: keep-alive\r\n\r\n"
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_load(make_model, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    messages = [HumanMessage(content="ping")]
+
+    async def one_call(i: int):
+        async with semaphore:
+            model, own_client = make_model(i)
+            await model.ainvoke(messages)
+            if own_client is not None:
+                await own_client.aclose()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_call(i) for i in range(total)))
+    return time.perf_counter() - start
+
+
+async def main(total: int, concurrency: int, latency: float) -> dict:
+    results = {}
+    for mode in ("per_call", "per_config", "shared"):
+        server = MockOpenAIServer(latency=latency)
+        base_url = await server.start()
+
+        def make_model(i: int):
+            kwargs = {
+                "model": "gpt-4o-mini",
+                "api_key": "bench",
+                "base_url": base_url,
+                "max_retries": 0,
+                "timeout": 60 + i % 4,
+            }
+            own_client = None
+            if mode == "per_call":
+                own_client = openai.DefaultAsyncHttpxClient()
+                kwargs["http_async_client"] = own_client
+            elif mode == "shared":
+                kwargs["http_async_client"] = get_async_http_client("openai")
+            return ChatOpenAI(**kwargs), own_client
+
+        elapsed = await run_load(make_model, total, concurrency)
+        await close_http_clients()
+        await server.stop()
+        results[mode] = {
+            "requests": server.requests,
+            "tcp_connections": server.connections,
+            "seconds": round(elapsed, 3),
+            "requests_per_second": round(total / elapsed, 1),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.005, help="Mock server latency per request (s)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    print(json.dumps(asyncio.run(main(args.requests, args.concurrency, args.latency)), indent=2))
@@ -0,0 +1,96 @@
+"""
+Import-time benchmark for the CLI and server entry points.
+
+Each target module is imported in a fresh interpreter with `-X importtime`
+several times; the median cumulative import time is compared with a
+threshold and the script exits with status 1 when any target regresses.
+It also fails when a provider SDK or LangGraph (graph or checkpointer
+modules) gets imported eagerly again.
+
+Usage:
+    python benchmarks/import_time_benchmark.py
+    python benchmarks/import_time_benchmark.py --runs 9 --threshold cli=300
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Milisaniye; yavaş CI makineleri için bilinçli olarak geniş tutuldu
+DEFAULT_THRESHOLDS_MS = {
+    "cli": 1000,
+    "server": 2000,
+    "core.llm_factory": 300,
+}
+
+# Bu modüller ancak bir model gerçekten oluşturulduğunda yüklenmeli
+LAZY_MODULES = ("langchain_openai", "langchain_anthropic", "langchain_google_genai", "langgraph")
+
+
+def measure(module: str) -> dict:
+    """Imports `module` once in a fresh interpreter; returns its cumulative time and lazy-module leaks."""
+    probe = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if parts[-1].strip() == module:
+            cumulative_us = int(parts[1])
+    leaked = [m for m in proc.stdout.strip().split(",") if m]
+    return {"ms": (cumulative_us or 0) / 1000, "leaked": leaked}
+
+
+def run(thresholds: dict, runs: int) -> dict:
+    report = {}
+    for module, threshold in thresholds.items():
+        samples = [measure(module) for _ in range(runs)]
+        median_ms = statistics.median(s["ms"] for s in samples)
+        leaked = samples[-1]["leaked"]
+        report[module] = {
+            "median_ms": round(median_ms, 1),
+            "min_ms": round(min(s["ms"] for s in samples), 1),
+            "threshold_ms": threshold,
+            "eager_imports": leaked,
+            "ok": median_ms <= threshold and not leaked,
+        }
+    return report
+
+
+def parse_threshold(value: str):
+    module, _, ms = value.partition("=")
+    return module, float(ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--threshold",
+        type=parse_threshold,
+        action="append",
+        default=[],
+        metavar="MODULE=MS",
+        help="Override or add a threshold (repeatable)",
+    )
+    args = parser.parse_args()
+
+    thresholds = dict(DEFAULT_THRESHOLDS_MS)
+    thresholds.update(dict(args.threshold))
+    report = run(thresholds, args.runs)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if all(r["ok"] for r in report.values()) else 1)
@@ -0,0 +1,299 @@
+"""
+Concurrent load test for the MCP server over stdio.
+
+Launches `src/server.py` as subprocesses (one per session, the way each
+IDE client spawns its own server) and drives every session with several
+concurrent workers for a fixed duration. All LLM calls go to the scripted
+fake provider (LLM_PROVIDER=fake, FAKE_LLM_LATENCY), so the numbers show
+the server's own behaviour: scheduling, coalescing, manifest contention.
+
+Traffic mix (weights via --mix):
+  architect   architect_request with a unique feature request (full graph)
+  repeat      architect_request with a request shared by all workers
+              (exercises coalescing and the result cache)
+  fast_path   manifest commands applied without the graph ("add task ...",
+              "mark ... as completed", "delete task ...")
+  metrics     metrics://scheduler resource read
+
+Reports throughput, latency percentiles and error rates per operation,
+and the servers' RSS sampled over time (Linux /proc). By default the
+server runs from a temporary copy of the project, so the load never
+touches the real manifest, run store or traces.
+
+Usage:
+    python benchmarks/mcp_load_test.py --sessions 4 --concurrency 4 --duration 30
+    python benchmarks/mcp_load_test.py --llm-latency 0.2 --mix architect=1,fast_path=3 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from pydantic import AnyUrl
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_MIX = {"architect": 4, "repeat": 2, "fast_path": 3, "metrics": 1}
+
+
+def percentile_ms(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))] * 1000, 1)
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}' (expected: {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def prepare_project(in_place: bool) -> Path:
+    """Project root the server runs from: a throwaway copy unless --in-place."""
+    if in_place:
+        return ROOT_DIR
+    root = Path(tempfile.mkdtemp(prefix="promptarchitect-load-"))
+    shutil.copytree(ROOT_DIR / "src", root / "src", ignore=shutil.ignore_patterns("__pycache__"))
+    shutil.copy(ROOT_DIR / ".ai_state.json.example", root / ".ai_state.json.example")
+    return root
+
+
+# --- RSS -------------------------------------------------------------------
+
+def server_pids() -> List[int]:
+    """Running server.py processes started by this harness (children of this process)."""
+    pids = []
+    for entry in Path("/proc").glob("[0-9]*"):
+        try:
+            ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            cmdline = (entry / "cmdline").read_bytes().replace(b"\0", b" ").decode(errors="replace")
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == os.getpid() and "server.py" in cmdline:
+            pids.append(int(entry.name))
+    return pids
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def sample_rss(started: float, interval: float, samples: list, stop: asyncio.Event) -> None:
+    if not Path("/proc").exists():
+        return
+    while not stop.is_set():
+        values = {pid: rss_mb(pid) for pid in server_pids()}
+        values = {pid: round(v, 1) for pid, v in values.items() if v is not None}
+        if values:
+            samples.append(
+                {"t": round(time.perf_counter() - started, 2), "total_mb": round(sum(values.values()), 1), "per_server_mb": values}
+            )
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+# --- load ------------------------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def add(self, op: str, elapsed: float, error: Optional[str]) -> None:
+        self.latencies.setdefault(op, []).append(elapsed)
+        if error:
+            kinds = self.errors.setdefault(op, {})
+            kinds[error] = kinds.get(error, 0) + 1
+
+    def report(self, wall: float) -> dict:
+        ops = {}
+        for op, samples in sorted(self.latencies.items()):
+            errors = sum(self.errors.get(op, {}).values())
+            ops[op] = {
+                "requests": len(samples),
+                "errors": errors,
+                "error_rate": round(errors / len(samples), 4),
+                "error_kinds": self.errors.get(op, {}),
+                "throughput_per_s": round(len(samples) / wall, 2),
+                "p50_ms": percentile_ms(samples, 50),
+                "p90_ms": percentile_ms(samples, 90),
+                "p99_ms": percentile_ms(samples, 99),
+                "max_ms": percentile_ms(samples, 100),
+            }
+        total = sum(len(s) for s in self.latencies.values())
+        total_errors = sum(sum(k.values()) for k in self.errors.values())
+        return {
+            "requests": total,
+            "errors": total_errors,
+            "error_rate": round(total_errors / total, 4) if total else 0.0,
+            "throughput_per_s": round(total / wall, 2),
+            "operations": ops,
+        }
+
+
+def error_kind(text: str) -> Optional[str]:
+    # Sunucu hataları metin olarak döner: "❌ ARCHITECT BUSY: ...", "❌ MANIFEST UPDATE FAILED" ...
+    if text.startswith("❌"):
+        return text.split(":", 1)[0].lstrip("❌ ").strip() or "error"
+    if text.startswith("⏱️"):
+        return "TIMEOUT"
+    return None
+
+
+async def run_operation(session: ClientSession, op: str, tag: str, counter: int) -> Optional[str]:
+    if op == "metrics":
+        await session.read_resource(AnyUrl("metrics://scheduler"))
+        return None
+
+    if op == "fast_path":
+        task_id = f"LT-{tag}{counter:05d}"
+        text = ""
+        for command in (
+            f"add task {task_id}: Load test item {counter}",
+            f"mark {task_id} as completed",
+            f"delete task {task_id}",
+        ):
+            result = await session.call_tool("architect_request", {"request": command})
+            text = result.content[0].text if result.content else ""
+            if result.isError or error_kind(text) or "fast path" not in text:
+                return "TOOL_ERROR" if result.isError else (error_kind(text) or "NOT_FAST_PATH")
+        return None
+
+    request = "Add rate limiting to the public API" if op == "repeat" else f"Add feature {tag}-{counter} with tests"
+    result = await session.call_tool("architect_request", {"request": request})
+    text = result.content[0].text if result.content else ""
+    return "TOOL_ERROR" if result.isError else error_kind(text)
+
+
+async def run_session(
+    index: int, project: Path, env: dict, args, recorder: Recorder, deadline: float, startup: list
+) -> None:
+    params = StdioServerParameters(
+        command=sys.executable, args=[str(project / "src" / "server.py")], env=env, cwd=str(project)
+    )
+    ops, weights = zip(*args.mix.items())
+    async with stdio_client(params, errlog=open(os.devnull, "w")) as (read, write):
+        async with ClientSession(read, write) as session:
+            started = time.perf_counter()
+            await session.initialize()
+            startup.append(time.perf_counter() - started)
+
+            async def worker(worker_index: int) -> None:
+                rng = random.Random(index * 1000 + worker_index)
+                counter = 0
+                while time.perf_counter() < deadline:
+                    op = rng.choices(ops, weights)[0]
+                    counter += 1
+                    started = time.perf_counter()
+                    try:
+                        error = await run_operation(session, op, f"{index}{worker_index:02d}", counter)
+                    except Exception as e:
+                        error = type(e).__name__
+                    recorder.add(op, time.perf_counter() - started, error)
+
+            await asyncio.gather(*(worker(w) for w in range(args.concurrency)))
+
+
+async def main(args) -> dict:
+    project = prepare_project(args.in_place)
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "PYTHONUNBUFFERED": "1",
+    }
+    recorder = Recorder()
+    rss_samples: list = []
+    startup: list = []
+    stop = asyncio.Event()
+    started = time.perf_counter()
+    sampler = asyncio.create_task(sample_rss(started, args.sample_interval, rss_samples, stop))
+    try:
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            *(run_session(i, project, env, args, recorder, deadline, startup) for i in range(args.sessions))
+        )
+    finally:
+        stop.set()
+        await sampler
+        if not args.in_place:
+            shutil.rmtree(project, ignore_errors=True)
+    wall = time.perf_counter() - started
+
+    peak = max((s["total_mb"] for s in rss_samples), default=None)
+    return {
+        "config": {
+            "sessions": args.sessions,
+            "concurrency_per_session": args.concurrency,
+            "duration_seconds": args.duration,
+            "llm_latency_seconds": args.llm_latency,
+            "mix": args.mix,
+        },
+        "wall_seconds": round(wall, 2),
+        "server_startup_p50_ms": percentile_ms(startup, 50),
+        **recorder.report(wall),
+        "rss": {
+            "start_mb": rss_samples[0]["total_mb"] if rss_samples else None,
+            "peak_mb": peak,
+            "end_mb": rss_samples[-1]["total_mb"] if rss_samples else None,
+            "samples": rss_samples,
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{report['requests']} requests in {report['wall_seconds']}s "
+        f"({report['throughput_per_s']}/s), error rate {report['error_rate']:.2%}"
+    )
+    print(f"{'operation':<12}{'count':>8}{'err %':>8}{'req/s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, row in report["operations"].items():
+        print(
+            f"{op:<12}{row['requests']:>8}{row['error_rate'] * 100:>8.1f}{row['throughput_per_s']:>9}"
+            f"{row['p50_ms']:>10}{row['p90_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}"
+        )
+        if row["error_kinds"]:
+            print(f"{'':<12}errors: {row['error_kinds']}")
+    rss = report["rss"]
+    if rss["samples"]:
+        print(f"server RSS (all sessions): start {rss['start_mb']} MB, peak {rss['peak_mb']} MB, end {rss['end_mb']} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=4, help="Server processes, one MCP session each")
+    parser.add_argument("--concurrency", type=int, default=4, help="In-flight requests per session")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep issuing requests")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM latency per call (s)")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX), help="Operation weights, e.g. architect=4,fast_path=3")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="RSS sampling interval (s)")
+    parser.add_argument("--in-place", action="store_true", help="Run against this checkout's manifest and stores instead of a temporary copy")
+    parser.add_argument("--output", help="Also write the full report (with RSS samples) as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {args.output}")
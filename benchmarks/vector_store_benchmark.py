@@ -0,0 +1,112 @@
+"""
+Vector store benchmark: fills a temporary store with N chunks (a slice
+embedded through the default HashingEmbedder, the rest random unit vectors
+written straight into the memmap), then measures reload time and top-k query
+latency. Exits with status 1 when the p50 query latency exceeds the threshold.
+
+Usage:
+    python benchmarks/vector_store_benchmark.py
+    python benchmarks/vector_store_benchmark.py --chunks 200000 --threshold-ms 20
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from memory.vector_store import DEFAULT_VECTOR_STORE_SETTINGS, VectorStore  # noqa: E402
+
+QUERIES = [
+    "jwt token validation middleware",
+    "retry with exponential backoff on rate limit",
+    "load yaml settings section defaults",
+    "sqlite checkpoint cleanup retention",
+]
+
+
+def fill(store: VectorStore, chunks: int, embedded: int) -> float:
+    """Returns seconds spent embedding `embedded` real texts."""
+    started = time.perf_counter()
+    texts = [f"def handler_{i}(request):\n    return service_{i % 97}.process(request.user, token_{i % 13})" for i in range(embedded)]
+    store.add([f"text:{i}" for i in range(embedded)], texts, [{"kind": "file"}] * embedded)
+    embed_seconds = time.perf_counter() - started
+
+    # Geri kalanı embed maliyeti olmadan: doğrudan birim vektörler
+    random_count = chunks - embedded
+    rng = np.random.default_rng(0)
+    real = store.embedder
+    for offset in range(0, random_count, 10000):
+        size = min(10000, random_count - offset)
+        vectors = rng.standard_normal((size, store.dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        store.embedder = _Fixed(vectors, real)
+        store.add([f"random:{offset + i}" for i in range(size)], [""] * size, [{"kind": "file"}] * size)
+    store.embedder = real
+    return embed_seconds
+
+
+class _Fixed:
+    """Embedder stand-in that returns precomputed vectors (bulk fill only)."""
+
+    def __init__(self, vectors, real):
+        self.vectors, self.dim, self.name = vectors, real.dim, real.name
+
+    def embed(self, texts):
+        return self.vectors
+
+
+def run(chunks: int, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        settings = dict(DEFAULT_VECTOR_STORE_SETTINGS)
+        store = VectorStore(directory, settings=settings)
+        embed_seconds = fill(store, chunks, min(chunks, 5000))
+        store.save()
+
+        started = time.perf_counter()
+        store = VectorStore(directory, settings=settings)
+        load_seconds = time.perf_counter() - started
+
+        samples = []
+        for i in range(runs):
+            query = QUERIES[i % len(QUERIES)]
+            started = time.perf_counter()
+            store.search(query, k=10)
+            samples.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        store.search_batch(QUERIES * 4, k=10)
+        batch_ms = (time.perf_counter() - started) * 1000
+
+        samples.sort()
+        return {
+            "chunks": len(store),
+            "dim": store.dim,
+            "embed_5k_seconds": round(embed_seconds, 3),
+            "load_seconds": round(load_seconds, 3),
+            "query_p50_ms": round(statistics.median(samples), 3),
+            "query_p95_ms": round(samples[int(0.95 * (len(samples) - 1))], 3),
+            "batch_16_queries_ms": round(batch_ms, 3),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--threshold-ms", type=float, default=10.0, help="Maximum p50 query latency")
+    args = parser.parse_args()
+
+    report = run(args.chunks, args.runs)
+    print(json.dumps(report, indent=2))
+    if report["query_p50_ms"] > args.threshold_ms:
+        print(f"REGRESSION: p50 query {report['query_p50_ms']}ms > {args.threshold_ms}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,37 @@ import os
 from pathlib import Path
 
 import yaml
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.prebuilt import ToolNode
 
 from agents.main_agent.node.decide_agent_node import decide_agent_node
 from agents.main_agent.node.final_response_node import final_response_node
 from agents.main_agent.node.setup_node import setup_node
+from core.checkpointer import get_checkpointer
+from core.budget import budget_exhausted
+from core.request_context import should_wrap_up
 from core.state import AgentState
 from logger import logger
 
 
+def route_after_decide(state: AgentState) -> str:
+    """
+    ReAct loop continues unless the agent is done, a request budget (LLM
+    calls, tokens, cost) has run out, or the request is about to time out.
+    """
+    next_node = state.get("next_node", "final_response_node")
+    if next_node != "decide_agent":
+        return next_node
+    exhausted = budget_exhausted(state)
+    if exhausted:
+        logger.info(f"Main Agent: {exhausted} budget exhausted, moving on to the final response.")
+        return "final_response_node"
+    if should_wrap_up():
+        logger.info("Main Agent: request deadline is close, moving on to the final response.")
+        return "final_response_node"
+    return next_node
+
+
 async def create_main_agent():
     """Main Agent orchestrator graph'ını oluşturur."""
 
@@ -31,7 +51,7 @@ async def create_main_agent():
     # Decide agent'ın kararına göre yönlendirme
     workflow.add_conditional_edges(
         "decide_agent",
-        lambda state: state.get("next_node", "final_response"),
+        route_after_decide,
         {
             "decide_agent": "decide_agent",  # ReAct devam eder
             "final_response_node": "final_response",  # Tool bitti, final response
@@ -41,8 +61,8 @@ async def create_main_agent():
     # ReAct loop: tools → tekrar decide_agent
     workflow.add_edge("final_response", END)
 
-    # Memory
-    memory = MemorySaver()
+    # Memory (süreç genelinde paylaşılan, sınırlı checkpointer)
+    memory = get_checkpointer("main_agent")
 
     compiled_graph = workflow.compile(checkpointer=memory)
     logger.info("Main Agent graph compiled successfully.")
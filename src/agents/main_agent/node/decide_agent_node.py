@@ -1,10 +1,15 @@
 import json
 import os
+from pathlib import Path
 
 from langgraph.prebuilt import ToolNode
 
 from agents.main_agent.node.setup_node import load_tools_from_config
-from core.llm_factory import get_base_llm
+from core.history_compactor import compact_for_llm
+from core.llm_factory import get_llm
+from core.llm_invoker import ainvoke_llm
+from core.progress import report_progress
+from core.request_context import DeadlineExceeded, current_usage
 from core.state import AgentState
 from logger import logger
 
@@ -21,15 +26,9 @@ async def decide_agent_node(state: AgentState) -> dict:
         state (AgentState): The current state of the orchestration graph.
     """
 # 1. Hazırlık
-    llm = get_base_llm()
+    llm = get_llm("main_agent", "decide_agent")
     tools = load_tools_from_config("main_agent")
 
-    # State injection (Task Manager için)
-    for t in tools:
-        if t.name == "route_to_task_manager":
-            t.current_state = state.copy()
-            logger.info("Decide Node: Injected state into RouteToTaskManager.")
-
     # LLM'e araçları tanıt
     if tools:
         llm_with_tools = llm.bind_tools(tools)
@@ -40,14 +39,16 @@ async def decide_agent_node(state: AgentState) -> dict:
 
     try:
         # 2. Karar Anı (LLM Düşünüyor)
-        response = await llm_with_tools.ainvoke(state["messages"])
+        response = await ainvoke_llm(llm_with_tools, compact_for_llm(state["messages"]))
         updates["messages"] = [response]
 
         # 3. Eğer Ajan "Araç Kullanacağım" dediyse
         if hasattr(response, "tool_calls") and response.tool_calls:
             logger.info(f"Decide Agent Node: Calling {len(response.tool_calls)} tools.")
+            for tool_call in response.tool_calls:
+                report_progress(f"Running tool {tool_call['name']}")
 
-            # Araçları çalıştır
+            # Araçları çalıştır (RouteToTaskManager state'i InjectedState ile bu çağrıdan alır)
             tool_node = ToolNode(tools=tools)
             temp_state = state.copy()
             temp_state["messages"] = list(state["messages"]) + [response]
@@ -74,10 +75,16 @@ async def decide_agent_node(state: AgentState) -> dict:
             logger.info("Decide Agent: Task completed, generating final response.")
             next_node = "final_response_node"
 
+        # Alt ajanın (task manager) çağrıları da dahil, isteğin toplam kullanımı
+        usage = current_usage()
+        if usage is not None:
+            updates["usage"] = usage
         updates["history"] = [f"Decide Node: Step executed."]
         updates["error"] = None
         updates["next_node"] = next_node
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         error_msg = f"Decide Node Error: {str(e)}"
         logger.error(error_msg)
@@ -1,19 +1,70 @@
+import asyncio
+import time
+from pathlib import Path
+
 from langchain_core.messages import AIMessage, HumanMessage
 
-from core.llm_factory import get_base_llm
+from core.finalization import (
+    DEFAULT_FINALIZATION_SETTINGS,
+    choose_policy,
+    get_finalization_stats,
+    last_answer,
+    recent_messages,
+    render_template,
+)
+from core.llm_factory import get_llm
+from core.llm_invoker import ainvoke_llm
+from core.request_context import DeadlineExceeded, current_request, current_usage
+from core.settings import get_settings
 from core.state import AgentState
+from logger import logger
+
+
+async def remember_report(state: AgentState, updates: dict) -> None:
+    """Final raporu vektör hafızasına ekler; sonraki isteklerin relevant_context'i bunu kullanabilir."""
+    from memory.context_manager import DEFAULT_CONTEXT_SETTINGS, get_context_manager
+
+    context = current_request()
+    if context is None or not get_settings("context_manager", DEFAULT_CONTEXT_SETTINGS)["enabled"]:
+        return
+    new_messages = updates.get("messages") or []
+    answer = new_messages[-1] if new_messages else last_answer(state["messages"])
+    request = next((m.content for m in state["messages"] if isinstance(m, HumanMessage)), "")
+    if answer is None or not isinstance(answer.content, str) or not isinstance(request, str):
+        return
+    try:
+        root_dir = str(Path(__file__).resolve().parents[4])
+        manager = get_context_manager(root_dir)
+        await asyncio.to_thread(manager.record_report, context.run_id, request, answer.content)
+    except Exception as e:
+        logger.warning(f"Report not stored in memory: {e}")
 
 
 async def final_response_node(state: AgentState) -> dict:
     """
-    ReAct loop bittikten sonra, tüm context'i LLM'ye verip
-    user-facing, net bir final response üretir.
+    ReAct loop bittikten sonra user-facing, net bir final response üretir.
+    Policy (core.finalization): son AI cevabını aynen kullan (reuse),
+    manifest farkından LLM'siz özet çıkar (template) ya da LLM'e yazdır (llm).
 
     Args:
         state (AgentState): Current state of Orchestration graph.
     """
+    started = time.monotonic()
+    policy, reason = choose_policy(state)
+
+    if policy in ("reuse", "template"):
+        updates: dict = {"current_agent": "main_agent_final"}
+        if policy == "template":
+            # Şablon cevabı yeni mesaj olarak eklenir; reuse'da son mesaj zaten cevaptır
+            updates["messages"] = [AIMessage(content=render_template(state))]
+        saved = get_finalization_stats().record(policy, time.monotonic() - started)
+        updates["finalization"] = {"policy": policy, "reason": reason, "saved_seconds": round(saved, 3)}
+        updates["history"] = [f"Final response: {policy} ({reason}), saved ~{saved:.1f}s."]
+        logger.info(f"Final Response: {policy} ({reason}), skipped LLM call, saved ~{saved:.1f}s.")
+        await remember_report(state, updates)
+        return updates
 
-    base_llm = get_base_llm()
+    base_llm = get_llm("main_agent", "final_response")
     # Tool'ları bind etme, sadece temiz response için
     llm = base_llm  # bind_tools yok
 
@@ -28,15 +79,25 @@ async def final_response_node(state: AgentState) -> dict:
     # This prompt is take recent 3 history and project status to give context to the LLM. But we could build enhanced memory so this content would be better.
 
     # Tüm conversation + context
-    messages_for_final = state["messages"][-5:] + [HumanMessage(content=context_prompt)]
+    # Dilim, tool_call'ı kesilmiş bir ToolMessage ile başlamasın
+    recent = get_settings("finalization", DEFAULT_FINALIZATION_SETTINGS)["recent_messages"]
+    messages_for_final = recent_messages(state["messages"], recent) + [HumanMessage(content=context_prompt)]
 
     try:
-        final_response = await llm.ainvoke(messages_for_final)
+        final_response = await ainvoke_llm(llm, messages_for_final)
         updates = {
             "messages": [final_response],
             "history": ["Final user-facing response generated."],
             "current_agent": "main_agent_final",
         }
+        get_finalization_stats().record("llm", time.monotonic() - started)
+        updates["finalization"] = {"policy": "llm", "reason": reason, "saved_seconds": 0.0}
+        usage = current_usage()
+        if usage is not None:
+            updates["usage"] = usage
+        await remember_report(state, updates)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         updates = {
             "messages": [
@@ -1,13 +1,18 @@
+import asyncio
+import copy
 import importlib
 import json
 from pathlib import Path
 
 import yaml
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 
 from core.state import AgentState
 from core.context_scanner import ContextScanner
-from memory.json_store import JSONStore
+from core.settings import get_settings
+from memory.context_manager import DEFAULT_CONTEXT_SETTINGS, build_relevant_context
+from memory.json_store import JSONStore, manifest_lock
+from memory.symbol_index import DEFAULT_SYMBOL_INDEX_SETTINGS, get_symbol_index
 from logger import logger
 
 
@@ -52,6 +57,7 @@ async def setup_node(state: AgentState) -> dict:
     config_path = (root_dir / "src" / "agents" / "config.yaml").resolve()
     manifest_path = (root_dir / ".ai_state.json").resolve()
     updates: dict = {}
+    json_store = JSONStore(str(manifest_path))
 
     # 1. System Prompt Yükle
     if config_path.exists():
@@ -76,6 +82,27 @@ async def setup_node(state: AgentState) -> dict:
             
             # Format language stats
             lang_str = ", ".join([f"{k} {v}" for k, v in languages.items()])
+
+            # Opsiyonel: dosya ağacına ek olarak üst seviye sınıf/fonksiyon isimleri
+            symbols_section = ""
+            symbol_settings = get_settings("symbol_index", DEFAULT_SYMBOL_INDEX_SETTINGS)
+            if symbol_settings["include_in_setup"]:
+                try:
+                    summary = await asyncio.to_thread(get_symbol_index(str(root_dir)).top_level_summary)
+                    symbols_section = f"Top-Level Symbols:\n{summary}\n"
+                except Exception as e:
+                    logger.warning(f"Symbol summary skipped: {e}")
+
+            # İsteğe göre seçilmiş, token bütçeli bağlam (dosya parçaları, semboller, görevler, raporlar)
+            relevant_section = ""
+            request = next((m.content for m in reversed(state.get("messages", [])) if isinstance(m, HumanMessage)), "")
+            if get_settings("context_manager", DEFAULT_CONTEXT_SETTINGS)["enabled"] and isinstance(request, str) and request.strip():
+                # Yalnızca görevler okunur; manifest bağlam kurulurken başka araçlarca değişebilir
+                tasks = json_store.load().get("tasks", [])
+                relevant = await asyncio.to_thread(build_relevant_context, str(root_dir), request, tasks)
+                updates["relevant_context"] = relevant
+                if relevant:
+                    relevant_section = f"Relevant Context (selected for this request):\n{relevant}"
             
             # System Prompt'a enjekte et
             context_injection = (
@@ -85,6 +112,8 @@ async def setup_node(state: AgentState) -> dict:
                 f"Frameworks Detected: {', '.join(frameworks)}\n"
                 f"Languages: {lang_str}\n"
                 f"File Structure:\n{files}\n"
+                f"{symbols_section}"
+                f"{relevant_section}"
                 f"[END CONTEXT]\n"
             )
             
@@ -93,10 +122,8 @@ async def setup_node(state: AgentState) -> dict:
             
             logger.info("System prompt loaded with automatic context injection.")
 
-    # 2. Manifest Yükle ve Güncelle
-    json_store = JSONStore(str(manifest_path))
-    manifest = json_store.load()
-    
+    # 2. Manifest Güncelle
+
     # SCANNER (Burada da çağırıp manifest'i güncelliyoruz)
     scanner = ContextScanner()
     files = scanner.scan_directory()
@@ -104,20 +131,23 @@ async def setup_node(state: AgentState) -> dict:
     frameworks = scanner.detect_frameworks()
     languages = scanner.get_language_stats()
     
-    # Manifest'i güncelle
-    manifest["project_meta"]["root_directory"] = str(root_dir)
-    manifest["project_meta"]["tech_stack"] = frameworks
-    manifest["project_meta"]["languages"] = languages
-    # Architecture veya diğer alanlara da ekleyebiliriz, şimdilik bunları basalım
-    
     # Context'i state'e de ekleyelim (Eğer yukarıda yapılmadıysa)
     if "system_info" not in updates:
          updates["system_info"] = sys_info
          updates["file_structure"] = files
     
-    # Değişiklikleri diske yaz
-    json_store.save(manifest)
+    # Manifest'i güncelle: kilit altında yeniden oku, yalnızca project_meta'yı değiştir ve yaz
+    # (bekleme sırasında eşzamanlı araçların yazdığı görevler ezilmesin)
+    with manifest_lock:
+        manifest = json_store.load()
+        project_meta = manifest.setdefault("project_meta", {})
+        scanned = {"root_directory": str(root_dir), "tech_stack": frameworks, "languages": languages}
+        # Değişiklik yoksa yazma: manifest sürümü (istek birleştirme anahtarı) her run'da değişmesin
+        if any(project_meta.get(k) != v for k, v in scanned.items()):
+            project_meta.update(scanned)
+            json_store.save(manifest)
     updates["manifest"] = manifest
+    updates["initial_manifest"] = copy.deepcopy(manifest)
     logger.info("Manifest loaded and updated with scanned context.")
 
     # Not: tools_dict ARTIK YÜKLENMİYOR.
@@ -1,14 +1,21 @@
+import uuid
 from typing import Annotated, Any, Dict, List, Optional, Type
 
 from langchain.tools import BaseTool
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import InjectedToolCallId
+from langgraph.prebuilt import InjectedState
 from pydantic import BaseModel, Field
 
 from agents.task_manager.agent_flow import create_task_manager_agent
 
 # Senin projendeki importlar
+from agents.main_agent.node.setup_node import load_tools_from_config
+from core.progress import relay_subgraph_event
+from core.request_context import DeadlineExceeded, current_request
 from core.state import AgentState
+from memory.run_store import task_manager_thread_prefix
 from logger import logger
-from src.agents.main_agent.node.setup_node import load_tools_from_config
 
 
 # 1. LLM'in göreceği parametre şeması (Sadece request'i görür)
@@ -16,6 +23,28 @@ class RouteTaskInput(BaseModel):
     request: str = Field(
         description="A summary of what needs to be done by the Task Manager (e.g., 'Add a task', 'Update status')."
     )
+    # ToolNode tarafından çağrı başına enjekte edilir; LLM'in şemasında görünmez
+    state: Annotated[dict, InjectedState]
+    tool_call_id: Annotated[str, InjectedToolCallId]
+
+
+def task_manager_input(state: dict, request: str) -> dict:
+    """
+    Sub-agent input for one routing call: the caller's state with the
+    pending route_to_task_manager call replaced by the request itself
+    (an unanswered tool call would be rejected by the provider).
+    """
+    messages = list(state.get("messages") or [])
+    if messages and isinstance(messages[-1], AIMessage) and messages[-1].tool_calls:
+        messages = messages[:-1]
+    return {**state, "messages": messages + [HumanMessage(content=request)]}
+
+
+def task_manager_thread_id(tool_call_id: Optional[str]) -> str:
+    """Own checkpoint thread per routing call, so parallel runs never share sub-agent state."""
+    request_context = current_request()
+    run_id = request_context.run_id if request_context else "local"
+    return f"{task_manager_thread_prefix(run_id)}{tool_call_id or uuid.uuid4().hex}"
 
 
 # 2. Config ile uyumlu Class
@@ -27,9 +56,7 @@ class RouteToTaskManager(BaseTool):
     )
     args_schema: Type[BaseModel] = RouteTaskInput
 
-    current_state: Optional[Dict] = None
-
-    def _run(self, request: str) -> str:
+    def _run(self, request: str, state: Optional[dict] = None, tool_call_id: Optional[str] = None) -> str:
         """Senkron çalıştırma (LangGraph async kullandığı için burası çalışmaz)."""
         return "Please use async execution."
 
@@ -37,18 +64,32 @@ class RouteToTaskManager(BaseTool):
     async def _arun(
         self,
         request: str,
+        state: Optional[dict] = None,
+        tool_call_id: Optional[str] = None,
     ) -> dict:
         """
         Main Agent bu tool'u çağırdığında:
         1. Task Manager Agent'ı ayağa kaldırır.
         2. İşi yaptırır.
         3. Sonucu alıp Main Agent'a döner.
+
+        State tool instance'ında tutulmaz: ToolNode onu bu çağrıya enjekte
+        eder ve alt ajan kendi thread'inde çalışır; eşzamanlı istekler
+        birbirinin state'ini göremez.
         """
         try:
             logger.info(
                 f"RouteToTaskManager: Routing request '{request}' to sub-agent."
             )
 
+            request_context = current_request()
+            exhausted = request_context.usage.exhausted() if request_context else None
+            if exhausted:
+                # Bütçe bittiyse alt ajanı hiç başlatma; ana ajan final response'a geçecek
+                return {
+                    "output": f"Task Manager skipped: the request's {exhausted} budget is exhausted."
+                }
+
             task_tools = load_tools_from_config("task_manager")
             if not task_tools:
                 return {"error": "Task Manager tools could not be loaded."}
@@ -58,7 +99,18 @@ class RouteToTaskManager(BaseTool):
 
             # 3. Sub-Agent'ı çalıştır (State burada güncellenir ve result döner)
             # Not: Sub-agent dosyaya yazar, result ise o anki çıktıyı taşır.
-            result = await task_agent.ainvoke(self.current_state)
+            # Kendi thread'inde çalıştığı için olayları üst run'a kendimiz aktarıyoruz
+            config = {"configurable": {"thread_id": task_manager_thread_id(tool_call_id)}}
+            result: Dict[str, Any] = {}
+            async for mode, chunk in task_agent.astream(
+                task_manager_input(state or {}, request),
+                config,
+                stream_mode=["values", "tasks", "custom"],
+            ):
+                if mode == "values":
+                    result = chunk
+                else:
+                    relay_subgraph_event(mode, chunk)
 
             # 4. Sonucu işle
             # Sub-agent'ın son mesajını alıyoruz
@@ -77,6 +129,9 @@ class RouteToTaskManager(BaseTool):
                 # "error": None  -> BaseTool genelde string veya dict döner, error key'i opsiyoneldir.
             }
 
+        except DeadlineExceeded:
+            # Alt ajan süreyi aştıysa hata metni olarak yutma; run'ı durdursun
+            raise
         except Exception as e:
             logger.error(f"RouteToTaskManager Error: {e}")
             return {
@@ -1,13 +1,19 @@
+from typing import Any, Dict, Tuple
+
 from langchain_core.messages import AIMessage
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, START, StateGraph
 from langgraph.prebuilt import ToolNode
 
 from agents.task_manager.node.analysis_agent import analysis_agent
+from core.checkpointer import get_checkpointer
+from core.budget import budget_exhausted
+from core.request_context import should_wrap_up
 from core.state import AgentState
 from logger import logger
 
-task_agent = None
+# Derlenmiş graph durumsuzdur; çalıştırma başına state, çağıranın verdiği thread_id'de tutulur.
+# Anahtar: tool isimleri (farklı tool setleriyle derlenen graph'lar karışmasın)
+_task_agents: Dict[Tuple[str, ...], Any] = {}
 
 
 def should_continue(state: AgentState) -> str:
@@ -15,6 +21,9 @@ def should_continue(state: AgentState) -> str:
     if isinstance(last_message, AIMessage) and getattr(
         last_message, "tool_calls", None
     ):
+        if budget_exhausted(state) or should_wrap_up():
+            logger.info("Task Manager: request budget or deadline reached, skipping further tool calls.")
+            return "end"
         return "tools"
     return "end"
 
@@ -24,15 +33,16 @@ async def create_task_manager_agent(tools_list):
     Task Manager sub-agent flow.
     Burada initial_state, Main Agent setup node tarafından zaten
     config + manifest + tools_dict ile doldurulmuş olmalı.
-    """
-
-    global task_agent
 
-    if task_agent is not None:
+    The compiled graph is cached and shared by concurrent runs; it holds no
+    per-run state, so callers must pass their own thread_id in the config.
+    """
+    key = tuple(tool.name for tool in tools_list)
+    if key in _task_agents:
         logger.info(
             "Task Manager agent workflow already created. Reusing existing instance."
         )
-        return task_agent
+        return _task_agents[key]
 
     workflow = StateGraph(AgentState)
     logger.info("Creating Task Manager agent workflow...")
@@ -54,11 +64,10 @@ async def create_task_manager_agent(tools_list):
     workflow.add_edge("tools", "analysis")
     logger.info("Defined workflow edges and conditions.")
 
-    memory = MemorySaver()
-    logger.info("Compiled Task Manager agent workflow with memory checkpointer.")
+    memory = get_checkpointer("task_manager")
+    logger.info("Compiled Task Manager agent workflow with bounded memory checkpointer.")
 
     compiled_graph = workflow.compile(checkpointer=memory)
+    _task_agents[key] = compiled_graph
 
-    task_agent = compiled_graph
-
-    return task_agent
+    return compiled_graph
@@ -2,7 +2,10 @@ import os
 from typing import Any, Dict
 
 from agents.main_agent.node.setup_node import load_tools_from_config
-from core.llm_factory import get_base_llm
+from core.history_compactor import compact_for_llm
+from core.llm_factory import get_llm
+from core.llm_invoker import ainvoke_llm
+from core.request_context import DeadlineExceeded, current_usage
 from core.state import AgentState
 from logger import logger
 
@@ -27,13 +30,13 @@ async def analysis_agent(state: AgentState) -> Dict[str, Any]:
     tools = load_tools_from_config("task_manager")
 
     # temperature=0 is essential for consistent tool parameter generation
-    llm = get_base_llm()
+    llm = get_llm("task_manager", "analysis")
 
     # Bind tools natively to the model
     llm_with_tools = llm.bind_tools(tools) if tools else llm
 
     try:
-        response = await llm_with_tools.ainvoke(state["messages"])
+        response = await ainvoke_llm(llm_with_tools, compact_for_llm(state["messages"]))
 
         # Determine if Gemini decided to call a tool
         has_tool_calls = bool(hasattr(response, "tool_calls") and response.tool_calls)
@@ -43,13 +46,19 @@ async def analysis_agent(state: AgentState) -> Dict[str, Any]:
             else "Analysis Agent: No tool call needed, proceeding to final response."
         )
 
-        return {
+        updates = {
             "messages": [response],  # Appends the AIMessage (with tool_calls if any)
             "current_agent": "analysis_agent",
             "history": [log_message],  # Appends to the history list via operator.add
             "error": None,
         }
+        usage = current_usage()
+        if usage is not None:
+            updates["usage"] = usage
+        return updates
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         error_msg = f"Analysis Agent Error: {str(e)}"
         logger.error(error_msg)
@@ -6,6 +6,9 @@ from pathlib import Path
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from core.request_context import check_deadline
+from memory.json_store import manifest_lock, write_json_atomic
+
 
 # LLM'in hangi argümanları kullanabileceğini anlaması için şema ekledik
 class ManifestUpdateInput(BaseModel):
@@ -40,38 +43,41 @@ class MimariMetaUpdater(BaseTool):
         active_goal: Optional[str] = None,
         global_rules: Optional[List[str]] = None,
     ) -> str:
-        try:
-            with open(self.filename, "r", encoding="utf-8") as f:
-                manifest = json.load(f)
+        # Süresi dolmuş bir istek manifest'e yeni yazma başlatmasın
+        check_deadline(self.name)
+
+        with manifest_lock:
+            try:
+                with open(self.filename, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
 
-            # 1. Project Meta Güncelleme
-            if name:
-                manifest["project_meta"]["name"] = name
-            if tech_stack:
-                manifest["project_meta"]["tech_stack"] = tech_stack
-            if architecture:
-                manifest["project_meta"]["architecture"] = architecture
-            if root_directory:
-                manifest["project_meta"]["root_directory"] = root_directory
+                # 1. Project Meta Güncelleme
+                if name:
+                    manifest["project_meta"]["name"] = name
+                if tech_stack:
+                    manifest["project_meta"]["tech_stack"] = tech_stack
+                if architecture:
+                    manifest["project_meta"]["architecture"] = architecture
+                if root_directory:
+                    manifest["project_meta"]["root_directory"] = root_directory
 
-            # 2. Project Status Güncelleme
-            if current_phase:
-                manifest["status"]["current_phase"] = current_phase
-            if active_goal:
-                manifest["status"]["active_goal"] = active_goal
+                # 2. Project Status Güncelleme
+                if current_phase:
+                    manifest["status"]["current_phase"] = current_phase
+                if active_goal:
+                    manifest["status"]["active_goal"] = active_goal
 
-            # Her güncellemede tarih otomatik güncellensin
-            manifest["status"]["last_update"] = datetime.now().strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
+                # Her güncellemede tarih otomatik güncellensin
+                manifest["status"]["last_update"] = datetime.now().strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                )
 
-            # 3. Global Rules Güncelleme
-            if global_rules is not None:
-                manifest["global_rules"] = global_rules
+                # 3. Global Rules Güncelleme
+                if global_rules is not None:
+                    manifest["global_rules"] = global_rules
 
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump(manifest, f, indent=4, ensure_ascii=False)
+                write_json_atomic(self.filename, manifest)
 
-            return "Project manifest successfully updated."
-        except Exception as e:
-            return f"Error updating manifest: {str(e)}"
+                return "Project manifest successfully updated."
+            except Exception as e:
+                return f"Error updating manifest: {str(e)}"
@@ -0,0 +1,207 @@
+import fnmatch
+import glob
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Type
+
+from langchain.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from agents.task_manager.tools.file_reader import resolve_project_path
+from core.file_cache import DEFAULT_FILE_READER_SETTINGS, FileSlice
+from core.history_compactor import get_token_counter
+from core.settings import get_settings
+from core.workspace import iter_workspace_files
+
+DEFAULT_BATCH_READER_SETTINGS = {
+    # Tüm dosyaların paylaştığı toplam token bütçesi
+    "token_budget": 8000,
+    "max_files": 40,
+    "workers": 8,
+    # Bütçede bundan az token kaldıysa dosya kesilerek eklenmez, atlanır
+    "min_file_tokens": 200,
+}
+
+# Glob genişletirken girilmeyen dizinler
+IGNORED_DIRS = {".git", "__pycache__", "node_modules", ".venv", "venv", ".pytest_cache", "dist", "build"}
+
+
+class BatchFileInput(BaseModel):
+    paths: List[str] = Field(
+        description="Relative file paths or glob patterns from project root (e.g., ['src/core/*.py', 'readme.md'])"
+    )
+    query: Optional[str] = Field(
+        None, description="What you are looking for; files mentioning these words are included first."
+    )
+    token_budget: Optional[int] = Field(
+        None, description="Total tokens for all returned content; cannot exceed the configured budget."
+    )
+
+
+@dataclass
+class FileRead:
+    path: str
+    explicit: bool
+    size: int = 0
+    text: str = ""
+    error: Optional[str] = None
+    score: int = 0
+    notes: List[str] = field(default_factory=list)
+
+
+def _query_terms(query: Optional[str]) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9_]+", (query or "").lower()) if len(t) >= 3]
+
+
+def _path_score(path: str, terms: List[str]) -> int:
+    return sum(3 * path.lower().count(t) for t in terms)
+
+
+def _glob_matches(relative: str, pattern: str) -> bool:
+    # fnmatch'te "*" "/" ile de eşleşir; "**/" hiç dizin olmadan da eşleşsin diye çıkarılmış hali denenir
+    return fnmatch.fnmatchcase(relative, pattern) or fnmatch.fnmatchcase(relative, pattern.replace("**/", ""))
+
+
+class BatchFileReader(BaseTool):
+    name: str = "read_files"
+    description: str = (
+        "Reads several files (paths or glob patterns) in one call and fits them into a shared token budget. "
+        "Smaller and query-relevant files come first; truncated files name the read_file range to continue."
+    )
+    args_schema: Type[BaseModel] = BatchFileInput
+
+    base_dir: str = os.getcwd()
+
+    def _run(self, paths: List[str], query: Optional[str] = None, token_budget: Optional[int] = None) -> str:
+        try:
+            settings = get_settings("read_files", DEFAULT_BATCH_READER_SETTINGS)
+            budget = min(token_budget or settings["token_budget"], settings["token_budget"])
+            if budget <= 0:
+                return "Error: token_budget must be positive."
+
+            files, notes = self._expand(paths)
+            if not files:
+                return "Error: No readable files matched. " + " ".join(notes)
+            terms = _query_terms(query)
+            if len(files) > settings["max_files"]:
+                # Kesmeden önce yola göre sırala ki sorguyla ilgili dosyalar elenmesin
+                files.sort(key=lambda f: (-_path_score(f.path, terms), not f.explicit))
+                notes.append(f"{len(files) - settings['max_files']} matching files skipped (max_files={settings['max_files']}).")
+                files = files[: settings["max_files"]]
+
+            # Disk okumaları paralel; önbellek ve mmap read_file ile ortak
+            reader_settings = get_settings("file_reader", DEFAULT_FILE_READER_SETTINGS)
+            with ThreadPoolExecutor(max_workers=settings["workers"]) as pool:
+                reads = list(pool.map(lambda f: self._read(f, reader_settings), files))
+
+            return self._fit(reads, terms, budget, settings["min_file_tokens"], notes)
+
+        except Exception as e:
+            return f"Error reading files: {str(e)}"
+
+    def _expand(self, patterns: List[str]) -> Tuple[List[FileRead], List[str]]:
+        """Resolves paths and globs to files under base_dir; escapes and misses become notes."""
+        root = os.path.realpath(self.base_dir)
+        files: List[FileRead] = []
+        seen = set()
+        notes: List[str] = []
+        for pattern in patterns:
+            explicit = not glob.has_magic(pattern)
+            if explicit:
+                candidates = [pattern]
+            elif "**" in pattern:
+                # Özyinelemeli glob yok sayılan dizinlere hiç girmeden yürünür
+                normalized = pattern.replace(os.sep, "/")
+                normalized = normalized[2:] if normalized.startswith("./") else normalized
+                candidates = sorted(
+                    relative for relative, _ in iter_workspace_files(root) if _glob_matches(relative, normalized)
+                )
+            else:
+                candidates = sorted(
+                    os.path.relpath(match, root)
+                    for match in glob.iglob(os.path.join(root, pattern), recursive=True)
+                )
+            matched = False
+            for relative in candidates:
+                full_path = resolve_project_path(root, relative)
+                if full_path is None:
+                    notes.append(f"Access denied: {relative} is outside the project root.")
+                    continue
+                if set(relative.replace(os.sep, "/").split("/")) & IGNORED_DIRS and not explicit:
+                    continue
+                if not os.path.isfile(full_path):
+                    if explicit:
+                        notes.append(f"Not found: {relative}.")
+                    continue
+                matched = True
+                if full_path not in seen:
+                    seen.add(full_path)
+                    files.append(FileRead(path=relative, explicit=explicit))
+            if not matched and not explicit:
+                notes.append(f"No files match {pattern}.")
+        return files, notes
+
+    def _read(self, file: FileRead, settings: dict) -> FileRead:
+        full_path = resolve_project_path(self.base_dir, file.path)
+        try:
+            with FileSlice(full_path, settings) as data:
+                file.size = data.size
+                if data.is_binary():
+                    file.error = "binary file, not shown"
+                    return file
+                # Dosya başına üst sınır read_file ile aynı; bütçe sonra uygulanır
+                chunk = data.read(0, settings["max_bytes"])
+                if data.size > settings["max_bytes"]:
+                    chunk = chunk[: chunk.rfind(b"\n") + 1] or chunk
+                    lines = chunk.count(b"\n")
+                    file.notes.append(
+                        f"first {lines or 1} lines of {data.size} bytes; continue with "
+                        f"read_file(relative_path='{file.path}', start_line={lines + 1})"
+                    )
+                file.text = chunk.decode("utf-8", errors="replace")
+        except Exception as e:
+            file.error = str(e)
+        return file
+
+    @staticmethod
+    def _fit(reads: List[FileRead], terms: List[str], budget: int, min_tokens: int, notes: List[str]) -> str:
+        counter = get_token_counter()
+        for file in reads:
+            haystack = f"{file.path.lower()} {file.text.lower()}"
+            file.score = _path_score(file.path, terms) + sum(min(haystack.count(t), 10) for t in terms)
+
+        # Önce ilgili, sonra açıkça istenen, sonra küçük dosyalar
+        ordered = sorted(reads, key=lambda f: (-f.score, not f.explicit, f.size, f.path))
+        remaining = budget
+        sections: List[str] = []
+        summary: List[str] = []
+        for file in ordered:
+            if file.error:
+                summary.append(f"- {file.path}: {file.error}")
+                continue
+            tokens = counter.count_text(file.text)
+            text = file.text
+            if tokens > remaining:
+                if remaining < min_tokens:
+                    summary.append(f"- {file.path}: skipped, token budget exhausted ({tokens} tokens)")
+                    continue
+                # Bütçeye sığan kısım, satır sınırında kesilir
+                cut = text[: int(len(text) * remaining / tokens)]
+                cut = cut[: cut.rfind("\n") + 1] or cut
+                shown_lines = cut.count("\n")
+                file.notes.append(
+                    f"truncated to fit the budget; continue with read_file(relative_path='{file.path}', "
+                    f"start_line={shown_lines + 1})"
+                )
+                text = cut
+                tokens = counter.count_text(text)
+            remaining -= tokens
+            info = f" [{'; '.join(file.notes)}]" if file.notes else ""
+            sections.append(f"--- Content: {file.path}{info} ---\n{text}\n")
+            summary.append(f"- {file.path}: {tokens} tokens" + (" (truncated)" if file.notes else ""))
+
+        header = f"Read {len(sections)} of {len(reads)} files, {budget - remaining}/{budget} tokens."
+        footer = "\n".join(summary + [f"- {note}" for note in notes])
+        return f"{header}\n\n" + "".join(sections) + f"\nFiles:\n{footer}\n"
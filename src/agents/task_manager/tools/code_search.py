@@ -0,0 +1,65 @@
+import os
+from typing import Optional, Type
+
+from langchain.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from memory.code_index import get_code_index
+
+
+class CodeSearchInput(BaseModel):
+    query: str = Field(description="Text to find (e.g., 'def get_settings'), or a regular expression when regex is true.")
+    regex: bool = Field(False, description="Treat query as a Python regular expression.")
+    case_sensitive: bool = Field(False, description="Match letter case exactly.")
+    path_glob: Optional[str] = Field(
+        None, description="Only search matching paths (e.g., 'src/core/*.py', '*.yaml')."
+    )
+    max_results: Optional[int] = Field(None, description="Maximum matching lines to return.")
+
+
+class CodeSearch(BaseTool):
+    name: str = "search_code"
+    description: str = (
+        "Searches the whole project for a string or regex using a prebuilt trigram index and returns "
+        "matching lines with surrounding context as path:line. Use it to locate code before read_file."
+    )
+    args_schema: Type[BaseModel] = CodeSearchInput
+
+    base_dir: str = os.getcwd()
+
+    def _run(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        path_glob: Optional[str] = None,
+        max_results: Optional[int] = None,
+    ) -> str:
+        try:
+            if not query:
+                return "Error: query must not be empty."
+            index = get_code_index(self.base_dir)
+            # Eski indeks yalnızca değişen dosyalar okunarak güncellenir
+            index.ensure_fresh()
+            limit = min(max_results or index.settings["max_results"], index.settings["max_results"])
+            matches, stats = index.search(
+                query, regex=regex, case_sensitive=case_sensitive, path_glob=path_glob, max_results=limit
+            )
+        except Exception as e:
+            return f"Error searching code: {str(e)}"
+
+        if not matches:
+            return f"No matches for {query!r} ({stats['files_scanned']} candidate files checked)."
+
+        blocks = []
+        for match in matches:
+            start = match.line_number - len(match.before)
+            lines = [f"{match.path}-{start + i}- {text}" for i, text in enumerate(match.before)]
+            lines.append(f"{match.path}:{match.line_number}: {match.line}")
+            lines += [f"{match.path}-{match.line_number + 1 + i}- {text}" for i, text in enumerate(match.after)]
+            blocks.append("\n".join(lines))
+
+        header = f"{len(matches)} matches in {len({m.path for m in matches})} files"
+        if stats["truncated"]:
+            header += f" (limited to {limit}; narrow the query or use path_glob)"
+        return header + ":\n" + "\n--\n".join(blocks) + "\n"
@@ -1,33 +1,63 @@
 import os
-from typing import Type
+from typing import Optional, Type
 
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from core.file_cache import DEFAULT_FILE_READER_SETTINGS, FileSlice
+from core.settings import get_settings
+
+NEWLINE = b"\n"
+
 
 class FileInput(BaseModel):
     relative_path: str = Field(
         description="Relative path of the file from project root (e.g., 'core/state.py')"
     )
+    start_line: Optional[int] = Field(
+        None, description="First line to read (1-based). Use with end_line to read part of a large file."
+    )
+    end_line: Optional[int] = Field(None, description="Last line to read (inclusive).")
+    byte_offset: Optional[int] = Field(
+        None, description="Read from this byte offset instead of by lines (for files with very long lines)."
+    )
+    max_bytes: Optional[int] = Field(
+        None, description="Maximum bytes to return; cannot exceed the configured limit."
+    )
+
+
+def resolve_project_path(base_dir: str, relative_path: str) -> Optional[str]:
+    """Absolute path of `relative_path` under `base_dir`, or None if it escapes it (.., symlinks)."""
+    root = os.path.realpath(base_dir)
+    full_path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, full_path]) != root:
+        return None
+    return full_path
 
 
 class FileReader(BaseTool):
     name: str = "read_file"
     description: str = (
-        "Reads file content from the project directory to gather context."
+        "Reads file content from the project directory to gather context. "
+        "Large files are truncated; follow the 'Next range' hint (start_line / byte_offset) to continue."
     )
     args_schema: Type[BaseModel] = FileInput
 
     base_dir: str = os.getcwd()
 
-    def _run(self, relative_path: str) -> str:
-        """Reads a file within the base directory."""
+    def _run(
+        self,
+        relative_path: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        byte_offset: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> str:
+        """Reads a file (or a line/byte range of it) within the base directory."""
         try:
-            # Config'den gelen base_dir ile AI'dan gelen yolu birleştiriyoruz
-            full_path = os.path.normpath(os.path.join(self.base_dir, relative_path))
-
             # Güvenlik Kontrolü: base_dir dışına çıkılmasını engelle (Path Traversal)
-            if not full_path.startswith(os.path.abspath(self.base_dir)):
+            full_path = resolve_project_path(self.base_dir, relative_path)
+            if full_path is None:
                 return "Error: Access denied. You cannot read files outside the project root."
 
             if not os.path.exists(full_path):
@@ -38,10 +68,71 @@ class FileReader(BaseTool):
                     f"Path is a directory. Contents: {', '.join(os.listdir(full_path))}"
                 )
 
-            with open(full_path, "r", encoding="utf-8") as f:
-                content = f.read()
+            if byte_offset is not None and (start_line is not None or end_line is not None):
+                return "Error: Use either start_line/end_line or byte_offset, not both."
 
-            return f"--- Content: {relative_path} ---\n{content}\n"
+            settings = get_settings("file_reader", DEFAULT_FILE_READER_SETTINGS)
+            limit = min(max_bytes or settings["max_bytes"], settings["max_bytes"])
+            if limit <= 0:
+                return "Error: max_bytes must be positive."
+
+            with FileSlice(full_path, settings) as file:
+                if file.is_binary():
+                    return f"Binary file {relative_path} ({file.size} bytes); content not shown."
+                if byte_offset is not None:
+                    return self._read_bytes(file, relative_path, byte_offset, limit)
+                return self._read_lines(file, relative_path, start_line, end_line, limit)
 
         except Exception as e:
             return f"Error reading {relative_path}: {str(e)}"
+
+    @staticmethod
+    def _read_lines(
+        file: FileSlice, relative_path: str, start_line: Optional[int], end_line: Optional[int], limit: int
+    ) -> str:
+        first = max(1, start_line or 1)
+        if end_line is not None and end_line < first:
+            return f"Error: end_line ({end_line}) is before start_line ({first})."
+
+        start = file.line_offset(first)
+        if start is None:
+            return f"Error: {relative_path} has fewer than {first} lines."
+        stop = file.size
+        if end_line is not None:
+            stop = file.line_offset(end_line + 1) or file.size
+
+        chunk = file.read(start, min(stop, start + limit))
+        next_range = None
+        if start + limit < stop:
+            cut = chunk.rfind(NEWLINE)
+            if cut >= 0:
+                # Satır ortasında kesme; sonraki çağrı bir sonraki satırdan devam eder
+                chunk = chunk[: cut + 1]
+                next_range = f"start_line={first + chunk.count(NEWLINE)}"
+                if end_line is not None:
+                    next_range += f", end_line={end_line}"
+            else:
+                # Tek satır sınırdan uzun (minified bundle vb.): bayt aralığıyla devam
+                next_range = f"byte_offset={start + len(chunk)}"
+
+        content = chunk.decode("utf-8", errors="replace")
+        if start_line is None and end_line is None and next_range is None:
+            return f"--- Content: {relative_path} ---\n{content}\n"
+
+        last = first + max(0, chunk.count(NEWLINE) - (1 if chunk.endswith(NEWLINE) else 0))
+        text = f"--- Content: {relative_path} (lines {first}-{last}) ---\n{content}\n"
+        if next_range:
+            text += f"[... truncated at {limit} bytes of {file.size}. Next range: {next_range}]\n"
+        return text
+
+    @staticmethod
+    def _read_bytes(file: FileSlice, relative_path: str, byte_offset: int, limit: int) -> str:
+        if byte_offset < 0 or byte_offset >= file.size:
+            return f"Error: byte_offset {byte_offset} is outside {relative_path} ({file.size} bytes)."
+        end = min(file.size, byte_offset + limit)
+        # Aralık sınırında bölünen çok baytlı karakterler atlanır
+        content = file.read(byte_offset, end).decode("utf-8", errors="ignore")
+        text = f"--- Content: {relative_path} (bytes {byte_offset}-{end} of {file.size}) ---\n{content}\n"
+        if end < file.size:
+            text += f"[... truncated at {limit} bytes of {file.size}. Next range: byte_offset={end}]\n"
+        return text
@@ -0,0 +1,97 @@
+import glob
+import os
+from typing import Dict, List, Optional, Tuple, Type
+
+from langchain.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from agents.task_manager.tools.file_reader import resolve_project_path
+from memory.symbol_index import SymbolIndex, format_outline, get_symbol_index
+
+
+class OutlineInput(BaseModel):
+    paths: List[str] = Field(
+        description="Files, directories or glob patterns from project root (e.g., ['src/core', 'src/cli.py'])"
+    )
+    include_private: Optional[bool] = Field(
+        None, description="Also list _private functions and methods."
+    )
+
+
+class Outline(BaseTool):
+    name: str = "outline"
+    description: str = (
+        "Shows the structure of source files without their bodies: classes, functions, methods, "
+        "signatures, line ranges and the first docstring line. Much cheaper than read_file; "
+        "use it first, then read only the line ranges you need."
+    )
+    args_schema: Type[BaseModel] = OutlineInput
+
+    base_dir: str = os.getcwd()
+
+    def _run(self, paths: List[str], include_private: Optional[bool] = None) -> str:
+        try:
+            index = get_symbol_index(self.base_dir)
+            settings = index.settings
+            files, notes = self._expand(paths, index)
+            if not files:
+                return "Error: No supported source files matched. " + " ".join(notes)
+            if len(files) > settings["max_files"]:
+                notes.append(f"{len(files) - settings['max_files']} more files not shown (max_files={settings['max_files']}); narrow the paths.")
+                files = files[: settings["max_files"]]
+
+            private = settings["include_private"] if include_private is None else include_private
+            sections = []
+            for path in files:
+                symbols, error = index.outline(path)
+                if error:
+                    sections.append(f"{path}\n  ({error})")
+                elif symbols:
+                    sections.append(format_outline(path, symbols, include_private=private))
+                else:
+                    sections.append(f"{path}\n  (no symbols)")
+            # Ayrıştırılan dosyalar bir sonraki çalıştırma için diske yazılır
+            index.save()
+            return "\n\n".join(sections + [f"Note: {note}" for note in notes]) + "\n"
+
+        except Exception as e:
+            return f"Error building outline: {str(e)}"
+
+    def _expand(self, patterns: List[str], index: SymbolIndex) -> Tuple[List[str], List[str]]:
+        """Files for the given paths; directories expand to their non-ignored supported files."""
+        root = os.path.realpath(self.base_dir)
+        workspace: Optional[Dict[str, None]] = None
+        files: List[str] = []
+        notes: List[str] = []
+        for pattern in patterns:
+            if glob.has_magic(pattern):
+                candidates = sorted(glob.iglob(os.path.join(root, pattern), recursive=True))
+            else:
+                candidates = [os.path.join(root, pattern)]
+            matched = False
+            for candidate in candidates:
+                full_path = resolve_project_path(root, os.path.relpath(candidate, root))
+                if full_path is None:
+                    notes.append(f"Access denied: {pattern} is outside the project root.")
+                    continue
+                relative = os.path.relpath(full_path, root).replace(os.sep, "/")
+                if os.path.isdir(full_path):
+                    # Ignore kuralları kökten uygulanır; çalışma alanı bir kez taranır
+                    workspace = workspace if workspace is not None else dict.fromkeys(index.workspace_files())
+                    prefix = "" if relative == "." else f"{relative}/"
+                    found = [path for path in workspace if path.startswith(prefix)]
+                elif os.path.isfile(full_path) and index.supports(relative):
+                    found = [relative]
+                    if glob.has_magic(pattern):
+                        # Glob ile gelen ignore edilmiş dosyalar (venv, node_modules...) atlanır
+                        workspace = workspace if workspace is not None else dict.fromkeys(index.workspace_files())
+                        found = [path for path in found if path in workspace]
+                else:
+                    found = []
+                for path in found:
+                    matched = True
+                    if path not in files:
+                        files.append(path)
+            if not matched:
+                notes.append(f"No supported files match {pattern}.")
+        return files, notes
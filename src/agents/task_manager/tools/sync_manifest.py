@@ -6,6 +6,9 @@ from pathlib import Path
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from core.request_context import check_deadline
+from memory.json_store import manifest_lock, write_json_atomic
+
 
 class SyncManifestInput(BaseModel):
     manifest_data: Dict[str, Any] = Field(
@@ -21,14 +24,17 @@ class SyncManifest(BaseTool):
     filename: str = str((root_dir / ".ai_state.json").resolve())
 
     def _run(self, manifest_data: Dict[str, Any]) -> str:
-        try:
-            if "status" in manifest_data:
-                manifest_data["status"]["last_update"] = datetime.now().strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )
-
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump(manifest_data, f, indent=4, ensure_ascii=False)
-            return f"Successfully synchronized manifest to {self.filename}"
-        except Exception as e:
-            return f"Error during synchronization: {str(e)}"
+        # Süresi dolmuş bir istek manifest'e yeni yazma başlatmasın
+        check_deadline(self.name)
+
+        with manifest_lock:
+            try:
+                if "status" in manifest_data:
+                    manifest_data["status"]["last_update"] = datetime.now().strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    )
+
+                write_json_atomic(self.filename, manifest_data)
+                return f"Successfully synchronized manifest to {self.filename}"
+            except Exception as e:
+                return f"Error during synchronization: {str(e)}"
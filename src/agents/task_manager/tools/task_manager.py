@@ -6,6 +6,9 @@ from typing import Any, Dict, List, Literal, Optional, Type
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from core.request_context import check_deadline
+from memory.json_store import manifest_lock, write_json_atomic
+
 
 class TaskInput(BaseModel):
     action: Literal["add", "update", "delete"] = Field(
@@ -46,65 +49,67 @@ class ManageTasks(BaseTool):
         dependencies: Optional[List[str]] = None,  # Eklendi
     ) -> str:
         msg: str = "No action performed."
+        # Süresi dolmuş bir istek manifest'e yeni yazma başlatmasın
+        check_deadline(self.name)
 
-        try:
-            if not os.path.exists(self.filename):
-                return "Error: Manifest file not found."
-
-            with open(self.filename, "r", encoding="utf-8") as f:
-                manifest = json.load(f)
-
-            tasks: List[Dict[str, Any]] = manifest.get("tasks", [])
-
-            if action == "add":
-                new_task = {
-                    "id": task_id,
-                    "title": title or "Untitled Task",
-                    "status": status,
-                    "description": description or "",
-                    "outcome": outcome or "",  # Eklendi
-                    "dependencies": dependencies or [],  # Eklendi
-                }
-                tasks.append(new_task)
-                msg = f"Task '{task_id}' added successfully."
-
-            elif action == "update":
-                found = False
-                for t in tasks:
-                    if t["id"] == task_id:
-                        if title is not None:
-                            t["title"] = title
-                        if status is not None:
-                            t["status"] = status
-                        if description is not None:
-                            t["description"] = description
-                        if outcome is not None:  # Eklendi
-                            t["outcome"] = outcome
-                        if dependencies is not None:  # Eklendi
-                            t["dependencies"] = dependencies
-                        found = True
-                        break
-                msg = (
-                    f"Task '{task_id}' updated."
-                    if found
-                    else f"Task '{task_id}' not found."
-                )
-            elif action == "delete":
-                original_count = len(tasks)
-                tasks = [t for t in tasks if t["id"] != task_id]
-                if len(tasks) < original_count:
-                    msg = f"Task '{task_id}' deleted successfully."
-                else:
-                    msg = f"Task '{task_id}' not found, nothing to delete."
+        with manifest_lock:
+            try:
+                if not os.path.exists(self.filename):
+                    return "Error: Manifest file not found."
+
+                with open(self.filename, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+
+                tasks: List[Dict[str, Any]] = manifest.get("tasks", [])
 
-            else:
-                msg = f"Invalid action: {action}"
+                if action == "add":
+                    new_task = {
+                        "id": task_id,
+                        "title": title or "Untitled Task",
+                        "status": status,
+                        "description": description or "",
+                        "outcome": outcome or "",  # Eklendi
+                        "dependencies": dependencies or [],  # Eklendi
+                    }
+                    tasks.append(new_task)
+                    msg = f"Task '{task_id}' added successfully."
+
+                elif action == "update":
+                    found = False
+                    for t in tasks:
+                        if t["id"] == task_id:
+                            if title is not None:
+                                t["title"] = title
+                            if status is not None:
+                                t["status"] = status
+                            if description is not None:
+                                t["description"] = description
+                            if outcome is not None:  # Eklendi
+                                t["outcome"] = outcome
+                            if dependencies is not None:  # Eklendi
+                                t["dependencies"] = dependencies
+                            found = True
+                            break
+                    msg = (
+                        f"Task '{task_id}' updated."
+                        if found
+                        else f"Task '{task_id}' not found."
+                    )
+                elif action == "delete":
+                    original_count = len(tasks)
+                    tasks = [t for t in tasks if t["id"] != task_id]
+                    if len(tasks) < original_count:
+                        msg = f"Task '{task_id}' deleted successfully."
+                    else:
+                        msg = f"Task '{task_id}' not found, nothing to delete."
+
+                else:
+                    msg = f"Invalid action: {action}"
 
-            manifest["tasks"] = tasks
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump(manifest, f, indent=4, ensure_ascii=False)
+                manifest["tasks"] = tasks
+                write_json_atomic(self.filename, manifest)
 
-            return msg
+                return msg
 
-        except Exception as e:
-            return f"Error managing tasks: {str(e)}"
+            except Exception as e:
+                return f"Error managing tasks: {str(e)}"
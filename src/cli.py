@@ -1,6 +1,7 @@
 from pathlib import Path
 import argparse
 import asyncio
+import contextlib
 import os
 import sys
 
@@ -8,72 +9,273 @@ import sys
 root_dir = Path(__file__).resolve().parent
 sys.path.insert(0, str(root_dir))
 
-from agents.main_agent.agent_flow import create_main_agent
+from core.checkpointer import DEFAULT_CHECKPOINTER_SETTINGS, close_checkpointers
+from core.llm_factory import close_llms
+from core.budget import format_usage
+from core.fast_path import try_fast_path
+from core.finalization import POLICIES, format_finalization
+from core.progress import astream_run
+from core.request_context import DeadlineExceeded, RequestContext, request_scope
+from core.settings import get_settings
+from core.telemetry import (
+    DEFAULT_TELEMETRY_SETTINGS,
+    Telemetry,
+    format_summary,
+    telemetry_summary,
+)
 from memory.json_store import JSONStore
+from memory.run_store import RunStore
 from langchain_core.messages import HumanMessage
 
 def get_manifest_path():
     return str(Path(__file__).resolve().parent.parent / ".ai_state.json")
 
-async def run_cli(request: str, raw: bool = False):
+async def run_cli(
+    request: str,
+    raw: bool = False,
+    resume_run_id: str = None,
+    timeout: float = None,
+    budgets: dict = None,
+    finalization: str = None,
+    show_metrics: bool = False,
+    cassette: dict = None,
+):
+    if not resume_run_id:
+        # "mark T3 completed" gibi mekanik komutlar graph'a ve LLM'e gitmeden uygulanır
+        fast_path = try_fast_path(request, get_manifest_path())
+        if fast_path is not None:
+            if not raw:
+                print("⚡ Applied directly to the manifest (fast path, no LLM calls):")
+            for message in fast_path:
+                print(message if raw else f"   ▸ {message}")
+            return
+
     if not raw:
-        print(f"🏗️  Architecting prompt for request: '{request}'...\n")
-    
+        if resume_run_id:
+            print(f"🔁 Resuming architect run '{resume_run_id}'...\n")
+        else:
+            print(f"🏗️  Architecting prompt for request: '{request}'...\n")
+
+    run_store = RunStore()
+    run_id = resume_run_id or RunStore.new_run_id()
+
     try:
+        # Graph + LangGraph importu yalnızca gerçek bir çalıştırmada ödenir (--help/--cleanup hızlı kalsın)
+        from agents.main_agent.agent_flow import create_main_agent
+
         app = await create_main_agent()
-        
-        architect_request = (
-            f"Please analyze the following request and generate a detailed, "
-            f"architected prompt that an expert developer can use to implement it. "
-            f"Focus on technical details, file structure, and best practices. "
-            f"\n\nUser Request: {request}"
+
+        if resume_run_id:
+            run = run_store.get(resume_run_id)
+            if run is None:
+                raise ValueError(f"Unknown run ID '{resume_run_id}'")
+            config = {"configurable": {"thread_id": run["thread_id"]}}
+            # None input: graph son tamamlanan node'dan devam eder
+            graph_input = None
+            # Run'ın kayıtlı bütçeleri geçerli (komut satırı bayrakları hariç), harcanan kısım düşülür
+            overrides = {k: v for k, v in (budgets or {}).items() if v is not None}
+            context = RequestContext.from_settings(run_id, timeout, **{**(run["budgets"] or {}), **overrides})
+            context.usage.restore((await app.aget_state(config)).values.get("usage"))
+            run_store.finish(run_id, "running")
+        else:
+            architect_request = (
+                f"Please analyze the following request and generate a detailed, "
+                f"architected prompt that an expert developer can use to implement it. "
+                f"Focus on technical details, file structure, and best practices. "
+                f"\n\nUser Request: {request}"
+            )
+
+            graph_input = {
+                "messages": [HumanMessage(content=architect_request)],
+                "manifest": JSONStore(get_manifest_path()).load(),
+                "history": [],
+                "current_agent": "start",
+                "finalization_policy": finalization,
+            }
+
+            thread_id = f"cli_{run_id}"
+            config = {"configurable": {"thread_id": thread_id}}
+            context = RequestContext.from_settings(run_id, timeout, **(budgets or {}))
+            run_store.start(run_id, thread_id, request, source="cli", budgets=context.usage.budgets())
+
+        streamed = []
+
+        async def print_progress(message: str):
+            print(f"   ▸ {message}", flush=True)
+
+        def print_token(text: str):
+            # İlk token geldiğinde başlığı bas, sonra token'ları anında akıt
+            if not streamed and not raw:
+                print("\n" + "="*80)
+                print("🏛️  ARCHITECTED PROMPT")
+                print("="*80 + "\n")
+            streamed.append(text)
+            print(text, end="", flush=True)
+
+        # Kaset: LLM çağrıları kaydedilir ya da ağa gitmeden kayıttan oynatılır
+        from core.cassette import default_cassette_path, use_cassette
+
+        cassette_scope = (
+            use_cassette(
+                cassette["path"] or default_cassette_path(run_id),
+                cassette["mode"],
+                simulate_latency=cassette["simulate_latency"],
+                session=run_id,
+            )
+            if cassette
+            else contextlib.nullcontext()
         )
-        
-        initial_state = {
-            "messages": [HumanMessage(content=architect_request)],
-            "manifest": JSONStore(get_manifest_path()).load(),
-            "history": [],
-            "current_agent": "start",
-        }
-        
-        config = {"configurable": {"thread_id": "cli_architect_request"}}
-        
-        final_response = ""
-        
-        async for event in app.astream(initial_state, config=config):
-            for node_name, state_update in event.items():
-                if "messages" in state_update and state_update["messages"]:
-                    msg = state_update["messages"][-1]
-                    if msg.content:
-                        final_response = msg.content
-        
-        if raw:
+        with cassette_scope as active, request_scope(context):
+            await astream_run(
+                app,
+                graph_input,
+                config,
+                on_node=lambda node_name: run_store.update_node(run_id, node_name),
+                on_progress=None if raw else print_progress,
+                on_token=print_token,
+            )
+        if active is not None and not raw:
+            if active.mode == "record":
+                print(f"📼 {len(active.interactions)} LLM interactions recorded to {active.path}")
+            else:
+                print(f"📼 {active.served}/{len(active.interactions)} LLM interactions replayed from {active.path}")
+
+        snapshot = await app.aget_state(config)
+        messages = snapshot.values.get("messages") or []
+        final_response = messages[-1].content if messages else ""
+        usage_line = format_usage(snapshot.values.get("usage"))
+        finalization_line = format_finalization(snapshot.values.get("finalization"))
+        if finalization_line:
+            usage_line += f"\n📝 {finalization_line}"
+
+        run_store.finish(run_id, "completed")
+
+        if streamed:
+            print()
+            if not raw:
+                print("\n" + "="*80)
+                print(f"📊 {usage_line}\n")
+        elif raw:
             print(final_response)
         else:
             print("\n" + "="*80)
             print("🏛️  ARCHITECTED PROMPT")
             print("="*80 + "\n")
             print(final_response)
-            print("\n" + "="*80 + "\n")
+            print("\n" + "="*80)
+            print(f"📊 {usage_line}\n")
+
+        if show_metrics:
+            # --raw çıktısı borulara gider; ölçümler stderr'e
+            out = sys.stderr if raw else sys.stdout
+            print("⏱️  Stage latencies (this run):", file=out)
+            print(format_summary(telemetry_summary()), file=out)
 
-    except Exception as e:
-        if args.raw:
+    except DeadlineExceeded as e:
+        run_store.finish(run_id, "timed_out", str(e))
+        print(f"{'Error' if raw else '⏱️  Timeout'}: {str(e)}")
+        if not raw and get_settings("checkpointer", DEFAULT_CHECKPOINTER_SETTINGS)["backend"] == "sqlite":
+            print(f"   Resume with: python src/cli.py --resume {run_id}")
+    except (Exception, KeyboardInterrupt, asyncio.CancelledError) as e:
+        run_store.finish(run_id, "failed", str(e))
+        if raw:
              print(f"Error: {str(e)}")
         else:
              print(f"❌ Error: {str(e)}")
+             if get_settings("checkpointer", DEFAULT_CHECKPOINTER_SETTINGS)["backend"] == "sqlite":
+                 print(f"   Resume with: python src/cli.py --resume {run_id}")
+    finally:
+        await close_llms()
+        await close_checkpointers()
 
 def main():
     parser = argparse.ArgumentParser(description="Prompt Architect CLI")
     parser.add_argument("request", nargs="?", help="The coding request to architect")
     parser.add_argument("--raw", action="store_true", help="Output only the architected prompt")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume an interrupted run from its last completed node, keeping its budgets and the usage already spent")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS", help="Wall-clock limit for the run (default: deadlines.request_timeout_seconds, 0 = none)")
+    parser.add_argument("--max-llm-calls", type=int, metavar="N", help="LLM call budget for the run (default: budgets.max_llm_calls)")
+    parser.add_argument("--max-tokens", type=int, metavar="N", help="Total token budget for the run (default: budgets.max_total_tokens)")
+    parser.add_argument("--max-cost", type=float, metavar="USD", help="Estimated cost budget for the run (default: budgets.max_cost_usd)")
+    parser.add_argument("--finalize", choices=POLICIES, help="How the final report is produced (default: finalization.policy)")
+    parser.add_argument("--metrics", action="store_true", help="Print p50/p95 latency per stage (nodes, LLM calls, tools, manifest I/O) after the run")
+    parser.add_argument("--trace-report", action="store_true", help="Print p50/p95 latency per stage over the recorded trace file and exit")
+    parser.add_argument("--prometheus", action="store_true", help="Print a Prometheus text snapshot built from the trace file and exit")
+    parser.add_argument("--record-cassette", nargs="?", const="", metavar="PATH", help="Record every LLM request/response of the run (default path: cassettes.directory/<run_id>.json)")
+    parser.add_argument("--replay-cassette", metavar="PATH", help="Serve LLM responses from a recorded cassette instead of the provider")
+    parser.add_argument("--replay-latency", action="store_true", help="With --replay-cassette, wait the recorded latency of each call")
+    parser.add_argument("--cleanup-checkpoints", action="store_true", help="Delete runs and checkpoints older than checkpointer.retention_days")
+    parser.add_argument("--index", action="store_true", help="Build or refresh the code search index and the vector store of the current directory and exit")
     args = parser.parse_args()
-    
-    if not args.request:
+
+    if args.cleanup_checkpoints:
+        settings = get_settings("checkpointer", DEFAULT_CHECKPOINTER_SETTINGS)
+        deleted = RunStore().cleanup(settings["retention_days"])
+        print(f"Cleanup finished: {deleted}")
+        return
+
+    if args.index:
+        from memory.code_index import get_code_index
+
+        from memory.vector_store import get_vector_store, sync_files, sync_tasks
+
+        index = get_code_index(os.getcwd())
+        result = index.update()
+        print(f"Code index updated in {result['seconds']}s: {index.stats()}")
+        store = get_vector_store(os.getcwd())
+        files = sync_files(store, os.getcwd())
+        tasks = sync_tasks(store, JSONStore(get_manifest_path()).load().get("tasks", []))
+        store.save()
+        print(f"Vector store updated: files {files}, tasks {tasks}, {store.stats()}")
+        return
+
+    if args.trace_report or args.prometheus:
+        trace_file = Telemetry.from_settings().trace_path
+        if trace_file is None:
+            print("Tracing to a file is disabled (telemetry.trace_file).")
+            return
+        settings = get_settings("telemetry", DEFAULT_TELEMETRY_SETTINGS)
+        telemetry = Telemetry.from_jsonl(
+            str(trace_file), buckets=settings["buckets_seconds"], window=settings["quantile_window"]
+        )
+        print(telemetry.prometheus_text() if args.prometheus else format_summary(telemetry.summary()))
+        return
+
+    if not args.request and not args.resume:
         if not args.raw:
             print("Usage: python src/cli.py \"Your request here\"")
         return
 
-    asyncio.run(run_cli(args.request, raw=args.raw))
+    budgets = {
+        "max_llm_calls": args.max_llm_calls,
+        "max_total_tokens": args.max_tokens,
+        "max_cost_usd": args.max_cost,
+    }
+    if args.record_cassette is not None and args.replay_cassette:
+        parser.error("--record-cassette and --replay-cassette cannot be combined")
+    cassette = None
+    if args.record_cassette is not None or args.replay_cassette:
+        from core.cassette import DEFAULT_CASSETTE_SETTINGS
+
+        settings = get_settings("cassettes", DEFAULT_CASSETTE_SETTINGS)
+        cassette = {
+            "mode": "replay" if args.replay_cassette else "record",
+            "path": args.replay_cassette or args.record_cassette,
+            "simulate_latency": args.replay_latency or settings["simulate_latency"],
+        }
+
+    asyncio.run(
+        run_cli(
+            args.request,
+            raw=args.raw,
+            resume_run_id=args.resume,
+            timeout=args.timeout,
+            budgets=budgets,
+            finalization=args.finalize,
+            show_metrics=args.metrics,
+            cassette=cassette,
+        )
+    )
 
 if __name__ == "__main__":
     main()
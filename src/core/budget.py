@@ -0,0 +1,178 @@
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+
+from core.history_compactor import get_token_counter, message_text
+from core.settings import get_settings
+
+DEFAULT_BUDGET_SETTINGS = {
+    # 0 = sınırsız. Final response çağrısı her zaman yapılır, sınırı biraz aşabilir.
+    "max_llm_calls": 20,
+    "max_total_tokens": 150000,
+    "max_cost_usd": 0.50,
+    # USD per 1M tokens: [input, output]. Eşleşme en uzun önek ile yapılır.
+    "pricing": {
+        "gpt-4o-mini": [0.15, 0.60],
+        "gpt-4o": [2.50, 10.00],
+        "claude-3-5-sonnet": [3.00, 15.00],
+        "gemini-2.5-flash": [0.30, 2.50],
+    },
+}
+
+
+def model_name_of(llm: Any, response: Optional[BaseMessage] = None) -> Optional[str]:
+    """Model name reported by the provider, else the configured one (looks through bind_tools())."""
+    metadata = getattr(response, "response_metadata", None) or {}
+    name = metadata.get("model_name") or metadata.get("model")
+    current = llm
+    for _ in range(8):
+        if name:
+            break
+        name = getattr(current, "model_name", None) or getattr(current, "model", None)
+        current = getattr(current, "bound", None)
+        if current is None:
+            break
+    return str(name) if name else None
+
+
+def price_of(model: Optional[str], pricing: Dict[str, Sequence[float]]) -> Optional[Sequence[float]]:
+    if not model:
+        return None
+    matches = [key for key in pricing if model.startswith(key)]
+    return pricing[max(matches, key=len)] if matches else None
+
+
+def token_usage(messages: Sequence[BaseMessage], response: BaseMessage) -> Tuple[int, int]:
+    """(input, output) tokens reported by the provider, else estimated."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    input_tokens = usage.get("input_tokens")
+    output_tokens = usage.get("output_tokens")
+    if input_tokens is None or output_tokens is None:
+        # Sağlayıcı kullanım bilgisi dönmediyse tahmin et
+        counter = get_token_counter()
+        input_tokens = counter.count_messages(messages)
+        output_tokens = counter.count_text(message_text(response))
+    return input_tokens, output_tokens
+
+
+class UsageMeter:
+    """
+    Per-request LLM usage (calls, tokens, estimated cost) and its budget.
+    Every LLM call of a run, including the task manager sub-graph, is
+    recorded here by ainvoke_llm; nodes copy snapshot() into AgentState.
+    """
+
+    def __init__(
+        self,
+        max_llm_calls: int = 0,
+        max_total_tokens: int = 0,
+        max_cost_usd: float = 0.0,
+        pricing: Optional[Dict[str, Sequence[float]]] = None,
+    ):
+        self.limits = {
+            "llm_calls": max_llm_calls or None,
+            "total_tokens": max_total_tokens or None,
+            "cost_usd": max_cost_usd or None,
+        }
+        self.pricing = pricing or {}
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.unpriced_models: set = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "UsageMeter":
+        settings = dict(get_settings("budgets", DEFAULT_BUDGET_SETTINGS))
+        settings.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(
+            max_llm_calls=settings["max_llm_calls"],
+            max_total_tokens=settings["max_total_tokens"],
+            max_cost_usd=settings["max_cost_usd"],
+            pricing=settings["pricing"],
+        )
+
+    def budgets(self) -> Dict[str, Any]:
+        """Limits as `budgets` overrides (0 = unlimited), e.g. to store them with a run."""
+        return {
+            "max_llm_calls": self.limits["llm_calls"] or 0,
+            "max_total_tokens": self.limits["total_tokens"] or 0,
+            "max_cost_usd": self.limits["cost_usd"] or 0.0,
+        }
+
+    def restore(self, usage: Optional[dict]) -> None:
+        """Continues from a snapshot() (e.g. the checkpointed usage of a resumed run)."""
+        if not usage:
+            return
+        with self._lock:
+            self.llm_calls = usage.get("llm_calls", 0)
+            self.input_tokens = usage.get("input_tokens", 0)
+            self.output_tokens = usage.get("output_tokens", 0)
+            self.cost_usd = usage.get("cost_usd", 0.0)
+            self.unpriced_models = set(usage.get("unpriced_models") or [])
+
+    def record(self, llm: Any, messages: Sequence[BaseMessage], response: BaseMessage) -> None:
+        input_tokens, output_tokens = token_usage(messages, response)
+        model = model_name_of(llm, response)
+        price = price_of(model, self.pricing)
+        with self._lock:
+            self.llm_calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            if price is None:
+                self.unpriced_models.add(model or "unknown")
+            else:
+                self.cost_usd += (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def exhausted(self) -> Optional[str]:
+        """Name of the first budget that has run out, or None."""
+        used = {"llm_calls": self.llm_calls, "total_tokens": self.total_tokens, "cost_usd": self.cost_usd}
+        for name, limit in self.limits.items():
+            if limit is not None and used[name] >= limit:
+                return name
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "llm_calls": self.llm_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "limits": dict(self.limits),
+            "exhausted": self.exhausted(),
+            "unpriced_models": sorted(self.unpriced_models),
+        }
+
+
+def budget_exhausted(state: dict) -> Optional[str]:
+    """Budget that has run out according to the usage tracked in AgentState."""
+    return (state.get("usage") or {}).get("exhausted")
+
+
+def format_usage(usage: Optional[dict]) -> str:
+    if not usage:
+        return "Usage: not tracked."
+    limits = usage.get("limits") or {}
+
+    def of(name: str, value: str) -> str:
+        return f"{value}/{limits[name]}" if limits.get(name) is not None else value
+
+    cost = f"${usage['cost_usd']:.4f}"
+    text = (
+        f"Usage: {of('llm_calls', str(usage['llm_calls']))} LLM calls, "
+        f"{of('total_tokens', format(usage['total_tokens'], ','))} tokens "
+        f"(in {usage['input_tokens']:,} / out {usage['output_tokens']:,}), "
+        f"est. cost {of('cost_usd', cost)}"
+    )
+    if usage.get("exhausted"):
+        text += f" — {usage['exhausted']} budget reached"
+    if usage.get("unpriced_models"):
+        text += f" (no pricing for: {', '.join(usage['unpriced_models'])})"
+    return text + "."
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict
+
+from core.settings import get_settings
+from logger import logger
+
+DEFAULT_CASSETTE_SETTINGS = {
+    # --record-cassette yol verilmezse kayıt <directory>/<run_id>.json'a yazılır
+    "directory": ".ai_cassettes",
+    # Replay'de kaydedilen gecikmeyi de bekle (--replay-latency ile de açılır)
+    "simulate_latency": False,
+}
+
+MODES = ("record", "replay")
+CASSETTE_VERSION = 1
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded interaction for a model call."""
+
+
+def request_fingerprint(messages: Sequence[BaseMessage]) -> str:
+    """Hash of message types, contents and tool calls (ids excluded, they change between runs)."""
+    shape = [
+        [
+            message.type,
+            message.content,
+            [[c["name"], c["args"]] for c in getattr(message, "tool_calls", None) or []],
+        ]
+        for message in messages
+    ]
+    encoded = json.dumps(shape, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class Cassette:
+    """
+    Recorded LLM interactions of one session, stored as a JSON file.
+
+    Every interaction keeps the "<agent>.<node>" it came from, the request
+    messages and bound tool names, the response (tool calls and usage
+    metadata included) and its latency. Replay serves the responses of a
+    node in recorded order, preferring an unused interaction whose request
+    matches exactly, so a session replays deterministically even when
+    volatile prompt parts (timestamps, manifest dates) differ.
+    """
+
+    def __init__(self, path: str, mode: str = "record", simulate_latency: bool = False, session: Optional[str] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of: {', '.join(MODES)})")
+        self.path = Path(path)
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.session = session
+        self.created_at = time.time()
+        self.interactions: List[Dict[str, Any]] = []
+        self._used: set = set()
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        self.session = self.session or data.get("session")
+        self.interactions = data.get("interactions") or []
+
+    @property
+    def served(self) -> int:
+        return len(self._used)
+
+    def record(
+        self,
+        key: str,
+        messages: Sequence[BaseMessage],
+        response: BaseMessage,
+        latency: float,
+        tools: Optional[List[str]] = None,
+    ) -> None:
+        with self._lock:
+            self.interactions.append(
+                {
+                    "index": len(self.interactions),
+                    "key": key,
+                    "offset_seconds": round(time.time() - self.created_at - latency, 6),
+                    "latency_seconds": round(latency, 6),
+                    "fingerprint": request_fingerprint(messages),
+                    "request": {"messages": messages_to_dict(list(messages)), "tools": tools or []},
+                    "response": messages_to_dict([response])[0],
+                }
+            )
+
+    def replay(self, key: str, messages: Sequence[BaseMessage]) -> Tuple[BaseMessage, float]:
+        fingerprint = request_fingerprint(messages)
+        with self._lock:
+            candidates = [
+                i for i, item in enumerate(self.interactions)
+                if item["key"] == key and i not in self._used
+            ]
+            if not candidates:
+                raise CassetteMiss(f"Cassette {self.path.name} has no unused interaction for '{key}'")
+            exact = [i for i in candidates if self.interactions[i]["fingerprint"] == fingerprint]
+            index = (exact or candidates)[0]
+            self._used.add(index)
+        if not exact:
+            logger.info(f"Cassette: request for '{key}' differs from the recording, serving interaction #{index}.")
+        item = self.interactions[index]
+        return messages_from_dict([item["response"]])[0], item["latency_seconds"]
+
+    def save(self) -> None:
+        from memory.json_store import write_json_atomic
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {
+                "version": CASSETTE_VERSION,
+                "session": self.session,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.created_at)),
+                "interactions": self.interactions,
+            }
+            # Mesajlardaki serileştirilemeyen ekler (ör. SDK nesneleri) metne çevrilir
+            write_json_atomic(self.path, json.loads(json.dumps(data, default=str)))
+        logger.info(f"Cassette: saved {len(self.interactions)} interactions to {self.path}.")
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Records the calls of `inner` into a cassette, or (replay, no `inner`)
+    answers them from the cassette without touching the network. Replay
+    sleeps for the recorded latency when the cassette simulates it.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    cassette: Any
+    key: str
+    inner: Any = None
+    provider_name: str = "cassette"
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(t, "name", None) or getattr(t, "__name__", str(t)) for t in tools]
+        inner = self.inner.bind_tools(tools, **kwargs) if self.inner is not None else None
+        return self.model_copy(update={"inner": inner, "tool_names": names})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.cassette.mode == "replay":
+            message, latency = self.cassette.replay(self.key, messages)
+            if self.cassette.simulate_latency:
+                time.sleep(latency)
+        else:
+            started = time.perf_counter()
+            message = self.inner.invoke(messages, stop=stop, **kwargs)
+            self.cassette.record(self.key, messages, message, time.perf_counter() - started, self.tool_names)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.cassette.mode == "replay":
+            message, latency = self.cassette.replay(self.key, messages)
+            if self.cassette.simulate_latency:
+                await asyncio.sleep(latency)
+        else:
+            started = time.perf_counter()
+            message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+            self.cassette.record(self.key, messages, message, time.perf_counter() - started, self.tool_names)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def default_cassette_path(session: str) -> str:
+    """<cassettes.directory>/<session>.json; a relative directory is resolved against the project root."""
+    directory = Path(get_settings("cassettes", DEFAULT_CASSETTE_SETTINGS)["directory"])
+    if not directory.is_absolute():
+        directory = Path(__file__).resolve().parents[2] / directory
+    return str(directory / f"{session}.json")
+
+
+_active_cassette: ContextVar[Optional[Cassette]] = ContextVar("active_cassette", default=None)
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active_cassette.get()
+
+
+@contextmanager
+def use_cassette(
+    path: str, mode: str = "replay", simulate_latency: bool = False, session: Optional[str] = None
+) -> Iterator[Cassette]:
+    """
+    Routes every get_llm() model created inside the block through a
+    cassette. A recording is saved when the block exits, even on errors,
+    so a failed session can still be replayed up to the failure.
+    """
+    cassette = Cassette(path, mode, simulate_latency=simulate_latency, session=session)
+    token = _active_cassette.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active_cassette.reset(token)
+        if mode == "record":
+            cassette.save()
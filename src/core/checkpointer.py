@@ -0,0 +1,100 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Dict
+
+from core.settings import get_settings
+from logger import logger
+
+DEFAULT_CHECKPOINTER_SETTINGS = {
+    # "memory" (bounded, process-local) or "sqlite" (durable, resumable runs)
+    "backend": "memory",
+    "sqlite_path": ".ai_checkpoints.sqlite",
+    "retention_days": 7,
+    "max_threads": 256,
+    "thread_ttl_seconds": 3600,
+    "max_checkpoints_per_thread": 20,
+}
+
+
+_checkpointers: Dict[str, Any] = {}
+
+
+def checkpoint_db_path() -> Path:
+    """Resolves `checkpointer.sqlite_path` relative to the project root."""
+    settings = get_settings("checkpointer", DEFAULT_CHECKPOINTER_SETTINGS)
+    path = Path(settings["sqlite_path"])
+    if not path.is_absolute():
+        # src/core/checkpointer.py -> parents[2] is project root
+        path = Path(__file__).resolve().parents[2] / path
+    return path
+
+
+def _get_sqlite_checkpointer():
+    """
+    One AsyncSqliteSaver per event loop, shared by both graphs so that only a
+    single connection writes to the database file.
+    """
+    try:
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError as e:
+        raise RuntimeError(
+            "checkpointer.backend is 'sqlite' but langgraph-checkpoint-sqlite is not installed."
+        ) from e
+
+    loop = asyncio.get_running_loop()
+    saver = _checkpointers.get("sqlite")
+    if saver is None or _checkpointers.get("sqlite_loop") is not loop:
+        path = checkpoint_db_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        saver = AsyncSqliteSaver(aiosqlite.connect(str(path)))
+        _checkpointers["sqlite"] = saver
+        _checkpointers["sqlite_loop"] = loop
+        logger.info(f"Using SQLite checkpointer at {path}")
+    return saver
+
+
+def get_checkpointer(scope: str):
+    """
+    Returns the process-wide checkpointer for a graph scope ("main_agent",
+    "task_manager"). Graphs compiled repeatedly share the same store; with the
+    sqlite backend both scopes share one durable database.
+    """
+    settings = get_settings("checkpointer", DEFAULT_CHECKPOINTER_SETTINGS)
+    if settings["backend"] == "sqlite":
+        return _get_sqlite_checkpointer()
+
+    if scope not in _checkpointers:
+        # LangGraph importu (~300 ms) yalnızca bir graph derlenirken ödenir; cli/server açılışı hızlı kalsın
+        from core.memory_saver import BoundedMemorySaver
+
+        _checkpointers[scope] = BoundedMemorySaver(
+            max_threads=settings["max_threads"],
+            thread_ttl_seconds=settings["thread_ttl_seconds"],
+            max_checkpoints_per_thread=settings["max_checkpoints_per_thread"],
+            name=scope,
+        )
+    return _checkpointers[scope]
+
+
+def checkpointer_stats() -> Dict[str, Any]:
+    """Memory metrics for every checkpointer created in this process."""
+    stats = {
+        scope: saver.stats()
+        for scope, saver in _checkpointers.items()
+        if hasattr(saver, "stats")
+    }
+    if "sqlite" in _checkpointers and checkpoint_db_path().exists():
+        stats["sqlite"] = {"path": str(checkpoint_db_path()), "bytes": checkpoint_db_path().stat().st_size}
+    return stats
+
+
+async def close_checkpointers() -> None:
+    """Closes the SQLite connection, if one was opened."""
+    saver = _checkpointers.pop("sqlite", None)
+    _checkpointers.pop("sqlite_loop", None)
+    if saver is not None:
+        try:
+            await saver.conn.close()
+        except Exception as e:
+            logger.error(f"Error closing SQLite checkpointer: {e}")
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import yaml
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from core.history_compactor import get_token_counter
+from core.settings import get_settings
+
+DEFAULT_FAKE_LLM_SETTINGS = {
+    # JSON/YAML: {"<agent>.<node>": [turn, ...]}; boşsa DEFAULT_SCRIPTS kullanılır (env: FAKE_LLM_SCRIPT)
+    "script_file": "",
+    # Her çağrıya eklenen yapay gecikme (env: FAKE_LLM_LATENCY)
+    "latency_seconds": 0.0,
+}
+
+# Bir architect isteğinin tipik akışı: decide -> task manager -> manifest yazımı -> cevap
+DEFAULT_SCRIPTS: Dict[str, List[Any]] = {
+    "main_agent.decide_agent": [
+        {
+            "tool_calls": [
+                {"name": "route_to_task_manager", "args": {"request": "Add a task for the requested feature."}}
+            ]
+        },
+        "## Architected Prompt (scripted)\n\n"
+        "1. Add the feature behind a dedicated module with unit tests.\n"
+        "2. Track the work in the manifest task that the task manager created.\n"
+        "3. Follow the global rules of the project manifest for structure and naming.\n",
+    ],
+    "task_manager.analysis": [
+        {
+            "tool_calls": [
+                {
+                    "name": "manage_tasks",
+                    "args": {"action": "add", "task_id": "FAKE-1", "title": "Scripted task", "status": "todo"},
+                }
+            ]
+        },
+        "Task FAKE-1 added to the manifest.",
+    ],
+    "main_agent.final_response": ["Scripted final report: the plan is ready and the manifest is updated."],
+    "default": ["Scripted response."],
+}
+
+Turn = Union[str, Dict[str, Any]]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model (LLM_PROVIDER=fake).
+
+    The reply is picked by conversation position, not by call count: turn i
+    of the script answers a conversation with i AI messages after its last
+    HumanMessage (the last turn repeats). The same cached model can
+    therefore serve many concurrent runs, and a ReAct loop sees
+    "tool call, then answer" on every run. Turns are strings or
+    {"content": ..., "tool_calls": [{"name": ..., "args": {...}}]}.
+    """
+
+    script: List[Any]
+    latency_seconds: float = 0.0
+    model_name: str = "scripted"
+    provider_name: str = "fake"
+    tool_names: Optional[List[str]] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @classmethod
+    def for_node(cls, name: str, **kwargs) -> "ScriptedChatModel":
+        """Model for "<agent>.<node>" using the configured script file, else DEFAULT_SCRIPTS."""
+        settings = get_settings("fake_llm", DEFAULT_FAKE_LLM_SETTINGS)
+        scripts = load_scripts(os.getenv("FAKE_LLM_SCRIPT") or settings["script_file"] or None)
+        latency = float(os.getenv("FAKE_LLM_LATENCY") or settings["latency_seconds"])
+        script = scripts.get(name) or scripts.get("default") or DEFAULT_SCRIPTS["default"]
+        return cls(script=script, latency_seconds=latency, **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        names = [getattr(t, "name", None) or getattr(t, "__name__", str(t)) for t in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _turn_index(self, messages: Sequence[BaseMessage]) -> int:
+        turns = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage):
+                turns += 1
+        return min(turns, len(self.script) - 1)
+
+    def _reply(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        index = self._turn_index(messages)
+        turn: Turn = self.script[index]
+        if isinstance(turn, str):
+            turn = {"content": turn}
+
+        tool_calls = []
+        for i, call in enumerate(turn.get("tool_calls") or []):
+            if self.tool_names is not None and call["name"] not in self.tool_names:
+                raise ValueError(
+                    f"Scripted tool call '{call['name']}' is not bound (bound: {', '.join(self.tool_names)})"
+                )
+            tool_calls.append(
+                {"name": call["name"], "args": dict(call.get("args") or {}), "id": call.get("id") or f"call_{index}_{i}"}
+            )
+
+        counter = get_token_counter()
+        content = turn.get("content", "")
+        input_tokens = counter.count_messages(messages)
+        output_tokens = counter.count_text(content) + (counter.count_text(json.dumps(tool_calls)) if tool_calls else 0)
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": self.model_name, "finish_reason": "stop", "script_turn": index},
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+
+def load_scripts(path: Optional[str] = None) -> Dict[str, List[Any]]:
+    """Scripts from a JSON/YAML file merged over DEFAULT_SCRIPTS."""
+    scripts = dict(DEFAULT_SCRIPTS)
+    if path:
+        text = Path(path).read_text(encoding="utf-8")
+        loaded = json.loads(text) if path.endswith(".json") else yaml.safe_load(text)
+        scripts.update(loaded or {})
+    return scripts
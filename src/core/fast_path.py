@@ -0,0 +1,314 @@
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from core.settings import get_settings
+from logger import logger
+from memory.json_store import manifest_lock, write_json_atomic
+
+DEFAULT_FAST_PATH_SETTINGS = {
+    "enabled": True,
+}
+
+STATUS_WORDS = {
+    "completed": ("completed", "complete", "done", "finished", "closed"),
+    "in_progress": ("in progress", "in-progress", "in_progress", "started", "ongoing", "wip"),
+    "todo": ("todo", "to do", "to-do", "open", "pending", "not started"),
+}
+_STATUS_LOOKUP = {word: status for status, words in STATUS_WORDS.items() for word in words}
+_STATUS = "|".join(sorted((re.escape(w) for w in _STATUS_LOOKUP), key=len, reverse=True))
+
+# Görev kimliği: T3, TASK-12, setup_env gibi
+_TASK_ID = r"[A-Za-z][A-Za-z_]*-?\d+|[a-z]+(?:_[a-z0-9]+)+"
+_PREFIX = r"^(?:please\s+)?"
+
+_SET_STATUS = re.compile(
+    _PREFIX + rf"(?:mark|set|move|change)\s+(?P<targets>.+?)\s+(?:as\s+|to\s+)?(?P<status>{_STATUS})$",
+    re.IGNORECASE,
+)
+_IS_STATUS = re.compile(
+    rf"^(?P<targets>.+?)\s+(?:is|are)\s+(?:now\s+)?(?P<status>{_STATUS})$", re.IGNORECASE
+)
+# "complete T3", "start task Login page": fiil kipinde hedef ya kimlik ya da "task" ile belirtilmeli
+_STATUS_VERB = re.compile(
+    _PREFIX + r"(?P<verb>complete|finish|close|start|begin|reopen)\s+(?:working\s+on\s+)?(?P<targets>.+)$",
+    re.IGNORECASE,
+)
+_VERB_STATUS = {
+    "complete": "completed",
+    "finish": "completed",
+    "close": "completed",
+    "start": "in_progress",
+    "begin": "in_progress",
+    "reopen": "todo",
+}
+# Başlık açıkça işaretlenmeli ("add task: X", "add task called X", "add task 'X'", "add task T9: X");
+# "add task list pagination to the API" gibi kodlama istekleri graph'a gider
+_ADD_TASK = re.compile(
+    _PREFIX + r"(?:add|create)\s+(?:a\s+)?(?:new\s+)?task\b\s*(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+_TITLE_MARKER = re.compile(r"^(?::\s*|(?:called|named)\s+)", re.IGNORECASE)
+_ID_MARKER = re.compile(rf"^(?:{_TASK_ID})\s*:")
+_QUOTES = "'\"“‘`"
+_QUOTED = re.compile(r"^[\"'“‘`](?P<value>[^\"'“”‘’`]+)[\"'”’`]$")
+_DEPENDENCY_CLAUSE = re.compile(
+    r"\s*[,(]?\s*(?:depending|depends|dependent|that\s+depends)\s+on\s+(?P<deps>.+?)\)?$",
+    re.IGNORECASE,
+)
+_WITH_STATUS_CLAUSE = re.compile(rf"\s+(?:with\s+status|as)\s+(?P<status>{_STATUS})$", re.IGNORECASE)
+_ID_PREFIX = re.compile(rf"^(?P<id>{_TASK_ID})\s*[:\-–]\s*(?P<title>.+)$")
+_DELETE_TASK = re.compile(
+    _PREFIX + r"(?:delete|remove|drop)\s+(?:the\s+)?tasks?\s+(?P<targets>.+)$", re.IGNORECASE
+)
+_DEPENDS_ON = re.compile(
+    rf"^(?:task\s+)?(?P<target>{_TASK_ID})\s+(?:now\s+)?depends\s+on\s+(?P<deps>.+)$", re.IGNORECASE
+)
+# Faz/hedef: "to" ya da ":" zorunlu ("update the phase detection module ..." eşleşmesin)
+_SET_PHASE = re.compile(
+    _PREFIX + r"(?:set|change|update)\s+(?:the\s+)?(?:current\s+|project\s+)?phase(?:\s+to\s+|\s*:\s*)(?P<value>.+)$",
+    re.IGNORECASE,
+)
+_MOVE_TO_PHASE = re.compile(
+    _PREFIX + r"(?:move|switch)\s+to\s+(?:the\s+)?(?P<value>.+?)\s+phase$", re.IGNORECASE
+)
+_SET_GOAL = re.compile(
+    _PREFIX + r"(?:set|change|update)\s+(?:the\s+)?(?:active\s+|current\s+)?goal(?:\s+to\s+|\s*:\s*)(?P<value>.+)$",
+    re.IGNORECASE,
+)
+# Değer kısa bir ad olmalı: yan cümle ya da fiil öbeği içeren değerler ("to store history in sqlite") reddedilir
+_CLAUSE = re.compile(
+    r"[,;()]|\b(?:to|be|so|that|which|then|because|when|if|using|via|by|should|must|will)\b", re.IGNORECASE
+)
+# Göreli faz adları çözülemez: "move to the next phase" LLM'e gider
+_RELATIVE_PHASES = {"next", "previous", "prev", "prior", "following", "last", "same", "another", "new", "current"}
+_MAX_VALUE_WORDS = {"set_phase": 4, "set_goal": 8}
+_LIST_SPLIT = re.compile(r"\s*(?:,|&|\band\b)\s*", re.IGNORECASE)
+
+
+@dataclass
+class FastPathCommand:
+    """A manifest command recognized by the grammar, resolved against the manifest."""
+
+    action: str  # "set_status" | "add_task" | "delete_task" | "set_dependencies" | "set_phase" | "set_goal"
+    task_ids: List[str] = field(default_factory=list)
+    status: Optional[str] = None
+    title: Optional[str] = None
+    task_id: Optional[str] = None
+    dependencies: List[str] = field(default_factory=list)
+    value: Optional[str] = None
+
+
+def _clean(text: str) -> str:
+    return text.strip().strip("'\"“”‘’`").strip()
+
+
+def _normalize(request: str) -> str:
+    return re.sub(r"\s+", " ", request.strip()).rstrip(".!")
+
+
+def _resolve(target: str, tasks: List[dict], allow_title: bool = True) -> Optional[str]:
+    """Task ID for `target` (an ID or, optionally, an exact title), case-insensitive."""
+    target = _clean(re.sub(r"^(?:the\s+)?tasks?\s+", "", _clean(target), flags=re.IGNORECASE))
+    if not target:
+        return None
+    for task in tasks:
+        if str(task.get("id", "")).lower() == target.lower():
+            return task["id"]
+    if allow_title:
+        matches = [t["id"] for t in tasks if str(t.get("title", "")).lower() == target.lower()]
+        if len(matches) == 1:
+            return matches[0]
+    return None
+
+
+def _resolve_all(targets: str, tasks: List[dict], allow_title: bool = True) -> Optional[List[str]]:
+    # Önce bütün ifadeyi dene ("Login and signup" başlığı bölünmesin), sonra listeyi
+    whole = _resolve(targets, tasks, allow_title)
+    if whole:
+        return [whole]
+    ids = [_resolve(part, tasks, allow_title) for part in _LIST_SPLIT.split(targets) if part.strip()]
+    if not ids or any(i is None for i in ids):
+        return None
+    return ids
+
+
+def _next_task_id(tasks: List[dict]) -> str:
+    numbers = [int(m.group(1)) for t in tasks if (m := re.fullmatch(r"T(\d+)", str(t.get("id", ""))))]
+    return f"T{max(numbers, default=0) + 1}"
+
+
+def parse_command(request: str, manifest: dict) -> Optional[FastPathCommand]:
+    """
+    Recognizes mechanical manifest commands ("mark T3 completed", "add task:
+    Write docs depending on T2", "set phase to Testing"). Every task
+    reference must resolve against the manifest, new task titles need an
+    explicit marker and phase/goal values must be short names; anything
+    else returns None and goes through the full graph.
+    """
+    text = _normalize(request)
+    tasks = manifest.get("tasks", []) or []
+    if not text or "\n" in text:
+        return None
+
+    match = _DEPENDS_ON.match(text)
+    if match:
+        target = _resolve(match["target"], tasks, allow_title=False)
+        deps = _resolve_all(match["deps"], tasks)
+        if target and deps:
+            return FastPathCommand("set_dependencies", task_ids=[target], dependencies=deps)
+        return None
+
+    match = _ADD_TASK.match(text)
+    if match:
+        return _parse_add(match["rest"], tasks)
+
+    match = _DELETE_TASK.match(text)
+    if match:
+        ids = _resolve_all(match["targets"], tasks)
+        return FastPathCommand("delete_task", task_ids=ids) if ids else None
+
+    for pattern, action in ((_SET_PHASE, "set_phase"), (_MOVE_TO_PHASE, "set_phase"), (_SET_GOAL, "set_goal")):
+        match = pattern.match(text)
+        if match:
+            value = _short_value(match["value"], action)
+            return FastPathCommand(action, value=value) if value else None
+
+    for pattern in (_SET_STATUS, _IS_STATUS):
+        match = pattern.match(text)
+        if match:
+            ids = _resolve_all(match["targets"], tasks)
+            if ids:
+                return FastPathCommand("set_status", task_ids=ids, status=_STATUS_LOOKUP[match["status"].lower()])
+            return None
+
+    match = _STATUS_VERB.match(text)
+    if match:
+        targets = match["targets"]
+        explicit = re.match(r"^(?:the\s+)?tasks?\s+", targets, re.IGNORECASE) is not None
+        ids = _resolve_all(targets, tasks, allow_title=explicit)
+        if ids:
+            return FastPathCommand("set_status", task_ids=ids, status=_VERB_STATUS[match["verb"].lower()])
+    return None
+
+
+def _short_value(raw: str, action: str) -> Optional[str]:
+    """Phase/goal value if it is a short name (or fully quoted); None for clauses and relative phases."""
+    quoted = _QUOTED.match(raw.strip())
+    value = _clean(raw)
+    if not value:
+        return None
+    words = value.split()
+    if not quoted and (_CLAUSE.search(value) or len(words) > _MAX_VALUE_WORDS[action]):
+        return None
+    if action == "set_phase" and re.sub(r"^the\s+", "", value.lower()).split()[0] in _RELATIVE_PHASES:
+        return None
+    return value
+
+
+def _parse_add(rest: str, tasks: List[dict]) -> Optional[FastPathCommand]:
+    rest = rest.strip()
+    marker = _TITLE_MARKER.match(rest)
+    if marker:
+        rest = rest[marker.end():]
+    elif not (rest[:1] in _QUOTES or _ID_MARKER.match(rest)):
+        return None  # başlık işaretsiz: büyük ihtimalle bir kodlama isteği
+    quoted = not marker and rest[:1] in _QUOTES
+
+    status = "todo"
+    match = _WITH_STATUS_CLAUSE.search(rest)
+    if match:
+        status = _STATUS_LOOKUP[match["status"].lower()]
+        rest = rest[: match.start()]
+
+    dependencies: List[str] = []
+    match = _DEPENDENCY_CLAUSE.search(rest)
+    if match:
+        dependencies = _resolve_all(match["deps"], tasks)
+        if not dependencies:
+            return None
+        rest = rest[: match.start()]
+
+    task_id = None
+    match = _ID_PREFIX.match(_clean(rest))
+    if match:
+        task_id, rest = match["id"], match["title"]
+        if _resolve(task_id, tasks, allow_title=False):
+            return None  # aynı kimlikle ikinci görev eklenmesin
+
+    if quoted and not _QUOTED.match(rest.strip()):
+        return None  # tırnaklı başlığın ardından serbest metin geliyor
+    title = _clean(rest)
+    if not title:
+        return None
+    return FastPathCommand(
+        "add_task",
+        task_id=task_id or _next_task_id(tasks),
+        title=title,
+        status=status,
+        dependencies=dependencies,
+    )
+
+
+def apply_command(command: FastPathCommand, manifest_path: str) -> List[str]:
+    """Applies a command through the regular manifest tools; returns their messages."""
+    from agents.task_manager.tools.architecture_meta_update import MimariMetaUpdater
+    from agents.task_manager.tools.task_manager import ManageTasks
+
+    tasks_tool = ManageTasks(filename=str(manifest_path))
+    meta_tool = MimariMetaUpdater(filename=str(manifest_path))
+
+    if command.action == "set_status":
+        return [
+            tasks_tool._run(action="update", task_id=task_id, status=command.status)
+            for task_id in command.task_ids
+        ]
+    if command.action == "add_task":
+        return [
+            tasks_tool._run(
+                action="add",
+                task_id=command.task_id,
+                title=command.title,
+                status=command.status,
+                dependencies=command.dependencies,
+            )
+        ]
+    if command.action == "delete_task":
+        return [tasks_tool._run(action="delete", task_id=task_id) for task_id in command.task_ids]
+    if command.action == "set_dependencies":
+        # Oku-birleştir-yaz tek kilit altında: arada başka bir run'ın yazdıkları kaybolmasın
+        with manifest_lock:
+            manifest = json.loads(Path(manifest_path).read_text(encoding="utf-8"))
+            task = next((t for t in manifest.get("tasks", []) if t["id"] == command.task_ids[0]), None)
+            if task is None:
+                return [f"Task '{command.task_ids[0]}' not found."]
+            task["dependencies"] = list(dict.fromkeys((task.get("dependencies") or []) + command.dependencies))
+            write_json_atomic(manifest_path, manifest)
+        return [f"Task '{task['id']}' updated."]
+    if command.action == "set_phase":
+        return [meta_tool._run(current_phase=command.value)]
+    if command.action == "set_goal":
+        return [meta_tool._run(active_goal=command.value)]
+    raise ValueError(f"Unknown fast-path action: {command.action}")
+
+
+def try_fast_path(request: str, manifest_path: str) -> Optional[List[str]]:
+    """
+    Runs a recognized manifest command without the agent graph (no LLM
+    calls). Returns the tool messages, or None when the request needs the
+    full graph.
+    """
+    if not get_settings("fast_path", DEFAULT_FAST_PATH_SETTINGS)["enabled"]:
+        return None
+    try:
+        manifest = json.loads(Path(manifest_path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    command = parse_command(request, manifest)
+    if command is None:
+        return None
+    logger.info(f"Fast path: '{request}' -> {command.action} {command.task_ids or command.task_id or command.value}")
+    return apply_command(command, manifest_path)
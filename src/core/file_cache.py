@@ -0,0 +1,160 @@
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.settings import get_settings
+
+DEFAULT_FILE_READER_SETTINGS = {
+    # Tek bir read_file cevabının taşıyabileceği en fazla içerik (fazlası kesilir + sonraki aralık ipucu)
+    "max_bytes": 65536,
+    # Bu boyuttan büyük dosyalar tamamen okunmaz; istenen aralık mmap ile alınır
+    "mmap_threshold_bytes": 1048576,
+    # İkili dosya tespiti için bakılan baş kısım
+    "binary_sniff_bytes": 8192,
+    # LRU içerik önbelleği (süreç geneli, istekler arasında paylaşılır)
+    "cache_entries": 256,
+    "cache_max_file_bytes": 1048576,
+}
+
+CacheKey = Tuple[str, int, int]
+
+
+def is_binary(sample: bytes) -> bool:
+    """NUL bytes or mostly non-text control bytes in the first block mean binary."""
+    if not sample:
+        return False
+    if b"\x00" in sample:
+        return True
+    control = sum(1 for byte in sample if byte < 32 and byte not in (9, 10, 12, 13, 27))
+    return control / len(sample) > 0.3
+
+
+class FileContentCache:
+    """
+    LRU cache of file bytes keyed by (real path, mtime_ns, size): a rewritten
+    file gets a new key, so stale content is never served and old entries
+    simply age out. Thread-safe, since tools run in executor threads.
+    """
+
+    def __init__(self, max_entries: int = 256, max_file_bytes: int = 1048576):
+        self.max_entries = max_entries
+        self.max_file_bytes = max_file_bytes
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(path: str) -> CacheKey:
+        stat = os.stat(path)
+        return (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: CacheKey, data: bytes) -> None:
+        if len(data) > self.max_file_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            # Aynı dosyanın eski sürümlerini bırak
+            for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                del self._entries[stale]
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(v) for v in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class FileSlice:
+    """
+    Read access to one file for a single tool call: whole content from the
+    cache (small files) or an mmap window (large files), so ranged reads of
+    a big lockfile or bundle never load it completely.
+    """
+
+    def __init__(self, path: str, settings: Optional[dict] = None):
+        self.settings = settings or get_settings("file_reader", DEFAULT_FILE_READER_SETTINGS)
+        self.path = path
+        self.key = FileContentCache.key_for(path)
+        self.size = self.key[2]
+        self._data: Optional[bytes] = None
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+
+        if self.size >= self.settings["mmap_threshold_bytes"]:
+            self._file = open(path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            cache = get_file_cache()
+            self._data = cache.get(self.key)
+            if self._data is None:
+                with open(path, "rb") as f:
+                    self._data = f.read()
+                cache.put(self.key, self._data)
+
+    @property
+    def buffer(self):
+        return self._data if self._data is not None else self._mmap
+
+    def is_binary(self) -> bool:
+        return is_binary(self.buffer[: self.settings["binary_sniff_bytes"]])
+
+    def read(self, start: int, end: int) -> bytes:
+        return self.buffer[max(0, start) : min(end, self.size)]
+
+    def line_offset(self, line: int) -> Optional[int]:
+        """Byte offset where 1-based `line` starts, None past the end of the file."""
+        offset = 0
+        for _ in range(line - 1):
+            newline = self.buffer.find(b"\n", offset)
+            if newline < 0:
+                return None
+            offset = newline + 1
+        return offset if offset < self.size or line == 1 else None
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "FileSlice":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_file_cache: Optional[FileContentCache] = None
+
+
+def get_file_cache() -> FileContentCache:
+    global _file_cache
+    if _file_cache is None:
+        settings = get_settings("file_reader", DEFAULT_FILE_READER_SETTINGS)
+        _file_cache = FileContentCache(settings["cache_entries"], settings["cache_max_file_bytes"])
+    return _file_cache
+
+
+def file_cache_stats() -> Dict[str, Any]:
+    return get_file_cache().stats()
@@ -0,0 +1,204 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+from core.budget import budget_exhausted
+from core.history_compactor import message_text
+from core.request_context import should_wrap_up
+from core.settings import get_settings
+
+DEFAULT_FINALIZATION_SETTINGS = {
+    # "auto" | "reuse" | "template" | "llm"; istek bazında ezilebilir (finalization_policy)
+    "policy": "auto",
+    # auto: son AI cevabı en az bu kadar karakterse tamam sayılır ve aynen kullanılır
+    "min_answer_chars": 200,
+    # Henüz ölçüm yokken bir final LLM çağrısının tahmini süresi (kazanılan süre raporu için)
+    "estimated_llm_seconds": 5.0,
+    "recent_messages": 5,
+}
+
+POLICIES = ("auto", "reuse", "template", "llm")
+
+
+class FinalizationStats:
+    """
+    Process-wide finalization counters. Every run that skips the final LLM
+    call is credited with the running average latency of the final LLM
+    calls that did happen (or the configured estimate before the first one).
+    """
+
+    def __init__(self, estimated_llm_seconds: float = 5.0, alpha: float = 0.2):
+        self.alpha = alpha
+        self.llm_latency = estimated_llm_seconds
+        self.llm_samples = 0
+        self.runs: Dict[str, int] = {"reuse": 0, "template": 0, "llm": 0}
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, policy: str, elapsed: float) -> float:
+        """Records one finalization; returns the estimated latency it saved."""
+        with self._lock:
+            self.runs[policy] = self.runs.get(policy, 0) + 1
+            if policy == "llm":
+                if self.llm_samples == 0:
+                    self.llm_latency = elapsed
+                else:
+                    self.llm_latency += self.alpha * (elapsed - self.llm_latency)
+                self.llm_samples += 1
+                return 0.0
+            saved = max(0.0, self.llm_latency - elapsed)
+            self.saved_seconds += saved
+            return saved
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "runs": dict(self.runs),
+                "llm_latency_avg_seconds": round(self.llm_latency, 3),
+                "llm_latency_samples": self.llm_samples,
+                "saved_seconds_total": round(self.saved_seconds, 3),
+            }
+
+
+_stats: Optional[FinalizationStats] = None
+
+
+def get_finalization_stats() -> FinalizationStats:
+    global _stats
+    if _stats is None:
+        settings = get_settings("finalization", DEFAULT_FINALIZATION_SETTINGS)
+        _stats = FinalizationStats(settings["estimated_llm_seconds"])
+    return _stats
+
+
+def finalization_stats() -> dict:
+    return get_finalization_stats().snapshot()
+
+
+def last_answer(messages: Sequence[BaseMessage]) -> Optional[AIMessage]:
+    """The last message if it is a plain AI answer (no pending tool calls)."""
+    if not messages:
+        return None
+    last = messages[-1]
+    if not isinstance(last, AIMessage) or last.tool_calls:
+        return None
+    return last if message_text(last).strip() else None
+
+
+def is_complete_answer(message: Optional[AIMessage], min_chars: int) -> bool:
+    if message is None:
+        return False
+    # Token sınırında kesilmiş bir cevap tamam sayılmaz
+    metadata = message.response_metadata or {}
+    if metadata.get("finish_reason") == "length" or metadata.get("stop_reason") == "max_tokens":
+        return False
+    return len(message_text(message).strip()) >= min_chars
+
+
+def choose_policy(state: dict) -> Tuple[str, str]:
+    """
+    Picks the finalization policy for a run: the per-request override, else
+    the configured one. "auto" reuses a complete last answer, renders the
+    template when the budget or deadline is nearly spent, and otherwise
+    calls the LLM. Returns (policy, reason).
+    """
+    settings = get_settings("finalization", DEFAULT_FINALIZATION_SETTINGS)
+    requested = state.get("finalization_policy") or settings["policy"]
+    if requested not in POLICIES:
+        requested = "auto"
+
+    answer = last_answer(state.get("messages") or [])
+    if requested == "reuse":
+        # Kullanılabilir cevap yoksa yine LLM'siz kal
+        return ("reuse", "requested") if answer else ("template", "reuse requested, no AI answer to reuse")
+    if requested in ("template", "llm"):
+        return requested, "requested"
+
+    if not state.get("error") and is_complete_answer(answer, settings["min_answer_chars"]):
+        return "reuse", "last AI answer is complete"
+    exhausted = budget_exhausted(state)
+    if exhausted:
+        return "template", f"{exhausted} budget exhausted"
+    if should_wrap_up():
+        return "template", "request deadline is close"
+    return "llm", "last turn is not a complete answer"
+
+
+def recent_messages(messages: Sequence[BaseMessage], count: int) -> List[BaseMessage]:
+    """
+    The last `count` messages, widened so the slice never starts with a
+    ToolMessage whose AIMessage tool call was cut off (providers reject that).
+    """
+    start = max(0, len(messages) - count)
+    while start > 0 and isinstance(messages[start], ToolMessage):
+        start -= 1
+    return list(messages[start:])
+
+
+def _task_line(task: dict) -> str:
+    return f"{task.get('id')}: {task.get('title', '')} ({task.get('status', 'todo')})"
+
+
+def manifest_changes(before: Optional[dict], after: Optional[dict]) -> List[str]:
+    """Human-readable task/status changes between two manifest snapshots."""
+    before, after = before or {}, after or {}
+    old_tasks = {t.get("id"): t for t in before.get("tasks", []) or []}
+    new_tasks = {t.get("id"): t for t in after.get("tasks", []) or []}
+    lines = []
+
+    for task_id, task in new_tasks.items():
+        old = old_tasks.get(task_id)
+        if old is None:
+            lines.append(f"Added task {_task_line(task)}")
+        elif old.get("status") != task.get("status"):
+            lines.append(f"Task {task_id}: {old.get('status')} → {task.get('status')}")
+        elif old != task:
+            lines.append(f"Updated task {_task_line(task)}")
+    for task_id, task in old_tasks.items():
+        if task_id not in new_tasks:
+            lines.append(f"Removed task {task_id}: {task.get('title', '')}")
+
+    old_status, new_status = before.get("status") or {}, after.get("status") or {}
+    for key, label in (("current_phase", "Phase"), ("active_goal", "Active goal")):
+        if old_status.get(key) != new_status.get(key) and new_status.get(key):
+            lines.append(f"{label}: {new_status.get(key)}")
+    return lines
+
+
+def render_template(state: dict) -> str:
+    """LLM-free final report from the manifest diff, project status and the last answer."""
+    manifest = state.get("manifest") or {}
+    sections = []
+
+    answer = last_answer(state.get("messages") or [])
+    if answer is not None:
+        sections.append(message_text(answer).strip())
+
+    changes = manifest_changes(state.get("initial_manifest"), manifest)
+    sections.append(
+        "Manifest changes:\n" + "\n".join(f"- {line}" for line in changes)
+        if changes
+        else "Manifest changes: none."
+    )
+
+    open_tasks = [t for t in manifest.get("tasks", []) or [] if t.get("status") != "completed"]
+    if open_tasks:
+        sections.append("Open tasks:\n" + "\n".join(f"- {_task_line(t)}" for t in open_tasks))
+
+    status = manifest.get("status") or {}
+    sections.append(
+        f"Project status: phase '{status.get('current_phase') or 'unknown'}', "
+        f"goal '{status.get('active_goal') or 'none'}'."
+    )
+    if state.get("error"):
+        sections.append(f"Last error: {state['error']}")
+    return "\n\n".join(sections)
+
+
+def format_finalization(info: Optional[dict]) -> str:
+    if not info:
+        return ""
+    if info["policy"] == "llm":
+        return "Finalization: llm."
+    return f"Finalization: {info['policy']} ({info['reason']}), saved ~{info['saved_seconds']:.1f}s."
@@ -0,0 +1,257 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict
+
+from core.scheduler import percentile
+from logger import logger
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds one trial call is let through (half-open) and its
+    outcome closes or re-opens the circuit. While the trial call is in
+    flight every other caller is refused.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        """Whether a call would be let through now (does not take the trial call)."""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.probing)
+
+    def acquire(self) -> Optional[str]:
+        """
+        Lets a call through: "closed" for a normal call, "probe" for the single
+        half-open trial call, None when refused. A probe must end in
+        record_success(), record_failure() or release().
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return "closed"
+            if state == "half_open" and not self.probing:
+                self.probing = True
+                return "probe"
+            return None
+
+    def allow(self) -> bool:
+        return self.acquire() is not None
+
+    def release(self) -> None:
+        """Gives the trial call back without an outcome (e.g. a cancelled hedge)."""
+        with self._lock:
+            self.probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+class HedgeState:
+    """Latency history and breakers shared by a hedged model and its bind_tools() copies."""
+
+    def __init__(self, names: List[str], failure_threshold: int, reset_timeout: float, window: int = 200):
+        self.names = names
+        self.breakers = [CircuitBreaker(failure_threshold, reset_timeout) for _ in names]
+        self.latencies: List[Deque[float]] = [deque(maxlen=window) for _ in names]
+        self.counters = {"calls": 0, "hedged": 0, "failovers": 0, "backup_wins": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "candidates": [
+                {
+                    "name": name,
+                    "circuit": breaker.state,
+                    "trips": breaker.trips,
+                    "p50_seconds": round(percentile(list(lat), 50), 4),
+                    "p95_seconds": round(percentile(list(lat), 95), 4),
+                }
+                for name, breaker, lat in zip(self.names, self.breakers, self.latencies)
+            ],
+        }
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Chat model that hedges slow calls and fails over between providers.
+
+    The first healthy candidate is called first. If it has not answered
+    within the hedge delay (the `hedge_percentile` of its recent latencies,
+    clamped to [min_hedge_delay, max_hedge_delay]) the next candidate is
+    fired as well; the first successful answer wins and the other call is
+    cancelled. A failing candidate immediately fails over to the next one,
+    and candidates that keep failing are skipped by their circuit breaker.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    candidates: List[Any]
+    state: Any = None
+    hedge_percentile: float = 95.0
+    initial_hedge_delay: float = 5.0
+    min_hedge_delay: float = 0.5
+    max_hedge_delay: float = 20.0
+    min_samples: int = 20
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.state is None:
+            names = [
+                str(getattr(c, "model_name", None) or getattr(c, "model", None) or type(c).__name__)
+                for c in self.candidates
+            ]
+            self.state = HedgeState(names, failure_threshold=5, reset_timeout=30.0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(
+            update={"candidates": [c.bind_tools(tools, **kwargs) for c in self.candidates]}
+        )
+
+    def hedge_delay(self, index: int) -> float:
+        samples = list(self.state.latencies[index])
+        if len(samples) < self.min_samples:
+            delay = self.initial_hedge_delay
+        else:
+            delay = percentile(samples, self.hedge_percentile)
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, delay))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        # Senkron yol hedge yapmaz: ilk sağlıklı adayı dener, hata olursa sıradakine geçer
+        last_error: Optional[BaseException] = None
+        for index in self._healthy_order():
+            if self._acquire(index) is None:
+                continue
+            try:
+                message = self.candidates[index].invoke(messages, stop=stop, **kwargs)
+                self.state.breakers[index].record_success()
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                self.state.breakers[index].record_failure()
+                last_error = e
+        raise last_error or RuntimeError("All candidates are refused by their circuit breakers.")
+
+    def _all_open(self) -> bool:
+        return all(b.state == "open" for b in self.state.breakers)
+
+    def _healthy_order(self) -> List[int]:
+        order = [i for i, b in enumerate(self.state.breakers) if b.available()]
+        # Hepsi açıksa en azından birincil adayı dene; deneme çağrısı süren aday varsa bekletme, reddet
+        return order or ([0] if self._all_open() else [])
+
+    def _acquire(self, index: int) -> Optional[str]:
+        """acquire() of the candidate's breaker; the all-open fallback goes through anyway."""
+        kind = self.state.breakers[index].acquire()
+        if kind is None and self._all_open():
+            return "forced"
+        return kind
+
+    async def _call(self, index: int, messages, stop, **kwargs) -> tuple:
+        started = time.monotonic()
+        message = await self.candidates[index].ainvoke(messages, stop=stop, **kwargs)
+        return message, time.monotonic() - started
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        state: HedgeState = self.state
+        state.counters["calls"] += 1
+
+        queue = self._healthy_order()
+        pending: Dict[asyncio.Task, int] = {}
+        probes: set = set()
+        last_error: Optional[BaseException] = None
+
+        def launch() -> bool:
+            # Sıradaki adayın devresi bu arada başka bir çağrıya deneme hakkını vermiş olabilir
+            while queue:
+                index = queue.pop(0)
+                kind = self._acquire(index)
+                if kind is not None:
+                    task = asyncio.create_task(self._call(index, messages, stop, **kwargs))
+                    pending[task] = index
+                    if kind == "probe":
+                        probes.add(task)
+                    return True
+            return False
+
+        if not launch():
+            raise RuntimeError("All candidates are refused by their circuit breakers.")
+        primary = next(iter(pending.values()))
+        try:
+            while pending:
+                timeout = self.hedge_delay(primary) if queue else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Birincil yavaş: yedek isteği de ateşle
+                    if launch():
+                        state.counters["hedged"] += 1
+                        logger.info(
+                            f"Hedging: no answer after {timeout:.2f}s, fired backup "
+                            f"'{state.names[list(pending.values())[-1]]}'."
+                        )
+                    continue
+
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception() is None:
+                        message, elapsed = task.result()
+                        state.breakers[index].record_success()
+                        state.latencies[index].append(elapsed)
+                        if index != primary:
+                            state.counters["backup_wins"] += 1
+                        return ChatResult(generations=[ChatGeneration(message=message)])
+
+                    last_error = task.exception()
+                    state.breakers[index].record_failure()
+                    logger.error(f"Hedging: candidate '{state.names[index]}' failed: {last_error}")
+                    if launch():
+                        state.counters["failovers"] += 1
+        finally:
+            for task, index in pending.items():
+                task.cancel()
+                # Sonucu olmayan deneme çağrısı devreyi kilitli bırakmasın
+                if task in probes:
+                    state.breakers[index].release()
+            # İptaller tamamlansın ("Task exception was never retrieved" uyarısı kalmasın)
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        raise last_error if last_error else RuntimeError("Hedged call produced no result.")
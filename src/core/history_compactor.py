@@ -0,0 +1,226 @@
+import json
+from typing import Callable, Dict, List, Optional, Protocol, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from core.settings import get_settings
+from logger import logger
+
+DEFAULT_COMPACTION_SETTINGS = {
+    "enabled": True,
+    "max_tokens": 12000,
+    "keep_recent_turns": 6,
+    "tool_result_preview_chars": 400,
+    "token_counter": "heuristic",
+}
+
+
+# --- TOKEN COUNTERS ---
+
+
+class TokenCounter(Protocol):
+    def count_text(self, text: str) -> int: ...
+
+    def count_messages(self, messages: Sequence[BaseMessage]) -> int: ...
+
+
+def message_text(message: BaseMessage) -> str:
+    """Flattens message content (str or content blocks) and tool calls into plain text."""
+    content = message.content
+    if isinstance(content, str):
+        text = content
+    else:
+        parts = []
+        for block in content:
+            if isinstance(block, str):
+                parts.append(block)
+            elif isinstance(block, dict):
+                parts.append(str(block.get("text") or block.get("content") or ""))
+        text = "\n".join(parts)
+
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps(
+            [{"name": tc.get("name"), "args": tc.get("args")} for tc in tool_calls],
+            ensure_ascii=False,
+            default=str,
+        )
+    return text
+
+
+class HeuristicTokenCounter:
+    """
+    Offline token estimate: ~4 characters per token plus a fixed per-message
+    overhead for role/formatting tokens. Close enough for budget decisions and
+    needs no tokenizer download.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0, per_message_overhead: int = 4):
+        self.chars_per_token = chars_per_token
+        self.per_message_overhead = per_message_overhead
+
+    def count_text(self, text: str) -> int:
+        if not text:
+            return 0
+        return int(len(text) / self.chars_per_token) + 1
+
+    def count_messages(self, messages: Sequence[BaseMessage]) -> int:
+        return sum(
+            self.count_text(message_text(m)) + self.per_message_overhead
+            for m in messages
+        )
+
+
+class TiktokenCounter(HeuristicTokenCounter):
+    """Exact BPE counts via tiktoken, when it is installed and its encoding is cached locally."""
+
+    def __init__(self, encoding_name: str = "cl100k_base", per_message_overhead: int = 4):
+        super().__init__(per_message_overhead=per_message_overhead)
+        import tiktoken
+
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def count_text(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=())) if text else 0
+
+
+_token_counters: Dict[str, Callable[[], TokenCounter]] = {
+    "heuristic": HeuristicTokenCounter,
+    "tiktoken": TiktokenCounter,
+}
+
+
+def register_token_counter(name: str, factory: Callable[[], TokenCounter]) -> None:
+    """Registers a token counter factory that can be selected from config.yaml."""
+    _token_counters[name] = factory
+
+
+def get_token_counter(name: Optional[str] = None) -> TokenCounter:
+    """Returns the configured token counter, falling back to the heuristic one."""
+    name = name or get_settings("compaction", DEFAULT_COMPACTION_SETTINGS)["token_counter"]
+    factory = _token_counters.get(name)
+    if factory is None:
+        logger.error(f"Unknown token counter '{name}', using heuristic counter.")
+        return HeuristicTokenCounter()
+    try:
+        return factory()
+    except Exception as e:
+        logger.error(f"Token counter '{name}' unavailable ({e}), using heuristic counter.")
+        return HeuristicTokenCounter()
+
+
+# --- COMPACTION ---
+
+
+def _group_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """
+    Splits messages into atomic turns. An AIMessage with tool_calls and the
+    ToolMessages answering it always stay together, because providers reject
+    a tool_call without its result (and vice versa).
+    """
+    groups: List[List[BaseMessage]] = []
+    open_call_ids: set = set()
+
+    for message in messages:
+        if isinstance(message, ToolMessage) and groups and message.tool_call_id in open_call_ids:
+            groups[-1].append(message)
+            continue
+
+        groups.append([message])
+        if isinstance(message, AIMessage) and message.tool_calls:
+            open_call_ids = {tc["id"] for tc in message.tool_calls}
+        else:
+            open_call_ids = set()
+
+    return groups
+
+
+def _elide_tool_result(message: BaseMessage, preview_chars: int) -> BaseMessage:
+    if not isinstance(message, ToolMessage):
+        return message
+
+    text = message_text(message)
+    if len(text) <= preview_chars:
+        return message
+
+    preview = text[:preview_chars].rstrip()
+    elided = (
+        f"[Elided older '{message.name or 'tool'}' result: {len(text)} chars. "
+        f"Call the tool again if the full content is needed.]\n{preview}..."
+    )
+    return message.model_copy(update={"content": elided})
+
+
+def compact_messages(
+    messages: Sequence[BaseMessage],
+    *,
+    max_tokens: Optional[int] = None,
+    keep_recent_turns: Optional[int] = None,
+    tool_result_preview_chars: Optional[int] = None,
+    counter: Optional[TokenCounter] = None,
+) -> List[BaseMessage]:
+    """
+    Bounds the history sent to the LLM once it passes a token threshold.
+
+    The leading system prompt, the original user request and the last
+    `keep_recent_turns` turns (including any pending tool_call/ToolMessage
+    pair) are always kept verbatim. Older tool results are elided to a short
+    preview first; if that is not enough, the oldest turns are dropped.
+    The graph state itself is left untouched, only the prompt is compacted.
+    """
+    settings = get_settings("compaction", DEFAULT_COMPACTION_SETTINGS)
+    max_tokens = max_tokens if max_tokens is not None else settings["max_tokens"]
+    keep_recent_turns = (
+        keep_recent_turns if keep_recent_turns is not None else settings["keep_recent_turns"]
+    )
+    preview_chars = (
+        tool_result_preview_chars
+        if tool_result_preview_chars is not None
+        else settings["tool_result_preview_chars"]
+    )
+    counter = counter or get_token_counter(settings["token_counter"])
+
+    messages = list(messages)
+    total = counter.count_messages(messages)
+    if total <= max_tokens:
+        return messages
+
+    # 1. Korunan kısımlar: system prompt + ilk kullanıcı isteği
+    split = 0
+    while split < len(messages) and isinstance(messages[split], SystemMessage):
+        split += 1
+    head = messages[:split]
+
+    groups = _group_turns(messages[split:])
+    anchor: List[BaseMessage] = []
+    if groups and isinstance(groups[0][0], HumanMessage):
+        anchor = groups.pop(0)
+
+    keep = max(1, keep_recent_turns)
+    recent = groups[-keep:]
+    older = groups[:-keep] if len(groups) > keep else []
+
+    # 2. Eski tool sonuçlarını kısalt
+    older = [[_elide_tool_result(m, preview_chars) for m in g] for g in older]
+
+    def _flatten(parts: List[List[BaseMessage]]) -> List[BaseMessage]:
+        return [m for g in parts for m in g]
+
+    # 3. Hâlâ büyükse en eski turları at
+    dropped = 0
+    while older and counter.count_messages(head + anchor + _flatten(older + recent)) > max_tokens:
+        dropped += len(older.pop(0))
+
+    compacted = head + anchor + _flatten(older + recent)
+    logger.info(
+        f"History compaction: {total} -> {counter.count_messages(compacted)} tokens "
+        f"({len(messages)} -> {len(compacted)} messages, {dropped} dropped)."
+    )
+    return compacted
+
+
+def compact_for_llm(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """Applies compaction if it is enabled in config.yaml."""
+    if not get_settings("compaction", DEFAULT_COMPACTION_SETTINGS)["enabled"]:
+        return list(messages)
+    return compact_messages(messages)
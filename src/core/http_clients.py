@@ -0,0 +1,108 @@
+import importlib
+import importlib.util
+from typing import Any, Dict
+
+from core.settings import get_settings
+from logger import logger
+
+DEFAULT_HTTP_SETTINGS = {
+    # Sağlayıcı başına tek bir bağlantı havuzu; tüm modeller bunu paylaşır
+    "max_connections": 32,
+    "max_keepalive_connections": 16,
+    "keepalive_expiry_seconds": 60.0,
+    "connect_timeout_seconds": 10.0,
+    # Modelin kendi `timeout` değeri istek bazında bunu ezer
+    "read_timeout_seconds": 120.0,
+    # Yalnızca `h2` paketi kuruluysa etkinleşir
+    "http2": True,
+}
+
+_clients: Dict[str, Any] = {}
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def _httpx_module_of(client_cls: type):
+    """
+    The httpx flavour a provider SDK is built on (SDK client classes subclass
+    its AsyncClient), so Limits/Timeout objects match the client they go into.
+    """
+    for base in client_cls.__mro__:
+        if base.__name__ == "AsyncClient":
+            return importlib.import_module(base.__module__.split(".")[0])
+    return importlib.import_module("httpx")
+
+
+def _client_class(provider: str) -> type:
+    if provider == "openai":
+        import openai
+
+        return openai.DefaultAsyncHttpxClient
+    if provider == "anthropic":
+        import anthropic
+
+        return anthropic.DefaultAsyncHttpxClient
+    import httpx
+
+    return httpx.AsyncClient
+
+
+def connection_kwargs(provider: str) -> Dict[str, Any]:
+    """Keep-alive, pool limits, timeouts and HTTP/2 flag from the `http` config section."""
+    settings = get_settings("http", DEFAULT_HTTP_SETTINGS)
+    httpx_module = _httpx_module_of(_client_class(provider))
+    return {
+        "limits": httpx_module.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry_seconds"],
+        ),
+        "timeout": httpx_module.Timeout(
+            settings["read_timeout_seconds"], connect=settings["connect_timeout_seconds"]
+        ),
+        "http2": bool(settings["http2"]) and http2_available(),
+    }
+
+
+def get_async_http_client(provider: str):
+    """
+    Returns the process-wide async HTTP client for a provider. Every chat
+    model of that provider is built on it, so concurrent runs reuse warm
+    keep-alive connections instead of each opening its own (and paying for
+    a new TLS handshake).
+    """
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        kwargs = connection_kwargs(provider)
+        client = _client_class(provider)(**kwargs)
+        _clients[provider] = client
+        logger.info(
+            f"HTTP pool for '{provider}' created "
+            f"(max_connections={kwargs['limits'].max_connections}, http2={kwargs['http2']})."
+        )
+    return client
+
+
+def http_client_stats() -> Dict[str, Any]:
+    stats = {}
+    for provider, client in _clients.items():
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", None) or [])
+        stats[provider] = {
+            "closed": client.is_closed,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+        }
+    return stats
+
+
+async def close_http_clients() -> None:
+    """Closes every shared client; called on server shutdown and at CLI exit."""
+    while _clients:
+        provider, client = _clients.popitem()
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.error(f"Error closing HTTP client for '{provider}': {e}")
@@ -1,39 +1,310 @@
+import functools
 import os
+import weakref
+from typing import Any, Dict, Optional, Tuple
 
-from dotenv import load_dotenv
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+from core.http_clients import close_http_clients, connection_kwargs, get_async_http_client
+from core.settings import get_settings
+from logger import logger
 
-load_dotenv()
+DEFAULT_MODELS = {
+    "openai": "gpt-4o-mini",
+    "gemini": "gemini-2.5-flash",
+    "anthropic": "claude-3-5-sonnet-latest",
+    # Çevrimdışı, betikli model (testler ve benchmark'lar için)
+    "fake": "scripted",
+}
+
+DEFAULT_MODEL_SPEC = {
+    "temperature": 0,
+    "max_tokens": None,
+    "timeout": None,
+    # Retry'ları ainvoke_llm yapıyor; SDK'nın kendi retry'ı üst üste binmesin
+    "max_retries": 0,
+}
+
+DEFAULT_HEDGING_SETTINGS = {
+    "enabled": False,
+    "percentile": 95,
+    "initial_delay_seconds": 5.0,
+    "min_delay_seconds": 0.5,
+    "max_delay_seconds": 20.0,
+    "min_samples": 20,
+    "failure_threshold": 5,
+    "reset_timeout_seconds": 30.0,
+    "backups": [],
+}
 
 _llm = None
+_env_loaded = False
+_llm_cache: Dict[Tuple, Any] = {}
+# id(model) -> (weakref, provider); ainvoke_llm doğru rate limiter'ı seçebilsin diye.
+# Kayıt, model toplanınca silinir ve kimlik kontrolüyle okunur: aynı id'yi alan yeni bir
+# nesne eski sağlayıcıyı devralmaz.
+_providers_by_id: Dict[int, Tuple[weakref.ref, str]] = {}
+
+
+def _register_provider(llm: Any, provider: str) -> None:
+    key = id(llm)
+
+    def _forget(ref: weakref.ref, key: int = key) -> None:
+        entry = _providers_by_id.get(key)
+        if entry is not None and entry[0] is ref:
+            del _providers_by_id[key]
+
+    _providers_by_id[key] = (weakref.ref(llm, _forget), provider)
+
+
+def _registered_provider(llm: Any) -> Optional[str]:
+    entry = _providers_by_id.get(id(llm))
+    return entry[1] if entry is not None and entry[0]() is llm else None
+
+
+def _load_env() -> None:
+    # .env ilk ihtiyaçta okunur; import anında değil
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _env_loaded = True
+
+
+def get_provider_name() -> str:
+    _load_env()
+    return os.getenv("LLM_PROVIDER", "openai").lower()
+
+
+def _apply_level(spec: dict, level: Optional[dict]) -> None:
+    if not level:
+        return
+    level = {k: v for k, v in level.items() if isinstance(v, (str, int, float, bool)) or v is None}
+    if "provider" in level and "model" not in level:
+        # Sağlayıcı değişiyorsa üst seviyeden gelen model adı geçersiz
+        spec["model"] = DEFAULT_MODELS.get(str(level["provider"]).lower())
+    spec.update(level)
+
+
+def resolve_model_spec(agent: Optional[str] = None, node: Optional[str] = None) -> dict:
+    """
+    Resolves the model configuration for an agent/node from the `models`
+    section of config.yaml. Later levels override earlier ones:
+    built-in defaults -> models.default -> models.<agent>.default -> models.<agent>.<node>
+    """
+    models_cfg = get_settings("models", {})
+    spec = dict(DEFAULT_MODEL_SPEC)
+    spec["provider"] = get_provider_name()
+    spec["model"] = DEFAULT_MODELS.get(spec["provider"])
+
+    _apply_level(spec, models_cfg.get("default"))
+    agent_cfg = (models_cfg.get(agent) or {}) if agent else {}
+    _apply_level(spec, agent_cfg.get("default"))
+    if node:
+        _apply_level(spec, agent_cfg.get(node))
+
+    spec["provider"] = str(spec["provider"]).lower()
+    return spec
+
+
+def _gemini_client_args() -> dict:
+    kwargs = connection_kwargs("gemini")
+    return {"limits": kwargs["limits"], "http2": kwargs["http2"]}
+
+
+def _use_shared_anthropic_client(llm) -> bool:
+    """
+    Pre-builds ChatAnthropic's async client on the shared pool. ChatAnthropic
+    takes no http_client, so this relies on two langchain-anthropic internals
+    (the `_async_client` cached_property and `_client_params`); if they change,
+    the model keeps its default client and a warning is logged.
+    """
+    import anthropic
+
+    params = getattr(llm, "_client_params", None)
+    if not isinstance(getattr(type(llm), "_async_client", None), functools.cached_property) or not isinstance(
+        params, dict
+    ):
+        logger.warning(
+            "langchain-anthropic internals changed (_async_client/_client_params); "
+            "Anthropic calls use the SDK's default HTTP client instead of the shared pool."
+        )
+        return False
+    try:
+        client = anthropic.AsyncClient(**params, http_client=get_async_http_client("anthropic"))
+    except TypeError as e:
+        logger.warning(f"Shared Anthropic HTTP client skipped, using the default client: {e}")
+        return False
+    llm.__dict__["_async_client"] = client
+    return True
+
+
+def _build_llm(spec: dict):
+    """
+    Provider SDKs are imported here, on first use: each one costs hundreds
+    of milliseconds at import time and a process only ever needs one or two.
+    """
+    _load_env()
+    provider = spec["provider"]
+    common = {"model": spec["model"], "temperature": spec["temperature"]}
+
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(
+            **common,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            max_tokens=spec["max_tokens"],
+            timeout=spec["timeout"],
+            max_retries=spec["max_retries"],
+            http_async_client=get_async_http_client("openai"),
+        )
+    elif provider == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        llm = ChatGoogleGenerativeAI(
+            **common,
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            max_output_tokens=spec["max_tokens"],
+            timeout=spec["timeout"],
+            max_retries=spec["max_retries"],
+            # google-genai'ye hazır istemci verilemiyor; havuz ayarları model başına uygulanır
+            client_args=_gemini_client_args(),
+        )
+    elif provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+
+        llm = ChatAnthropic(
+            **common,
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            max_tokens=spec["max_tokens"] or 1024,
+            timeout=spec["timeout"],
+            max_retries=spec["max_retries"],
+        )
+        _use_shared_anthropic_client(llm)
+    elif provider == "fake":
+        from core.fake_llm import ScriptedChatModel
+
+        llm = ScriptedChatModel.for_node(spec.get("script") or "default", model_name=spec["model"])
+    else:
+        raise ValueError(f"Unsupported LLM provider: {provider}")
+
+    _register_provider(llm, provider)
+    return llm
+
+
+def _build_hedged_llm(primary, spec: dict, hedging: dict):
+    """Wraps the primary model with the configured backup providers/models."""
+    from core.hedging import HedgedChatModel, HedgeState
+
+    candidates = [primary]
+    names = [f"{spec['provider']}/{spec['model']}"]
+    for backup in hedging["backups"]:
+        backup_spec = dict(spec)
+        _apply_level(backup_spec, backup)
+        backup_spec["provider"] = str(backup_spec["provider"]).lower()
+        if backup_spec == spec:
+            continue
+        candidates.append(_build_llm(backup_spec))
+        names.append(f"{backup_spec['provider']}/{backup_spec['model']}")
+
+    if len(candidates) == 1:
+        return primary
+
+    hedged = HedgedChatModel(
+        candidates=candidates,
+        state=HedgeState(
+            names,
+            failure_threshold=hedging["failure_threshold"],
+            reset_timeout=hedging["reset_timeout_seconds"],
+        ),
+        hedge_percentile=hedging["percentile"],
+        initial_hedge_delay=hedging["initial_delay_seconds"],
+        min_hedge_delay=hedging["min_delay_seconds"],
+        max_hedge_delay=hedging["max_delay_seconds"],
+        min_samples=hedging["min_samples"],
+    )
+    _register_provider(hedged, spec["provider"])
+    return hedged
+
+
+def get_llm(agent: Optional[str] = None, node: Optional[str] = None):
+    """
+    Returns the chat model configured for an agent/node. One client is cached
+    per distinct configuration, so nodes sharing a model share a client.
+    With `hedging.enabled`, the model is wrapped in a HedgedChatModel that
+    races slow calls against the configured backups. Inside use_cassette()
+    the model is wrapped to record its calls, or replaced by the recording.
+    """
+    from core.cassette import active_cassette
+
+    spec = resolve_model_spec(agent, node)
+    cassette = active_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        # Replay gerçek bir istemci kurmaz (API anahtarı / ağ gerekmez)
+        from core.cassette import CassetteChatModel
+
+        return CassetteChatModel(cassette=cassette, key=f"{agent or 'default'}.{node or 'default'}")
+    if spec["provider"] == "fake":
+        # Betikli model node'a göre cevap verir; bu yüzden node başına ayrı örnek
+        spec["script"] = f"{agent or 'default'}.{node or 'default'}"
+    hedging = get_settings("hedging", DEFAULT_HEDGING_SETTINGS)
+    key = tuple(sorted(spec.items())) + (("hedged", bool(hedging["enabled"])),)
+    if key not in _llm_cache:
+        logger.info(
+            f"LLM factory: creating {spec['provider']}/{spec['model']} client "
+            f"for {agent or 'default'}.{node or 'default'}."
+        )
+        llm = _build_llm(spec)
+        if hedging["enabled"] and hedging["backups"]:
+            llm = _build_hedged_llm(llm, spec, hedging)
+        _llm_cache[key] = llm
+    if cassette is not None:
+        from core.cassette import CassetteChatModel
+
+        return CassetteChatModel(
+            cassette=cassette,
+            key=f"{agent or 'default'}.{node or 'default'}",
+            inner=_llm_cache[key],
+            provider_name=spec["provider"],
+        )
+    return _llm_cache[key]
+
+
+def hedging_stats() -> Dict[str, Any]:
+    """Hedge counters, latency percentiles and circuit states of every hedged client."""
+    return {
+        llm.state.names[0]: llm.state.stats()
+        for llm in _llm_cache.values()
+        if getattr(llm, "_llm_type", None) == "hedged"
+    }
+
+
+async def close_llms() -> None:
+    """Drops cached models and closes the shared HTTP pools they were built on."""
+    global _llm
+    _llm = None
+    _llm_cache.clear()
+    _providers_by_id.clear()
+    await close_http_clients()
 
 
 def get_base_llm():
+    """Default model (models.default / LLM_PROVIDER), kept for callers without an agent context."""
     global _llm
     if _llm is None:
-        provider = os.getenv("LLM_PROVIDER", "openai").lower()
-
-        if provider == "openai":
-            _llm = ChatOpenAI(
-                model="gpt-4o-mini",
-                temperature=0,
-                api_key=os.getenv("OPENAI_API_KEY"),
-            )
-        elif provider == "gemini":
-            _llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
-                temperature=0,
-                google_api_key=os.getenv("GOOGLE_API_KEY"),
-            )
-        elif provider == "anthropic":
-            _llm = ChatAnthropic(
-                model="claude-3-5-sonnet-latest",
-                temperature=0,
-                api_key=os.getenv("ANTHROPIC_API_KEY"),
-            )
-        else:
-            raise ValueError(f"Unsupported LLM provider: {provider}")
-
+        _llm = get_llm()
     return _llm
+
+
+def provider_of(llm: Any) -> str:
+    """Provider of a model built here, looking through bind_tools()/with_config() wrappers."""
+    current = llm
+    for _ in range(8):
+        # Sarmalayıcı modeller (cassette, betikli model kopyaları) sağlayıcılarını kendileri taşır
+        provider = _registered_provider(current) or getattr(current, "provider_name", None)
+        if provider:
+            return provider
+        if not hasattr(current, "bound"):
+            break
+        current = current.bound
+    return get_provider_name()
@@ -0,0 +1,137 @@
+import asyncio
+import random
+import time
+from typing import Any, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+
+from core.budget import model_name_of, token_usage
+from core.history_compactor import get_token_counter
+from core.rate_limiter import get_rate_limiter
+from core.request_context import check_deadline, current_request
+from core.settings import get_settings
+from core.telemetry import get_telemetry
+from logger import logger
+
+DEFAULT_RETRY_SETTINGS = {
+    "max_attempts": 4,
+    "base_delay_seconds": 1.0,
+    "max_delay_seconds": 30.0,
+    # Token bucket'a yanıt için ayrılan tahmini token sayısı
+    "completion_token_estimate": 1024,
+}
+
+_RETRYABLE_NAME_HINTS = (
+    "RateLimit",
+    "Timeout",
+    "APIConnection",
+    "ServiceUnavailable",
+    "InternalServer",
+    "ResourceExhausted",
+    "Overloaded",
+)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """Rate limits (429), timeouts, connection errors and 5xx are worth retrying."""
+    status = _status_code(exc)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if any(hint in type(exc).__name__ for hint in _RETRYABLE_NAME_HINTS):
+        return True
+    text = str(exc).lower()
+    return "429" in text or "rate limit" in text
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+async def ainvoke_llm(
+    llm: Any,
+    messages: Sequence[BaseMessage],
+    *,
+    provider: Optional[str] = None,
+) -> BaseMessage:
+    """
+    Single entry point for LLM calls made by graph nodes.
+
+    Waits on the provider's request/token buckets before each attempt and
+    retries rate-limit and transient errors with jittered exponential backoff,
+    so a burst degrades into queueing instead of a failed run. No attempt
+    starts, and no backoff is slept, past the current request's deadline.
+    Successful calls are recorded in the request's usage meter; every
+    attempt is recorded as an "llm" telemetry span with model and tokens.
+    """
+    if provider is None:
+        from core.llm_factory import provider_of
+
+        provider = provider_of(llm)
+
+    settings = get_settings("llm_retry", DEFAULT_RETRY_SETTINGS)
+    limiter = get_rate_limiter(provider)
+    estimated_tokens = (
+        get_token_counter().count_messages(messages) + settings["completion_token_estimate"]
+    )
+
+    attempt = 0
+    while True:
+        check_deadline()
+        if limiter is not None:
+            await limiter.acquire(estimated_tokens)
+        started_wall = time.time()
+        started = time.perf_counter()
+        try:
+            response = await llm.ainvoke(list(messages))
+        except Exception as e:
+            get_telemetry().record(
+                "llm", provider, time.perf_counter() - started, "error", started_wall,
+                model=model_name_of(llm), attempt=attempt + 1, error=type(e).__name__,
+            )
+            attempt += 1
+            if attempt >= settings["max_attempts"] or not is_retryable_error(e):
+                raise
+            delay = _retry_after(e) or backoff_delay(
+                attempt, settings["base_delay_seconds"], settings["max_delay_seconds"]
+            )
+            request = current_request()
+            remaining = request.remaining() if request is not None else None
+            if remaining is not None and delay >= remaining:
+                # Bekleme deadline'ı aşacak; boşuna uyumak yerine hemen bitir
+                raise request.exceeded() from e
+            logger.info(
+                f"LLM call to '{provider}' failed ({type(e).__name__}), "
+                f"retry {attempt}/{settings['max_attempts'] - 1} in {delay:.2f}s."
+            )
+            await asyncio.sleep(delay)
+            continue
+
+        prompt_tokens, completion_tokens = token_usage(messages, response)
+        get_telemetry().record(
+            "llm", provider, time.perf_counter() - started, "ok", started_wall,
+            model=model_name_of(llm, response), attempt=attempt + 1,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+        )
+        request = current_request()
+        if request is not None:
+            request.usage.record(llm, messages, response)
+        return response
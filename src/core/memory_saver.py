@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from logger import logger
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    MemorySaver whose memory use is bounded for a long-running server.
+
+    - Whole threads are evicted LRU once more than `max_threads` are stored,
+      and threads idle for longer than `thread_ttl_seconds` expire.
+    - Each thread keeps only its newest `max_checkpoints_per_thread`
+      checkpoints per namespace; older checkpoints, their pending writes and
+      channel blobs no longer referenced are dropped.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: int = 256,
+        thread_ttl_seconds: Optional[float] = 3600,
+        max_checkpoints_per_thread: int = 20,
+        name: str = "memory",
+    ) -> None:
+        super().__init__()
+        self.name = name
+        self.max_threads = max_threads
+        self.thread_ttl_seconds = thread_ttl_seconds
+        # En son checkpoint her zaman tutulmalı, parent için de bir tane daha
+        self.max_checkpoints_per_thread = max(2, max_checkpoints_per_thread)
+
+        self._lock = threading.RLock()
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        self._counters = {
+            "threads_evicted_lru": 0,
+            "threads_expired": 0,
+            "checkpoints_pruned": 0,
+        }
+
+    # --- BaseCheckpointSaver overrides (async versions delegate to these) ---
+
+    def get_tuple(self, config):
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            if thread_id not in self.storage:
+                return None
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            self._touch(thread_id)
+            self._prune_thread(thread_id, config["configurable"]["checkpoint_ns"])
+            self._evict()
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._touch(config["configurable"]["thread_id"])
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._last_access.pop(thread_id, None)
+
+    # --- Bounding ---
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _prune_thread(self, thread_id: str, checkpoint_ns: str) -> None:
+        ns_storage = self.storage[thread_id][checkpoint_ns]
+        excess = len(ns_storage) - self.max_checkpoints_per_thread
+        if excess <= 0:
+            return
+
+        # Checkpoint ID'leri zamana göre sıralanabilir (uuid6)
+        for checkpoint_id in sorted(ns_storage)[:excess]:
+            del ns_storage[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        self._counters["checkpoints_pruned"] += excess
+
+        referenced = set()
+        for saved_checkpoint, _, _ in ns_storage.values():
+            checkpoint = self.serde.loads_typed(saved_checkpoint)
+            referenced.update(checkpoint.get("channel_versions", {}).items())
+
+        for key in [
+            k for k in self.blobs if k[0] == thread_id and k[1] == checkpoint_ns
+        ]:
+            if (key[2], key[3]) not in referenced:
+                del self.blobs[key]
+
+    def _evict(self) -> None:
+        if self.thread_ttl_seconds:
+            cutoff = time.monotonic() - self.thread_ttl_seconds
+            for thread_id, last_access in list(self._last_access.items()):
+                if last_access >= cutoff:
+                    break
+                self.delete_thread(thread_id)
+                self._counters["threads_expired"] += 1
+
+        while len(self._last_access) > self.max_threads:
+            thread_id = next(iter(self._last_access))
+            self.delete_thread(thread_id)
+            self._counters["threads_evicted_lru"] += 1
+            logger.info(f"Checkpointer '{self.name}': evicted LRU thread {thread_id}.")
+
+    # --- Metrics ---
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns thread/checkpoint counts and approximate stored bytes."""
+        with self._lock:
+            checkpoints = 0
+            stored_bytes = 0
+            for namespaces in self.storage.values():
+                for ns_storage in namespaces.values():
+                    checkpoints += len(ns_storage)
+                    for saved_checkpoint, saved_metadata, _ in ns_storage.values():
+                        stored_bytes += len(saved_checkpoint[1]) + len(saved_metadata[1])
+            writes = 0
+            for task_writes in self.writes.values():
+                writes += len(task_writes)
+                for _, _, value, _ in task_writes.values():
+                    stored_bytes += len(value[1])
+            for value in self.blobs.values():
+                stored_bytes += len(value[1])
+
+            return {
+                "name": self.name,
+                "threads": len(self._last_access),
+                "checkpoints": checkpoints,
+                "pending_writes": writes,
+                "blobs": len(self.blobs),
+                "approx_bytes": stored_bytes,
+                "limits": {
+                    "max_threads": self.max_threads,
+                    "thread_ttl_seconds": self.thread_ttl_seconds,
+                    "max_checkpoints_per_thread": self.max_checkpoints_per_thread,
+                },
+                **self._counters,
+            }
@@ -0,0 +1,166 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from core.request_context import current_request, run_with_deadline
+from core.telemetry import get_telemetry, with_tool_spans
+from logger import logger
+
+# Node adı -> kullanıcıya gösterilen aşama
+NODE_LABELS = {
+    "setup": "Setting up project context",
+    "decide_agent": "Deciding next step",
+    "final_response": "Finalizing architect report",
+    "analysis": "Task manager: analysing request",
+    "tools": "Task manager: updating manifest",
+}
+
+# Token'ları kullanıcıya akıtılan node
+STREAMED_NODE = "final_response"
+
+# Kendi thread'inde çalışan alt ajanın olaylarını üst run'ın stream'ine taşıyan custom anahtar
+SUBGRAPH_EVENT = "subgraph_event"
+
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+
+def report_progress(message: str) -> None:
+    """
+    Emits a progress message from inside a node or tool (e.g. "Running tool X").
+    Outside a running graph this is a no-op.
+    """
+    try:
+        from langgraph.config import get_stream_writer
+
+        get_stream_writer()({"progress": message})
+    except Exception:
+        pass
+
+
+def relay_subgraph_event(mode: str, chunk: Any) -> None:
+    """
+    Forwards a "tasks"/"custom" stream event of a sub-agent graph to the
+    calling run's stream. A sub-agent invoked with its own thread_id does
+    not stream into its parent, so without this its nodes would get no
+    progress labels or telemetry spans. Outside a running graph this is a
+    no-op.
+    """
+    try:
+        from langgraph.config import get_config, get_stream_writer
+
+        writer = get_stream_writer()
+        if mode == "custom":
+            writer(chunk)
+            return
+        parent = get_config().get("metadata", {}).get("langgraph_node")
+        writer({SUBGRAPH_EVENT: {"parent": parent, "mode": mode, "chunk": chunk}})
+    except Exception:
+        pass
+
+
+async def astream_run(
+    app,
+    graph_input: Optional[dict],
+    config: dict,
+    *,
+    on_node: Optional[Callable[[str], None]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    on_token: Optional[Callable[[str], Any]] = None,
+) -> None:
+    """
+    Drives a graph run and dispatches what happens during it:
+
+    - on_node(name): a top-level node finished (used for resume bookkeeping)
+    - on_progress(message): a node (including task manager nodes) started,
+      or a node/tool reported progress via report_progress()
+    - on_token(text): a token of the final_response LLM answer arrived
+
+    Inside a request_scope() with a deadline, the run is cancelled when the
+    deadline passes and DeadlineExceeded names the node that was running.
+
+    Every node (task manager nodes included) and tool execution is recorded
+    as a telemetry span.
+    """
+    stream_modes = ["updates", "tasks", "custom"]
+    if on_token is not None:
+        stream_modes.append("messages")
+    request = current_request()
+    telemetry = get_telemetry()
+    # task id -> (node path, perf_counter başlangıcı, duvar saati başlangıcı)
+    running: Dict[str, Tuple[str, float, float]] = {}
+
+    async def on_task(namespace: tuple, chunk: dict) -> None:
+        # Başlangıç olaylarında "input" var, bitiş olaylarında "result"
+        path = node_path(namespace, chunk["name"])
+        if "input" not in chunk:
+            started = running.pop(chunk["id"], None)
+            if started is not None:
+                telemetry.record(
+                    "node", path, time.perf_counter() - started[1],
+                    "error" if chunk.get("error") else "ok", started[2],
+                    node=path, error=chunk.get("error"),
+                )
+            return
+        running[chunk["id"]] = (path, time.perf_counter(), time.time())
+        if request is not None:
+            request.current_node = path
+        label = NODE_LABELS.get(chunk["name"])
+        if label and on_progress is not None:
+            await _safe_progress(on_progress, label)
+
+    async def consume() -> None:
+        async for namespace, mode, chunk in app.astream(
+            graph_input, config=with_tool_spans(config), stream_mode=stream_modes, subgraphs=True
+        ):
+            if mode == "updates":
+                if not namespace and on_node is not None:
+                    for node_name in chunk:
+                        on_node(node_name)
+
+            elif mode == "tasks":
+                await on_task(namespace, chunk)
+
+            elif mode == "custom":
+                if not isinstance(chunk, dict):
+                    continue
+                relayed = chunk.get(SUBGRAPH_EVENT)
+                if relayed and relayed["mode"] == "tasks":
+                    parents = namespace + ((relayed["parent"],) if relayed["parent"] else ())
+                    await on_task(parents, relayed["chunk"])
+                elif "progress" in chunk and on_progress is not None:
+                    await _safe_progress(on_progress, chunk["progress"])
+
+            elif mode == "messages":
+                message, metadata = chunk
+                if namespace or metadata.get("langgraph_node") != STREAMED_NODE:
+                    continue
+                text = _chunk_text(message.content)
+                if text:
+                    on_token(text)
+
+    # İstek bağlamında deadline varsa tüm run (LLM çağrıları, alt graph) o anda iptal edilir
+    await run_with_deadline(consume())
+
+
+def node_path(namespace: tuple, name: str) -> str:
+    """'decide_agent/analysis' for a task manager node running inside decide_agent."""
+    parents = [part.split(":")[0] for part in namespace]
+    return "/".join(parents + [name])
+
+
+def _chunk_text(content: Any) -> str:
+    # Anthropic/Gemini chunk'ları içerik blokları listesi olarak gelebilir
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+        )
+    return ""
+
+
+async def _safe_progress(callback: ProgressCallback, message: str) -> None:
+    # İlerleme bildirimi başarısız olursa run devam etmeli
+    try:
+        await callback(message)
+    except Exception as e:
+        logger.error(f"Progress report failed: {e}")
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from core.settings import get_settings
+
+DEFAULT_RATE_LIMIT = {
+    "requests_per_minute": 60,
+    "tokens_per_minute": 200000,
+}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` units refill per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Takes `amount` units, sleeping until they are available. Returns seconds waited."""
+        # Kapasiteden büyük istekler asla dolmaz; kapasiteye kırp
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one LLM provider."""
+
+    def __init__(self, provider: str, requests_per_minute: float, tokens_per_minute: float):
+        self.provider = provider
+        self.requests = TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute))
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, max(1.0, tokens_per_minute))
+        self._counters = {"acquired": 0, "throttled": 0, "throttled_seconds": 0.0}
+
+    async def acquire(self, estimated_tokens: int = 0) -> float:
+        waited = await self.requests.acquire(1)
+        if estimated_tokens:
+            waited += await self.tokens.acquire(estimated_tokens)
+        self._counters["acquired"] += 1
+        if waited > 0:
+            self._counters["throttled"] += 1
+            self._counters["throttled_seconds"] += waited
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_available": round(self.requests.available, 2),
+            "tokens_available": round(self.tokens.available, 2),
+            **{k: round(v, 4) if isinstance(v, float) else v for k, v in self._counters.items()},
+        }
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+
+
+def get_rate_limiter(provider: str) -> Optional[ProviderRateLimiter]:
+    """
+    Returns the limiter for a provider from the `rate_limits` config section
+    (provider entry merged over `default`), or None if limiting is disabled.
+    """
+    if provider not in _limiters:
+        settings = get_settings("rate_limits", {"enabled": True, "default": DEFAULT_RATE_LIMIT})
+        if not settings.get("enabled", True):
+            return None
+        limits = dict(DEFAULT_RATE_LIMIT)
+        limits.update(settings.get("default") or {})
+        limits.update(settings.get(provider) or {})
+        _limiters[provider] = ProviderRateLimiter(
+            provider, limits["requests_per_minute"], limits["tokens_per_minute"]
+        )
+    return _limiters[provider]
+
+
+def rate_limiter_stats() -> Dict[str, Any]:
+    return {provider: limiter.stats() for provider, limiter in _limiters.items()}
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from logger import logger
+
+
+class RequestCoalescer:
+    """
+    Deduplicates identical concurrent requests.
+
+    A request whose key matches one still running attaches to the running
+    task and receives the same result; results of requests that just
+    finished are served from a short TTL cache. The underlying task is only
+    cancelled when every caller waiting on it has gone away.
+
+    Progress of the running task is fanned out to the listener of every
+    attached caller (from the moment it attaches) through fanout().
+    """
+
+    def __init__(self, result_ttl_seconds: float = 15.0, max_cached_results: int = 64):
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_cached_results = max_cached_results
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self._listeners: Dict[str, List[Callable[[str], Awaitable[None]]]] = {}
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters = {"executed": 0, "coalesced": 0, "cache_hits": 0}
+
+    @staticmethod
+    def normalize(request: str) -> str:
+        return re.sub(r"\s+", " ", request).strip().lower()
+
+    @classmethod
+    def make_key(cls, request: str, version: Optional[str] = "") -> str:
+        payload = f"{cls.normalize(request)}\x00{version or ''}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        for expired in [k for k, (_, expires) in self._results.items() if expires <= now]:
+            del self._results[expired]
+        entry = self._results.get(key)
+        return entry[0] if entry else None
+
+    def _store(self, key: str, result: Any) -> None:
+        self._results[key] = (result, time.monotonic() + self.result_ttl_seconds)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_cached_results:
+            self._results.popitem(last=False)
+
+    def fanout(self, inflight_key: str) -> Callable[[str], Awaitable[None]]:
+        """Progress callback for the task of `inflight_key` that reports to every attached listener."""
+
+        async def report(message: str) -> None:
+            for listener in list(self._listeners.get(inflight_key, ())):
+                try:
+                    await listener(message)
+                except Exception as e:
+                    logger.warning(f"RequestCoalescer: progress listener failed: {e}")
+
+        return report
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        *,
+        inflight_key: Optional[str] = None,
+        listener: Optional[Callable[[str], Awaitable[None]]] = None,
+        post_key: Optional[Callable[[], str]] = None,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Returns the result for `key`, running `factory()` only if no identical
+        request is running or was just answered.
+
+        `inflight_key` (default: `key`) identifies the running task. It can
+        leave out state the run itself changes (e.g. the manifest version),
+        so that a duplicate arriving mid-run still attaches; `key` is only
+        used for the result cache. `listener` receives the task's progress
+        while this caller waits.
+
+        `post_key` is evaluated after the run to also cache the result under
+        the key the same request would have *after* its own side effects
+        (e.g. the manifest version it produced), so an immediate replay hits.
+        """
+        cached = self._cached(key)
+        if cached is not None:
+            self._counters["cache_hits"] += 1
+            logger.info("RequestCoalescer: served result from TTL cache.")
+            return cached
+
+        inflight_key = inflight_key or key
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            self._counters["executed"] += 1
+            task = asyncio.create_task(factory())
+            self._inflight[inflight_key] = task
+            self._waiters[inflight_key] = 0
+
+            def _on_done(done: asyncio.Task, key: str = key, inflight_key: str = inflight_key) -> None:
+                self._inflight.pop(inflight_key, None)
+                self._waiters.pop(inflight_key, None)
+                self._listeners.pop(inflight_key, None)
+                if done.cancelled() or done.exception() is not None:
+                    return
+                result = done.result()
+                if cacheable is not None and not cacheable(result):
+                    return
+                self._store(key, result)
+                if post_key is not None:
+                    try:
+                        self._store(post_key(), result)
+                    except Exception as e:
+                        logger.error(f"RequestCoalescer: post_key failed: {e}")
+
+            task.add_done_callback(_on_done)
+        else:
+            self._counters["coalesced"] += 1
+            logger.info("RequestCoalescer: attached to identical in-flight request.")
+
+        self._waiters[inflight_key] = self._waiters.get(inflight_key, 0) + 1
+        if listener is not None:
+            self._listeners.setdefault(inflight_key, []).append(listener)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done():
+                self._waiters[inflight_key] = self._waiters.get(inflight_key, 1) - 1
+                if self._waiters[inflight_key] <= 0:
+                    task.cancel()
+            raise
+        finally:
+            if listener is not None and listener in self._listeners.get(inflight_key, ()):
+                self._listeners[inflight_key].remove(listener)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "cached_results": len(self._results),
+            "result_ttl_seconds": self.result_ttl_seconds,
+            **self._counters,
+        }
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from core.budget import UsageMeter
+from core.settings import get_settings
+
+DEFAULT_DEADLINE_SETTINGS = {
+    # Bir isteğin tüm graph çalışması için duvar saati sınırı (0 = sınırsız)
+    "request_timeout_seconds": 300,
+    # Bu kadar süre kaldığında ReAct döngüleri yeni adım başlatmaz, final_response'a geçer
+    "finalize_reserve_seconds": 20,
+}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs past its deadline; carries the node it was in."""
+
+    def __init__(
+        self,
+        node: Optional[str],
+        elapsed: float,
+        timeout: Optional[float],
+        usage: Optional[dict] = None,
+    ):
+        self.node = node or "unknown"
+        self.elapsed = elapsed
+        self.timeout = timeout
+        self.usage = usage
+        super().__init__(f"Request timed out at node '{self.node}' after {elapsed:.1f}s")
+
+
+class RequestContext:
+    """
+    Per-request state visible to every node, tool and LLM call of a run.
+    It lives in a ContextVar, so it follows the run into LangGraph's node
+    tasks, tool executor threads and the task manager sub-graph without
+    being threaded through state.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        timeout_seconds: Optional[float] = None,
+        usage: Optional[UsageMeter] = None,
+    ):
+        self.run_id = run_id
+        self.usage = usage or UsageMeter()
+        self.timeout = timeout_seconds or None
+        self.started = time.monotonic()
+        self.deadline = self.started + self.timeout if self.timeout else None
+        self.current_node: Optional[str] = None
+
+    @classmethod
+    def from_settings(
+        cls, run_id: str, timeout_seconds: Optional[float] = None, **budget_overrides
+    ) -> "RequestContext":
+        """Deadline from `deadlines`, budgets from `budgets`; explicit arguments win."""
+        if timeout_seconds is None:
+            timeout_seconds = get_settings("deadlines", DEFAULT_DEADLINE_SETTINGS)["request_timeout_seconds"]
+        return cls(run_id, timeout_seconds, UsageMeter.from_settings(**budget_overrides))
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def exceeded(self, node: Optional[str] = None) -> DeadlineExceeded:
+        return DeadlineExceeded(
+            node or self.current_node, self.elapsed, self.timeout, self.usage.snapshot()
+        )
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request() -> Optional[RequestContext]:
+    return _current.get()
+
+
+@contextmanager
+def request_scope(context: RequestContext) -> Iterator[RequestContext]:
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def current_usage() -> Optional[dict]:
+    """Usage snapshot of the current request, for nodes to store in AgentState."""
+    context = current_request()
+    return context.usage.snapshot() if context is not None else None
+
+
+def check_deadline(node: Optional[str] = None) -> None:
+    """Raises DeadlineExceeded if the current request is past its deadline."""
+    context = current_request()
+    if context is not None and context.expired():
+        raise context.exceeded(node)
+
+
+def should_wrap_up() -> bool:
+    """True when too little time is left to start another ReAct step."""
+    context = current_request()
+    if context is None or context.deadline is None:
+        return False
+    reserve = get_settings("deadlines", DEFAULT_DEADLINE_SETTINGS)["finalize_reserve_seconds"]
+    return context.remaining() <= reserve
+
+
+async def run_with_deadline(awaitable):
+    """
+    Awaits `awaitable`, cancelling it when the current request's deadline
+    passes; the cancellation reaches in-flight LLM calls and sub-graphs.
+    """
+    context = current_request()
+    if context is None or context.deadline is None:
+        return await awaitable
+    try:
+        # asyncio.timeout() 3.11+; wait_for 3.10'da da çalışır
+        return await asyncio.wait_for(awaitable, context.remaining())
+    except asyncio.TimeoutError:
+        if context.expired():
+            raise context.exceeded() from None
+        raise
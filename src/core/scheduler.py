@@ -0,0 +1,111 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from logger import logger
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a run cannot even be queued because the queue is at capacity."""
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class RunScheduler:
+    """
+    Admission control for graph runs.
+
+    At most `max_concurrent_runs` runs execute at once; the rest wait in a
+    priority queue (lower value = served first, FIFO within a priority).
+    Once `max_queue_size` runs are waiting, new runs are rejected instead of
+    piling up behind a provider that is already rate limiting us.
+    """
+
+    def __init__(self, max_concurrent_runs: int = 4, max_queue_size: int = 64, wait_window: int = 256):
+        self.max_concurrent_runs = max(1, max_concurrent_runs)
+        self.max_queue_size = max_queue_size
+
+        self._running = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wait_times: Deque[float] = deque(maxlen=wait_window)
+        self._counters = {"admitted": 0, "rejected": 0, "completed": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, fut in self._queue if not fut.done())
+
+    def _dispatch(self) -> None:
+        while self._queue and self._running < self.max_concurrent_runs:
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.done():  # iptal edilmiş bekleyen
+                continue
+            self._running += 1
+            waiter.set_result(None)
+
+    async def acquire(self, priority: int = 0) -> float:
+        """Waits for a run slot and returns the time spent queued (seconds)."""
+        queued_at = time.monotonic()
+
+        if self._running < self.max_concurrent_runs and not self.queue_depth:
+            self._running += 1
+        else:
+            if self.queue_depth >= self.max_queue_size:
+                self._counters["rejected"] += 1
+                raise QueueFullError(
+                    f"Server busy: {self._running} runs active and {self.queue_depth} queued."
+                )
+            waiter = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Slot verilmişti ama çağıran vazgeçti: slotu geri ver
+                    self.release()
+                raise
+
+        waited = time.monotonic() - queued_at
+        self._wait_times.append(waited)
+        self._counters["admitted"] += 1
+        if waited > 1.0:
+            logger.info(f"Scheduler: run admitted after {waited:.2f}s in queue.")
+        return waited
+
+    def release(self) -> None:
+        self._running = max(0, self._running - 1)
+        self._counters["completed"] += 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = list(self._wait_times)
+        return {
+            "running": self._running,
+            "queue_depth": self.queue_depth,
+            "max_concurrent_runs": self.max_concurrent_runs,
+            "max_queue_size": self.max_queue_size,
+            "wait_seconds": {
+                "p50": round(percentile(waits, 50), 4),
+                "p95": round(percentile(waits, 95), 4),
+                "max": round(max(waits), 4) if waits else 0.0,
+            },
+            **self._counters,
+        }
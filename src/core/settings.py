@@ -0,0 +1,46 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+from logger import logger
+
+# src/core/settings.py -> parents[1] is src/
+CONFIG_PATH: Path = Path(__file__).resolve().parents[1] / "agents" / "config.yaml"
+
+_cache: Dict[str, Any] = {"mtime": None, "config": {}}
+
+
+def load_config(config_path: Optional[Path] = None) -> dict:
+    """
+    Loads agents/config.yaml, re-reading it only when the file changes.
+
+    Nodes call this on every iteration, so the parsed YAML is cached by mtime
+    instead of being parsed again for each LLM call.
+    """
+    path = Path(config_path) if config_path else CONFIG_PATH
+    if not path.exists():
+        return {}
+
+    if config_path is not None:
+        with open(path, "r", encoding="utf-8") as file:
+            return yaml.safe_load(file) or {}
+
+    mtime = path.stat().st_mtime_ns
+    if _cache["mtime"] != mtime:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                _cache["config"] = yaml.safe_load(file) or {}
+            _cache["mtime"] = mtime
+        except yaml.YAMLError as e:
+            logger.error(f"Error parsing config.yaml: {e}")
+            return _cache["config"]
+
+    return _cache["config"]
+
+
+def get_settings(section: str, defaults: Optional[Dict[str, Any]] = None) -> dict:
+    """Returns a top-level config section merged over the given defaults."""
+    merged = dict(defaults or {})
+    merged.update(load_config().get(section, {}) or {})
+    return merged
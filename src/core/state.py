@@ -44,6 +44,8 @@ class AgentState(TypedDict):
 
     # Kalıcı hafıza artık çok daha detaylı
     manifest: ProjectManifest
+    # setup sonrası manifest; final response bu çalıştırmadaki değişiklikleri buna göre özetler
+    initial_manifest: Optional[ProjectManifest]
 
     # RAG'den gelen bağlam
     relevant_context: Optional[str]
@@ -62,5 +64,13 @@ class AgentState(TypedDict):
     system_info: dict  # OS, Shell, etc.
     file_structure: str  # Tree view
 
+    # Final response policy: "auto" | "reuse" | "template" | "llm" (None = config)
+    finalization_policy: Optional[str]
+    # Kullanılan policy, sebebi ve atlanan LLM çağrısıyla kazanılan tahmini süre
+    finalization: Optional[dict]
+
     # Hata yönetimi
     error: Optional[str]
+
+    # İstek bütçesi: LLM çağrısı, token ve tahmini maliyet (core.budget.UsageMeter.snapshot)
+    usage: Optional[dict]
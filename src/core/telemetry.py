@@ -0,0 +1,324 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from core.request_context import current_request
+from core.settings import get_settings
+from logger import logger
+
+DEFAULT_TELEMETRY_SETTINGS = {
+    "enabled": True,
+    # Her span bir JSON satırı olarak eklenir ("" = dosyaya yazma); göreli yollar proje köküne göre
+    "trace_file": ".ai_traces.jsonl",
+    # Dosya bu boyutu geçince <trace_file>.1 olarak döndürülür
+    "max_trace_file_mb": 20,
+    # p50/p95 hesabı için stage başına tutulan son süre sayısı
+    "quantile_window": 1024,
+    "buckets_seconds": [0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120],
+}
+
+# Span türleri: graph node'u, LLM çağrısı, tool çalıştırma, manifest okuma/yazma
+SPAN_KINDS = ("node", "llm", "tool", "manifest_io")
+METRIC_PREFIX = "promptarchitect"
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class StageStats:
+    """Histogram buckets, totals and a sliding window of durations for one (kind, name)."""
+
+    def __init__(self, buckets: List[float], window: int):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, duration: float, error: bool) -> None:
+        self.count += 1
+        self.total += duration
+        self.errors += int(error)
+        self.recent.append(duration)
+        for i, bound in enumerate(self.buckets):
+            if duration <= bound:
+                self.bucket_counts[i] += 1
+
+    def summary(self) -> dict:
+        recent = list(self.recent)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "p50_ms": round(_percentile(recent, 50) * 1000, 3) if recent else None,
+            "p95_ms": round(_percentile(recent, 95) * 1000, 3) if recent else None,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+        }
+
+
+class Telemetry:
+    """
+    Span recorder for architect runs. Every span (graph node, LLM call, tool
+    execution, manifest I/O) is appended to a JSONL trace file and folded
+    into per-stage histograms, exported as a Prometheus text snapshot.
+    """
+
+    def __init__(
+        self,
+        trace_path: Optional[str] = None,
+        buckets: Optional[List[float]] = None,
+        window: int = 1024,
+        max_trace_bytes: int = 0,
+    ):
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.buckets = sorted(buckets or DEFAULT_TELEMETRY_SETTINGS["buckets_seconds"])
+        self.window = window
+        self.max_trace_bytes = max_trace_bytes
+        self.stages: Dict[Tuple[str, str], StageStats] = {}
+        # (model, "prompt"|"completion") -> token sayısı
+        self.tokens: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "Telemetry":
+        settings = get_settings("telemetry", DEFAULT_TELEMETRY_SETTINGS)
+        trace_path = settings["trace_file"] or None
+        if trace_path and not os.path.isabs(trace_path):
+            trace_path = str(Path(__file__).resolve().parents[2] / trace_path)
+        return cls(
+            trace_path=trace_path,
+            buckets=settings["buckets_seconds"],
+            window=settings["quantile_window"],
+            max_trace_bytes=int(settings["max_trace_file_mb"] * 1024 * 1024),
+        )
+
+    @classmethod
+    def from_jsonl(cls, path: str, **kwargs) -> "Telemetry":
+        """Rebuilds the aggregates from a trace file (e.g. for the CLI report)."""
+        telemetry = cls(**kwargs)
+        for candidate in (Path(f"{path}.1"), Path(path)):
+            if not candidate.exists():
+                continue
+            with open(candidate, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        telemetry._aggregate(json.loads(line))
+                    except (json.JSONDecodeError, KeyError):
+                        continue
+        return telemetry
+
+    def record(
+        self,
+        kind: str,
+        name: str,
+        duration: float,
+        status: str = "ok",
+        started: Optional[float] = None,
+        **attrs: Any,
+    ) -> dict:
+        request = current_request()
+        span = {
+            "span_id": uuid.uuid4().hex[:16],
+            "ts": round(started if started is not None else time.time() - duration, 6),
+            "kind": kind,
+            "name": name,
+            "duration_ms": round(duration * 1000, 3),
+            "status": status,
+            "run_id": request.run_id if request is not None else None,
+            "node": request.current_node if request is not None else None,
+        }
+        span.update({k: v for k, v in attrs.items() if v is not None})
+        self._aggregate(span)
+        self._write(span)
+        return span
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attrs: Any) -> Iterator[dict]:
+        """Times the block; the yielded dict can be filled with extra attributes (tokens, model...)."""
+        started_wall = time.time()
+        started = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs.setdefault("error", type(e).__name__)
+            self.record(kind, name, time.perf_counter() - started, "error", started_wall, **attrs)
+            raise
+        self.record(kind, name, time.perf_counter() - started, "ok", started_wall, **attrs)
+
+    def _aggregate(self, span: dict) -> None:
+        key = (span["kind"], span["name"])
+        with self._lock:
+            stats = self.stages.get(key)
+            if stats is None:
+                stats = self.stages[key] = StageStats(self.buckets, self.window)
+            stats.add(span["duration_ms"] / 1000, span.get("status") != "ok")
+            model = span.get("model") or "unknown"
+            for field, label in (("prompt_tokens", "prompt"), ("completion_tokens", "completion")):
+                if span.get(field):
+                    self.tokens[(model, label)] = self.tokens.get((model, label), 0) + span[field]
+
+    def _write(self, span: dict) -> None:
+        if self.trace_path is None:
+            return
+        line = json.dumps(span, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            try:
+                if (
+                    self.max_trace_bytes
+                    and self.trace_path.exists()
+                    and self.trace_path.stat().st_size >= self.max_trace_bytes
+                ):
+                    os.replace(self.trace_path, f"{self.trace_path}.1")
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                # İz yazılamaması isteği bozmamalı
+                logger.error(f"Telemetry: could not write trace: {e}")
+
+    def summary(self) -> Dict[str, dict]:
+        """{"node/decide_agent": {"count", "errors", "p50_ms", "p95_ms", "avg_ms"}, ...}"""
+        with self._lock:
+            return {f"{kind}/{name}": stats.summary() for (kind, name), stats in sorted(self.stages.items())}
+
+    def prometheus_text(self) -> str:
+        """Prometheus text exposition format (0.0.4) snapshot of all stages and token counters."""
+        metric = f"{METRIC_PREFIX}_span_duration_seconds"
+        lines = [
+            f"# HELP {metric} Duration of architect run spans (graph nodes, LLM calls, tools, manifest I/O).",
+            f"# TYPE {metric} histogram",
+        ]
+        quantiles, errors = [], []
+        with self._lock:
+            for (kind, name), stats in sorted(self.stages.items()):
+                labels = f'kind="{kind}",name="{_escape(name)}"'
+                for bound, count in zip(stats.buckets, stats.bucket_counts):
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f"{metric}_sum{{{labels}}} {stats.total:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {stats.count}")
+                recent = list(stats.recent)
+                for q in (50, 95):
+                    value = _percentile(recent, q)
+                    if value is not None:
+                        quantiles.append(f'{METRIC_PREFIX}_span_latency_seconds{{{labels},quantile="{q / 100:g}"}} {value:.6f}')
+                errors.append(f"{METRIC_PREFIX}_span_errors_total{{{labels}}} {stats.errors}")
+            tokens = [
+                f'{METRIC_PREFIX}_llm_tokens_total{{model="{_escape(model)}",type="{label}"}} {count}'
+                for (model, label), count in sorted(self.tokens.items())
+            ]
+
+        lines += [
+            f"# HELP {METRIC_PREFIX}_span_latency_seconds p50/p95 span duration over the recent window.",
+            f"# TYPE {METRIC_PREFIX}_span_latency_seconds summary",
+            *quantiles,
+            f"# HELP {METRIC_PREFIX}_span_errors_total Spans that ended with an error.",
+            f"# TYPE {METRIC_PREFIX}_span_errors_total counter",
+            *errors,
+            f"# HELP {METRIC_PREFIX}_llm_tokens_total LLM tokens by model and type (prompt/completion).",
+            f"# TYPE {METRIC_PREFIX}_llm_tokens_total counter",
+            *tokens,
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _NullTelemetry(Telemetry):
+    """telemetry.enabled: false — spans are timed by nobody and recorded nowhere."""
+
+    def record(self, kind, name, duration, status="ok", started=None, **attrs) -> dict:
+        return {}
+
+
+_telemetry: Optional[Telemetry] = None
+
+
+def get_telemetry() -> Telemetry:
+    global _telemetry
+    if _telemetry is None:
+        settings = get_settings("telemetry", DEFAULT_TELEMETRY_SETTINGS)
+        _telemetry = Telemetry.from_settings() if settings["enabled"] else _NullTelemetry()
+    return _telemetry
+
+
+def span(kind: str, name: str, **attrs: Any):
+    """Context manager recording one span on the process-wide telemetry."""
+    return get_telemetry().span(kind, name, **attrs)
+
+
+def telemetry_summary() -> Dict[str, dict]:
+    return get_telemetry().summary()
+
+
+def prometheus_snapshot() -> str:
+    return get_telemetry().prometheus_text()
+
+
+def format_summary(summary: Dict[str, dict]) -> str:
+    """Plain-text p50/p95 table per stage."""
+    if not summary:
+        return "No spans recorded."
+    width = max(len(stage) for stage in summary)
+    lines = [f"{'stage'.ljust(width)}  {'count':>7}  {'errors':>6}  {'p50 ms':>10}  {'p95 ms':>10}"]
+    for stage, stats in summary.items():
+        p50 = "-" if stats["p50_ms"] is None else f"{stats['p50_ms']:.1f}"
+        p95 = "-" if stats["p95_ms"] is None else f"{stats['p95_ms']:.1f}"
+        lines.append(f"{stage.ljust(width)}  {stats['count']:>7}  {stats['errors']:>6}  {p50:>10}  {p95:>10}")
+    return "\n".join(lines)
+
+
+class ToolSpanHandler(BaseCallbackHandler):
+    """Records a span per tool execution, including tools run inside the task manager sub-graph."""
+
+    run_inline = True
+
+    def __init__(self, telemetry: Optional[Telemetry] = None):
+        self.telemetry = telemetry
+        self._started: Dict[Any, Tuple[str, float, float]] = {}
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._started[run_id] = (name, time.perf_counter(), time.time())
+
+    def _finish(self, run_id, status: str, **attrs) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        name, perf_start, wall_start = started
+        telemetry = self.telemetry or get_telemetry()
+        telemetry.record("tool", name, time.perf_counter() - perf_start, status, wall_start, **attrs)
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._finish(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._finish(run_id, "error", error=type(error).__name__)
+
+
+def with_tool_spans(config: Optional[dict]) -> dict:
+    """Graph config with the tool span callback added to any existing callbacks."""
+    config = dict(config or {})
+    callbacks = config.get("callbacks")
+    if callbacks is None:
+        config["callbacks"] = [ToolSpanHandler()]
+    elif isinstance(callbacks, list):
+        config["callbacks"] = callbacks + [ToolSpanHandler()]
+    else:
+        # CallbackManager verilmişse üzerine ekle
+        callbacks.add_handler(ToolSpanHandler(), inherit=True)
+    return config
@@ -0,0 +1,89 @@
+import fnmatch
+import os
+import stat as stat_module
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# ContextScanner ile aynı varsayılanlar + türetilmiş indeks dizinleri
+DEFAULT_IGNORED_DIRS = {
+    ".git",
+    "__pycache__",
+    "node_modules",
+    ".pytest_cache",
+    ".mypy_cache",
+    ".ruff_cache",
+    "venv",
+    "env",
+    ".venv",
+    ".idea",
+    ".vscode",
+    "dist",
+    "build",
+    "coverage",
+    ".ai_index",
+}
+DEFAULT_IGNORED_FILES = {
+    ".DS_Store",
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+}
+
+
+class IgnoreRules:
+    """
+    Default ignore lists plus the patterns of the root .gitignore (the common
+    subset: globs, trailing "/" for directories, "/" anchoring; negations
+    are not supported and skipped).
+    """
+
+    def __init__(self, root: str, extra_patterns: Optional[List[str]] = None):
+        self.root = Path(root)
+        self.patterns: List[Tuple[str, bool, bool]] = []
+        lines = list(extra_patterns or [])
+        gitignore = self.root / ".gitignore"
+        if gitignore.is_file():
+            lines += gitignore.read_text(encoding="utf-8", errors="ignore").splitlines()
+        for line in lines:
+            pattern = line.strip()
+            if not pattern or pattern.startswith(("#", "!")):
+                continue
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            self.patterns.append((pattern.lstrip("/"), dir_only, anchored))
+
+    def ignored(self, relative: str, is_dir: bool) -> bool:
+        name = relative.rsplit("/", 1)[-1]
+        if is_dir and name in DEFAULT_IGNORED_DIRS:
+            return True
+        if not is_dir and (name in DEFAULT_IGNORED_FILES or name.endswith((".pyc", ".pyo"))):
+            return True
+        for pattern, dir_only, anchored in self.patterns:
+            if dir_only and not is_dir:
+                continue
+            if fnmatch.fnmatchcase(relative if anchored else name, pattern):
+                return True
+        return False
+
+
+def iter_workspace_files(
+    root: str, rules: Optional[IgnoreRules] = None
+) -> Iterator[Tuple[str, os.stat_result]]:
+    """Yields (posix relative path, stat) of every non-ignored regular file under root (symlinks skipped)."""
+    rules = rules or IgnoreRules(root)
+    for directory, dirs, files in os.walk(root):
+        base = os.path.relpath(directory, root).replace(os.sep, "/")
+        prefix = "" if base == "." else f"{base}/"
+        dirs[:] = sorted(d for d in dirs if not rules.ignored(prefix + d, is_dir=True))
+        for name in sorted(files):
+            relative = prefix + name
+            if rules.ignored(relative, is_dir=False):
+                continue
+            try:
+                # Sembolik linkler izlenmez: kök dışındaki dosyalar indekse sızmasın
+                stat = os.lstat(os.path.join(directory, name))
+            except OSError:
+                continue
+            if stat_module.S_ISREG(stat.st_mode):
+                yield relative, stat
@@ -0,0 +1,414 @@
+import fnmatch
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.file_cache import FileSlice, is_binary
+from core.settings import get_settings
+from core.workspace import IgnoreRules, iter_workspace_files
+from logger import logger
+
+DEFAULT_CODE_SEARCH_SETTINGS = {
+    # Çalışma alanı köküne göre; .gitignore'a eklenmeli
+    "index_dir": ".ai_index",
+    "max_file_bytes": 1048576,
+    # search_code bu süreden eski bir indeksi aramadan önce mtime'a göre günceller
+    "refresh_seconds": 30,
+    "max_results": 50,
+    "context_lines": 2,
+}
+
+INDEX_VERSION = 1
+FILES_NAME = "code_files.json"
+TABLE_NAME = "code_trigrams.bin"
+POSTINGS_NAME = "code_postings.bin"
+
+# Regex metakarakterleri: bunlarla literal parça biter
+_REGEX_META = set(".^$*+?{}[]()|\\")
+_ESCAPED_LITERALS = set(".^$*+?{}[]()|\\/-#&~ \"'")
+
+
+def trigrams(data: bytes) -> Set[int]:
+    """Case-folded byte trigrams of `data`; windows spanning a line break are skipped."""
+    data = data.lower()
+    windows = {data[i : i + 3] for i in range(len(data) - 2)}
+    return {int.from_bytes(w, "big") for w in windows if b"\n" not in w}
+
+
+def _skip_group(pattern: str, i: int) -> int:
+    """Index just past the group or character class opening at `i`."""
+    opening = pattern[i]
+    closing = ")" if opening == "(" else "]"
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == opening and (opening == "(" or depth == 0):
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Literal runs (3+ chars) every match of `pattern` must contain. Conservative:
+    alternations yield nothing, groups, classes and optional characters end a
+    run; with no runs the caller scans every file instead of using the index.
+    """
+    if "|" in pattern:
+        return []
+    runs: List[str] = []
+    current = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and pattern[i + 1 : i + 2] in _ESCAPED_LITERALS:
+            literal, i = pattern[i + 1], i + 2
+        elif char == "\\":
+            # \w, \d, \b gibi sınıflar
+            runs.append(current)
+            current, i = "", i + 2
+            continue
+        elif char in "([":
+            runs.append(current)
+            current, i = "", _skip_group(pattern, i)
+            continue
+        elif char in _REGEX_META:
+            runs.append(current)
+            current, i = "", i + 1
+            continue
+        else:
+            literal, i = char, i + 1
+        if i < len(pattern) and pattern[i] in "?*{":
+            # Opsiyonel karakter: parça burada biter
+            runs.append(current)
+            current = ""
+            continue
+        current += literal
+    runs.append(current)
+    return [run for run in runs if len(run) >= 3]
+
+
+@dataclass
+class CodeMatch:
+    path: str
+    line_number: int
+    line: str
+    before: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)
+
+
+class TrigramIndex:
+    """
+    Trigram inverted index over a workspace, persisted under `index_dir`:
+
+    - code_files.json: file table [path, mtime_ns, size, indexed] (ID = position)
+    - code_trigrams.bin: sorted uint32 triples (trigram, postings offset, count)
+    - code_postings.bin: uint32 file IDs, sorted per trigram
+
+    Both binary files are mmap'ed and binary-searched in place, so a loaded
+    index costs no parsing. update() re-reads only files whose mtime or size
+    changed; postings of unchanged files are carried over from disk.
+    Candidates are verified against the actual file content, so results are
+    exact even when the index is slightly stale.
+    """
+
+    def __init__(self, root: str, settings: Optional[dict] = None):
+        self.settings = settings or get_settings("code_search", DEFAULT_CODE_SEARCH_SETTINGS)
+        self.root = os.path.realpath(root)
+        index_dir = Path(self.settings["index_dir"])
+        self.index_dir = index_dir if index_dir.is_absolute() else Path(self.root) / index_dir
+        self.files: List[List[Any]] = []
+        self.loaded = False
+        self.last_refresh = 0.0
+        self._lock = threading.RLock()
+        self._handles: list = []
+        self._maps: List[mmap.mmap] = []
+        self._table: Any = memoryview(array("I"))
+        self._postings: Any = memoryview(array("I"))
+
+    # --- persistence -------------------------------------------------------
+
+    def load(self) -> bool:
+        """Opens the on-disk index; False when missing or written by an incompatible version."""
+        import json
+
+        with self._lock:
+            meta_path = self.index_dir / FILES_NAME
+            if not meta_path.exists():
+                return False
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return False
+            if meta.get("version") != INDEX_VERSION or meta.get("byteorder") != sys.byteorder:
+                return False
+            self._close_maps()
+            self._table = self._map(self.index_dir / TABLE_NAME)
+            self._postings = self._map(self.index_dir / POSTINGS_NAME)
+            if len(self._table) != 3 * meta["trigrams"] or len(self._postings) != meta["postings"]:
+                # Yarım kalmış bir yazım: yeniden kurulacak
+                self._close_maps()
+                return False
+            self.files = meta["files"]
+            self.loaded = True
+            return True
+
+    def _map(self, path: Path):
+        if not path.exists() or path.stat().st_size == 0:
+            return memoryview(array("I"))
+        handle = open(path, "rb")
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._handles.append(handle)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast("I")
+
+    def _close_maps(self) -> None:
+        # mmap kapatılmadan önce üzerindeki memoryview'lar bırakılmalı
+        for view in (self._table, self._postings):
+            view.release()
+        self._table = memoryview(array("I"))
+        self._postings = memoryview(array("I"))
+        for mapped in self._maps:
+            mapped.close()
+        for handle in self._handles:
+            handle.close()
+        self._maps, self._handles = [], []
+
+    def _write(self, files: List[List[Any]], inverted: Dict[int, List[int]]) -> None:
+        from memory.json_store import write_json_atomic
+
+        table, postings = array("I"), array("I")
+        for key in sorted(inverted):
+            ids = sorted(set(inverted[key]))
+            table.extend((key, len(postings), len(ids)))
+            postings.extend(ids)
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._close_maps()
+        for name, data in ((TABLE_NAME, table), (POSTINGS_NAME, postings)):
+            tmp = self.index_dir / f".{name}.tmp"
+            with open(tmp, "wb") as f:
+                data.tofile(f)
+            os.replace(tmp, self.index_dir / name)
+        # Meta en son yazılır; boyutları ikili dosyalarla tutmazsa load() indeksi reddeder
+        write_json_atomic(
+            self.index_dir / FILES_NAME,
+            {
+                "version": INDEX_VERSION,
+                "byteorder": sys.byteorder,
+                "root": self.root,
+                "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "trigrams": len(table) // 3,
+                "postings": len(postings),
+                "files": files,
+            },
+        )
+
+    # --- building ----------------------------------------------------------
+
+    def update(self) -> Dict[str, Any]:
+        """Brings the index in line with the workspace, reading only new or modified files."""
+        with self._lock:
+            started = time.perf_counter()
+            if not self.loaded:
+                self.load()
+
+            rules = IgnoreRules(self.root, extra_patterns=[f"/{self.index_dir.name}/"])
+            current = {
+                path: (stat.st_mtime_ns, stat.st_size)
+                for path, stat in iter_workspace_files(self.root, rules)
+                if stat.st_size <= self.settings["max_file_bytes"]
+            }
+            previous = {entry[0]: (entry[1], entry[2]) for entry in self.files}
+            unchanged = {path for path, signature in previous.items() if current.get(path) == signature}
+            changed = sorted(set(current) - unchanged)
+            removed = len(set(previous) - set(current))
+
+            if self.loaded and not changed and not removed:
+                self.last_refresh = time.time()
+                return {"files": len(self.files), "updated": 0, "removed": 0, "seconds": 0.0}
+
+            new_paths = sorted(current)
+            new_ids = {path: i for i, path in enumerate(new_paths)}
+            remap = {
+                old_id: new_ids[entry[0]] for old_id, entry in enumerate(self.files) if entry[0] in unchanged
+            }
+            indexed = {entry[0]: entry[3] for entry in self.files if entry[0] in unchanged}
+
+            inverted: Dict[int, List[int]] = defaultdict(list)
+            table, postings = self._table, self._postings
+            for row in range(len(table) // 3):
+                key, offset, count = table[3 * row], table[3 * row + 1], table[3 * row + 2]
+                for old_id in postings[offset : offset + count]:
+                    new_id = remap.get(old_id)
+                    if new_id is not None:
+                        inverted[key].append(new_id)
+
+            for path in changed:
+                try:
+                    with open(os.path.join(self.root, path), "rb") as f:
+                        data = f.read()
+                except OSError:
+                    indexed[path] = 0
+                    continue
+                if is_binary(data[:8192]):
+                    indexed[path] = 0
+                    continue
+                indexed[path] = 1
+                file_id = new_ids[path]
+                for key in trigrams(data):
+                    inverted[key].append(file_id)
+
+            files = [[path, *current[path], indexed.get(path, 0)] for path in new_paths]
+            self._write(files, inverted)
+            self.files = []
+            self.loaded = False
+            self.load()
+            self.last_refresh = time.time()
+            seconds = time.perf_counter() - started
+            logger.info(
+                f"Code index: {len(files)} files ({len(changed)} updated, {removed} removed) in {seconds:.2f}s."
+            )
+            return {"files": len(files), "updated": len(changed), "removed": removed, "seconds": round(seconds, 3)}
+
+    def ensure_fresh(self) -> None:
+        """Loads the persisted index, then refreshes it when older than refresh_seconds."""
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            if not self.loaded or time.time() - self.last_refresh > self.settings["refresh_seconds"]:
+                self.update()
+
+    # --- querying ----------------------------------------------------------
+
+    def _posting(self, key: int) -> Iterable[int]:
+        table = self._table
+        lo, hi = 0, len(table) // 3
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = table[3 * mid]
+            if value < key:
+                lo = mid + 1
+            elif value > key:
+                hi = mid
+            else:
+                offset, count = table[3 * mid + 1], table[3 * mid + 2]
+                return self._postings[offset : offset + count]
+        return ()
+
+    def candidates(self, literals: List[str]) -> List[int]:
+        """File IDs that contain every trigram of every literal (all indexed files if none)."""
+        keys: Set[int] = set()
+        for literal in literals:
+            keys |= trigrams(literal.encode("utf-8"))
+        if not keys:
+            return [i for i, entry in enumerate(self.files) if entry[3]]
+        # En kısa posting listesinden başla
+        postings = sorted((self._posting(key) for key in keys), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(posting)
+        return sorted(result)
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        path_glob: Optional[str] = None,
+        max_results: Optional[int] = None,
+        context_lines: Optional[int] = None,
+    ) -> Tuple[List[CodeMatch], Dict[str, Any]]:
+        """Matching lines with context, plus stats (candidates, files scanned, truncated)."""
+        max_results = max_results or self.settings["max_results"]
+        context = self.settings["context_lines"] if context_lines is None else context_lines
+        flags = 0 if case_sensitive else re.IGNORECASE
+        matcher = re.compile(query if regex else re.escape(query), flags)
+        literals = required_literals(query) if regex else [query]
+        if not case_sensitive:
+            # Trigramlar yalnızca ASCII'de büyük/küçük harf katlanır; diğer harfler filtreye girmez
+            literals = [run for literal in literals for run in re.split(r"[^\x00-\x7f]+", literal)]
+
+        with self._lock:
+            candidate_ids = self.candidates(literals)
+            paths = [self.files[i][0] for i in candidate_ids]
+        if path_glob:
+            paths = [p for p in paths if fnmatch.fnmatch(p, path_glob)]
+
+        matches: List[CodeMatch] = []
+        truncated = False
+        for path in paths:
+            try:
+                with FileSlice(os.path.join(self.root, path)) as data:
+                    text = bytes(data.read(0, data.size)).decode("utf-8", errors="replace")
+            except OSError:
+                continue
+            if not matcher.search(text):
+                continue
+            # splitlines() form feed vb. karakterlerde de böler; satır numaraları read_file ile aynı kalsın
+            lines = [line.rstrip("\r") for line in text.split("\n")]
+            if text.endswith("\n"):
+                lines.pop()
+            for number, line in enumerate(lines, start=1):
+                if not matcher.search(line):
+                    continue
+                if len(matches) >= max_results:
+                    truncated = True
+                    break
+                matches.append(
+                    CodeMatch(
+                        path=path,
+                        line_number=number,
+                        line=line,
+                        before=lines[max(0, number - 1 - context) : number - 1],
+                        after=lines[number : number + context],
+                    )
+                )
+            if truncated:
+                break
+        return matches, {"candidates": len(candidate_ids), "files_scanned": len(paths), "truncated": truncated}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "root": self.root,
+                "files": len(self.files),
+                "indexed_files": sum(1 for entry in self.files if entry[3]),
+                "trigrams": len(self._table) // 3,
+                "postings": len(self._postings),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_maps()
+            self.loaded = False
+
+
+_indexes: Dict[str, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(root: str) -> TrigramIndex:
+    """Process-wide index per workspace root, shared by every request."""
+    key = os.path.realpath(root)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = TrigramIndex(key)
+        return _indexes[key]
@@ -0,0 +1,325 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.history_compactor import get_token_counter
+from core.settings import get_settings
+from logger import logger
+
+DEFAULT_CONTEXT_SETTINGS = {
+    "enabled": True,
+    # relevant_context için kesin üst sınır (seçilen tüm parçalar toplamı)
+    "token_budget": 1500,
+    # Her kaynaktan (dosya, sembol, görev, rapor) alınan en fazla aday
+    "candidates_per_source": 12,
+    "max_snippet_tokens": 300,
+    # Bu benzerliğin altındaki adaylar hiç değerlendirilmez
+    "min_relevance": 0.08,
+    "weights": {"relevance": 1.0, "recency": 0.2, "task_linkage": 0.3},
+    "recency_half_life_days": 14,
+    # (istek hash'i, çalışma alanı sürümü) -> bağlam LRU'su
+    "cache_entries": 64,
+}
+
+OPEN_STATUSES = ("todo", "in_progress")
+
+
+@dataclass
+class Candidate:
+    source: str  # file | symbol | task | report
+    title: str
+    text: str
+    relevance: float
+    recency: float = 0.0
+    linkage: float = 0.0
+    score: float = 0.0
+    path: Optional[str] = None
+    start_line: int = 0
+    end_line: int = 0
+
+
+def _recency(timestamp: float, half_life_days: float) -> float:
+    age_days = max(0.0, time.time() - timestamp) / 86400
+    return 0.5 ** (age_days / half_life_days)
+
+
+class ContextManager:
+    """
+    Builds `relevant_context` for a request: candidates from the vector store
+    (file chunks, tasks, past reports) and from the symbol outlines of the
+    matching files are scored by relevance, recency and linkage to open
+    tasks, then packed best-first under a strict token budget. Results are
+    cached per (request hash, workspace version); the version covers file
+    mtimes/sizes, tasks and stored reports, so any change rebuilds.
+    """
+
+    def __init__(self, root: str, settings: Optional[dict] = None, store=None, symbols=None):
+        from memory.symbol_index import get_symbol_index
+        from memory.vector_store import get_vector_store
+
+        self.settings = settings or get_settings("context_manager", DEFAULT_CONTEXT_SETTINGS)
+        self.root = os.path.realpath(root)
+        self.store = store if store is not None else get_vector_store(self.root)
+        self.symbols = symbols if symbols is not None else get_symbol_index(self.root)
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[str, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Eşzamanlı istekler depoyu aynı anda senkronlamasın
+        self._build_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # --- entry points ------------------------------------------------------
+
+    def build(self, request: str, tasks: List[dict]) -> Tuple[str, Dict[str, Any]]:
+        """(context text, stats) for `request`; empty text when nothing relevant fits."""
+        from memory.vector_store import sync_files, sync_tasks, workspace_files
+
+        started = time.perf_counter()
+        files = workspace_files(self.root, self.store.settings["max_file_bytes"])
+        key = (hashlib.sha1(request.strip().encode("utf-8")).hexdigest(), self.workspace_version(files, tasks))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[0], {**cached[1], "cached": True}
+            self.misses += 1
+
+        with self._build_lock:
+            # Vektör deposu yalnızca değişen dosyalar/görevler için yeniden gömülür
+            synced = sync_files(self.store, self.root, current=files)
+            task_sync = sync_tasks(self.store, tasks)
+            if synced["chunks_added"] or synced["chunks_removed"] or task_sync["updated"] or task_sync["removed"]:
+                self.store.save()
+
+            candidates = self.gather(request, tasks, files)
+        text, included, used = self.pack(candidates)
+        stats = {
+            "cached": False,
+            "candidates": len(candidates),
+            "included": included,
+            "tokens": used,
+            "budget": self.settings["token_budget"],
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        with self._lock:
+            self._cache[key] = (text, stats)
+            while len(self._cache) > self.settings["cache_entries"]:
+                self._cache.popitem(last=False)
+        return text, stats
+
+    def record_report(self, run_id: str, request: str, report: str) -> None:
+        """Stores a finished report so later requests can use it as context."""
+        from memory.vector_store import add_report
+
+        if not report.strip():
+            return
+        with self._build_lock:
+            add_report(self.store, run_id, request, report)
+            self.store.save()
+
+    def workspace_version(self, files: Dict[str, Tuple[int, int]], tasks: List[dict]) -> str:
+        digest = hashlib.sha1()
+        for path in sorted(files):
+            digest.update(f"{path}\0{files[path][0]}\0{files[path][1]}\n".encode("utf-8"))
+        for task in tasks:
+            digest.update(repr(sorted(task.items())).encode("utf-8"))
+        digest.update(str(len(list(self.store.items(kind="report")))).encode("utf-8"))
+        return digest.hexdigest()
+
+    # --- candidates --------------------------------------------------------
+
+    def gather(self, request: str, tasks: List[dict], files: Dict[str, Tuple[int, int]]) -> List[Candidate]:
+        limit = self.settings["candidates_per_source"]
+        floor = self.settings["min_relevance"]
+        half_life = self.settings["recency_half_life_days"]
+        open_tasks_text = " ".join(
+            f"{t.get('title') or ''} {t.get('description') or ''}".lower()
+            for t in tasks
+            if t.get("status") in OPEN_STATUSES
+        )
+
+        def file_linkage(path: str) -> float:
+            stem = os.path.splitext(os.path.basename(path))[0].lower()
+            return 1.0 if path.lower() in open_tasks_text or (len(stem) >= 4 and stem in open_tasks_text) else 0.0
+
+        candidates: List[Candidate] = []
+        contents: Dict[str, List[str]] = {}
+        for hit in self.store.search(request, k=limit, kind="file"):
+            if hit.score < floor:
+                continue
+            meta = hit.metadata
+            path = meta["path"]
+            if path not in contents:
+                try:
+                    with open(os.path.join(self.root, path), "r", encoding="utf-8", errors="replace") as f:
+                        contents[path] = f.read().splitlines()
+                except OSError:
+                    continue
+            mtime_ns = files.get(path, (0, 0))[0]
+            candidates.append(
+                Candidate(
+                    source="file",
+                    title=f"{path} (lines {meta['start_line']}-{meta['end_line']})",
+                    text="\n".join(contents[path][meta["start_line"] - 1 : meta["end_line"]]),
+                    relevance=hit.score,
+                    recency=_recency(mtime_ns / 1e9, half_life),
+                    linkage=file_linkage(path),
+                    path=path,
+                    start_line=meta["start_line"],
+                    end_line=meta["end_line"],
+                )
+            )
+
+        candidates += self._symbol_candidates(request, [c for c in candidates if c.source == "file"], limit, floor)
+
+        task_by_id = {t.get("id"): t for t in tasks}
+        for hit in self.store.search(request, k=limit, kind="task"):
+            task = task_by_id.get(hit.metadata.get("task_id"))
+            if task is None or hit.score < floor:
+                continue
+            status = task.get("status") or "todo"
+            details = "\n".join(str(task[k]) for k in ("description", "outcome") if task.get(k))
+            candidates.append(
+                Candidate(
+                    source="task",
+                    title=f"Task {task['id']} [{status}] {task.get('title') or ''}".strip(),
+                    text=details,
+                    relevance=hit.score,
+                    recency=1.0 if status == "in_progress" else 0.0,
+                    linkage=1.0 if status in OPEN_STATUSES else 0.3,
+                )
+            )
+
+        for hit in self.store.search(request, k=limit, kind="report"):
+            if hit.score < floor:
+                continue
+            meta = hit.metadata
+            candidates.append(
+                Candidate(
+                    source="report",
+                    title=f"Past report for: {meta.get('request', '')[:80]}",
+                    text=meta.get("text", ""),
+                    relevance=hit.score,
+                    recency=_recency(meta.get("created_at", 0), half_life),
+                )
+            )
+
+        weights = self.settings["weights"]
+        for candidate in candidates:
+            candidate.score = (
+                weights["relevance"] * candidate.relevance
+                + weights["recency"] * candidate.recency
+                + weights["task_linkage"] * candidate.linkage
+            )
+        return sorted(candidates, key=lambda c: -c.score)
+
+    def _symbol_candidates(
+        self, request: str, file_candidates: List[Candidate], limit: int, floor: float
+    ) -> List[Candidate]:
+        """Signatures of the matching files' symbols, ranked with the same embedder."""
+        rows: List[Tuple[Candidate, str, Any]] = []
+        for file in file_candidates:
+            if not self.symbols.supports(file.path) or any(r[0].path == file.path for r in rows):
+                continue
+            symbols, _ = self.symbols.outline(file.path)
+            for symbol in symbols:
+                for item in [symbol] + symbol.children:
+                    if item.kind != "constant":
+                        rows.append((file, f"{item.signature}  # L{item.line}-{item.end_line}", item))
+        self.symbols.save()
+        if not rows:
+            return []
+
+        embedder = self.store.embedder
+        query = embedder.embed([request])[0]
+        scores = embedder.embed([f"{r[2].name} {r[2].signature} {r[2].doc}" for r in rows]) @ query
+        ranked = sorted(zip(scores, rows), key=lambda pair: -pair[0])[:limit]
+        return [
+            Candidate(
+                source="symbol",
+                title=f"{file.path}:{item.line} {item.name}",
+                text=line + (f" — {item.doc}" if item.doc else ""),
+                relevance=float(score),
+                recency=file.recency,
+                linkage=file.linkage,
+                path=file.path,
+                start_line=item.line,
+                end_line=item.end_line,
+            )
+            for score, (file, line, item) in ranked
+            if score >= floor
+        ]
+
+    # --- packing -----------------------------------------------------------
+
+    def pack(self, candidates: List[Candidate]) -> Tuple[str, int, int]:
+        """Best-first greedy packing under token_budget; returns (text, included, tokens)."""
+        counter = get_token_counter()
+        budget = self.settings["token_budget"]
+        max_snippet = self.settings["max_snippet_tokens"]
+        used = 0
+        taken: List[Tuple[Candidate, str, int]] = []
+
+        def overlaps(a: Candidate, b: Candidate) -> bool:
+            return a.path == b.path and a.start_line <= b.end_line and b.start_line <= a.end_line
+
+        for candidate in candidates:
+            # Alınmış bir dosya parçasıyla çakışan parçalar (örtüşen chunk, içindeki sembol) atlanır
+            if candidate.path and any(t.source == "file" and overlaps(t, candidate) for t, _, _ in taken):
+                continue
+            text = candidate.text
+            tokens = counter.count_text(text)
+            if tokens > max_snippet:
+                text = text[: int(len(text) * max_snippet / tokens)]
+                text = text[: text.rfind("\n") + 1] or text
+                text += "[...]\n"
+            section = f"--- {candidate.source}: {candidate.title} ---\n{text.rstrip()}\n"
+            tokens = counter.count_text(section)
+            # Dosya parçası, daha önce alınmış kendi içindeki sembollerin yerini alır
+            replaced = [
+                t for t in taken if candidate.source == "file" and t[0].source == "symbol" and overlaps(t[0], candidate)
+            ]
+            freed = sum(t[2] for t in replaced)
+            if used - freed + tokens > budget:
+                continue
+            taken = [t for t in taken if t not in replaced] + [(candidate, section, tokens)]
+            used += tokens - freed
+        return "".join(t[1] for t in taken), len(taken), used
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_managers: Dict[str, ContextManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_context_manager(root: str) -> ContextManager:
+    key = os.path.realpath(root)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ContextManager(key)
+        return _managers[key]
+
+
+def build_relevant_context(root: str, request: str, tasks: List[dict]) -> str:
+    """relevant_context for setup_node; errors degrade to no context instead of failing the run."""
+    try:
+        text, stats = get_context_manager(root).build(request, tasks)
+        logger.info(f"Relevant context: {stats}")
+        return text
+    except Exception as e:
+        logger.warning(f"Relevant context skipped: {e}")
+        return ""
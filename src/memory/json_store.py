@@ -1,9 +1,39 @@
 import json
 import os
 import shutil
+import tempfile
+import threading
 from pathlib import Path
+
+from core.telemetry import span
 from logger import logger
 
+# Manifest'i oku-değiştir-yaz yapan araçlar bu kilidi tutar (araçlar executor thread'lerinde çalışır)
+manifest_lock = threading.RLock()
+
+
+def write_json_atomic(path, data) -> None:
+    """
+    Writes JSON to a temp file in the same directory and renames it over
+    `path`, so a crash, timeout or cancellation never leaves a half-written
+    manifest: readers see either the old or the new file.
+    """
+    path = Path(path)
+    with span("manifest_io", "write", path=path.name):
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
 
 class JSONStore:    
     def __init__(
@@ -48,12 +78,21 @@ class JSONStore:
             else:
                 self.save(self.load_default_template())
 
+    def version(self) -> str:
+        """Cheap manifest version token (mtime + size); changes whenever the file is rewritten."""
+        try:
+            stat = os.stat(self.filename)
+            return f"{stat.st_mtime_ns}:{stat.st_size}"
+        except FileNotFoundError:
+            return "missing"
+
     def load(self) -> dict:
         try:
             if not os.path.exists(self.filename):
                 return self.load_default_template()
-            with open(self.filename, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with span("manifest_io", "read", path=Path(self.filename).name):
+                with open(self.filename, "r", encoding="utf-8") as f:
+                    return json.load(f)
         except (json.JSONDecodeError, FileNotFoundError) as e:
             # Dosya bozuksa veya okunamazsa varsayılanı dön
             logger.error(f"Error loading manifest: {str(e)}")
@@ -61,8 +100,7 @@ class JSONStore:
 
     def save(self, data: dict):
         try:
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            write_json_atomic(self.filename, data)
             logger.info(f"Manifest saved successfully to {self.filename}")
         except Exception as e:
             logger.error(f"Error saving manifest: {str(e)}")
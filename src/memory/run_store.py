@@ -0,0 +1,221 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from logger import logger
+
+
+def task_manager_thread_prefix(run_id: str) -> str:
+    """Prefix of the checkpoint threads of a run's task manager calls (one thread per call)."""
+    return f"task_manager:{run_id}:"
+
+
+class RunStore:
+    """
+    Registry of architect runs, kept next to the checkpoints in the same
+    SQLite file. A run maps a run ID to its checkpointer thread so that an
+    interrupted run can be resumed from its last completed node; the run's
+    budget limits are stored with it so a resume keeps them.
+
+    With the in-memory checkpointer backend the registry is process-local
+    too (an in-memory SQLite database) and no file is created.
+
+    Status: running -> completed | failed | interrupted
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self._memory_conn: Optional[sqlite3.Connection] = None
+        if db_path is None:
+            from core.checkpointer import DEFAULT_CHECKPOINTER_SETTINGS, checkpoint_db_path
+            from core.settings import get_settings
+
+            if get_settings("checkpointer", DEFAULT_CHECKPOINTER_SETTINGS)["backend"] == "sqlite":
+                db_path = str(checkpoint_db_path())
+            else:
+                db_path = ":memory:"
+        if db_path == ":memory:":
+            self.db_path = db_path
+            # Tek bağlantı: her bağlantı kendi boş in-memory veritabanını açardı
+            self._memory_conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._memory_conn.row_factory = sqlite3.Row
+        else:
+            self.db_path = str(Path(db_path).resolve())
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._ensure_schema()
+
+    @contextmanager
+    def _connection(self):
+        """Serialized connection that commits on success and is always closed."""
+        with self._lock:
+            if self._memory_conn is not None:
+                with self._memory_conn:
+                    yield self._memory_conn
+                return
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def _ensure_schema(self):
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS architect_runs (
+                    run_id TEXT PRIMARY KEY,
+                    thread_id TEXT NOT NULL,
+                    source TEXT,
+                    request TEXT,
+                    status TEXT NOT NULL,
+                    last_node TEXT,
+                    error TEXT,
+                    budgets TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            columns = {r[1] for r in conn.execute("PRAGMA table_info(architect_runs)")}
+            if "budgets" not in columns:
+                # budgets kolonu öncesinde oluşturulmuş veritabanları
+                conn.execute("ALTER TABLE architect_runs ADD COLUMN budgets TEXT")
+
+    @staticmethod
+    def new_run_id() -> str:
+        return uuid.uuid4().hex
+
+    def start(
+        self,
+        run_id: str,
+        thread_id: str,
+        request: str,
+        source: str = "mcp",
+        budgets: Optional[Dict[str, Any]] = None,
+    ):
+        """Registers a run; `budgets` are its effective limits (UsageMeter.budgets())."""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO architect_runs "
+                "(run_id, thread_id, source, request, status, last_node, error, budgets, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'running', NULL, NULL, ?, ?, ?)",
+                (run_id, thread_id, source, request, json.dumps(budgets) if budgets else None, now, now),
+            )
+
+    def update_node(self, run_id: str, node: str):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE architect_runs SET last_node = ?, updated_at = ? WHERE run_id = ?",
+                (node, time.time(), run_id),
+            )
+
+    def finish(self, run_id: str, status: str, error: Optional[str] = None):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE architect_runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                (status, error, time.time(), run_id),
+            )
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM architect_runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        return self._decode(row) if row else None
+
+    def list_runs(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM architect_runs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        with self._connection() as conn:
+            rows = conn.execute(query, params + (limit,)).fetchall()
+        return [self._decode(r) for r in rows]
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        run = dict(row)
+        run["budgets"] = json.loads(run["budgets"]) if run["budgets"] else None
+        return run
+
+    def mark_interrupted(self) -> int:
+        """Marks runs left 'running' by a previous (dead) process as interrupted."""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE architect_runs SET status = 'interrupted', updated_at = ? WHERE status = 'running'",
+                (time.time(),),
+            )
+        if cursor.rowcount:
+            logger.info(f"RunStore: {cursor.rowcount} run(s) marked as interrupted.")
+        return cursor.rowcount
+
+    def cleanup(self, retention_days: float) -> Dict[str, int]:
+        """
+        Deletes runs older than `retention_days` together with their
+        checkpoints and pending writes (including the task manager threads
+        of each run), then reclaims the freed pages.
+        """
+        cutoff = time.time() - retention_days * 86400
+        deleted = {"runs": 0, "checkpoints": 0, "writes": 0}
+
+        with self._connection() as conn:
+            tables = {
+                r[0]
+                for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            expired = conn.execute(
+                "SELECT run_id, thread_id FROM architect_runs WHERE updated_at < ? AND status != 'running'",
+                (cutoff,),
+            ).fetchall()
+            threads = list(dict.fromkeys(r["thread_id"] for r in expired))
+            # Aynı thread'i kullanan daha yeni run'lar varsa (session scope) checkpoint'lere dokunma
+            active_threads = {
+                r[0]
+                for r in conn.execute(
+                    "SELECT DISTINCT thread_id FROM architect_runs "
+                    "WHERE updated_at >= ? OR status = 'running'",
+                    (cutoff,),
+                )
+            }
+            for thread_id in threads:
+                if thread_id in active_threads:
+                    continue
+                for table in ("checkpoints", "writes"):
+                    if table in tables:
+                        cursor = conn.execute(
+                            f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+                        )
+                        deleted[table] += cursor.rowcount
+
+            # Task manager alt thread'leri architect_runs'a yazılmaz; run kimliği önekiyle silinir
+            for row in expired:
+                pattern = re.sub(r"([\\%_])", r"\\\1", task_manager_thread_prefix(row["run_id"])) + "%"
+                for table in ("checkpoints", "writes"):
+                    if table in tables:
+                        cursor = conn.execute(
+                            f"DELETE FROM {table} WHERE thread_id LIKE ? ESCAPE '\\'", (pattern,)
+                        )
+                        deleted[table] += cursor.rowcount
+
+            cursor = conn.execute(
+                "DELETE FROM architect_runs WHERE updated_at < ? AND status != 'running'",
+                (cutoff,),
+            )
+            deleted["runs"] = cursor.rowcount
+
+        if any(deleted.values()):
+            with self._connection() as conn:
+                conn.execute("VACUUM")
+            logger.info(f"RunStore cleanup: {deleted}")
+        return deleted
@@ -0,0 +1,237 @@
+import ast
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.settings import get_settings
+from core.workspace import IgnoreRules, iter_workspace_files
+from logger import logger
+
+DEFAULT_SYMBOL_INDEX_SETTINGS = {
+    # Çalışma alanı köküne göre; dosya başına (mtime, size) ile geçersiz kılınır
+    "cache_file": ".ai_index/symbols.json",
+    "max_file_bytes": 1048576,
+    # setup_node sistem prompt'una üst seviye sembol özeti ekler (varsayılan kapalı)
+    "include_in_setup": False,
+    "setup_max_symbols": 150,
+    # _private isimler outline'da gösterilmez
+    "include_private": False,
+    # outline aracının tek çağrıda özetleyeceği en fazla dosya
+    "max_files": 50,
+}
+
+CACHE_VERSION = 1
+
+
+@dataclass
+class Symbol:
+    name: str
+    kind: str
+    signature: str
+    line: int
+    end_line: int
+    doc: str = ""
+    children: List["Symbol"] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Symbol":
+        children = [cls.from_dict(child) for child in data.get("children", [])]
+        return cls(**{**data, "children": children})
+
+
+Outliner = Callable[[str], List[Symbol]]
+
+# Uzantı -> outliner; yeni diller register_outliner ile eklenir
+OUTLINERS: Dict[str, Outliner] = {}
+
+
+def register_outliner(extensions: List[str], outliner: Outliner) -> None:
+    for extension in extensions:
+        OUTLINERS[extension.lower()] = outliner
+
+
+def _first_doc_line(node) -> str:
+    doc = ast.get_docstring(node)
+    return doc.strip().splitlines()[0] if doc and doc.strip() else ""
+
+
+def _python_symbol(node: ast.AST, in_class: bool) -> Optional[Symbol]:
+    end_line = getattr(node, "end_lineno", None) or node.lineno
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        signature = f"{prefix} {node.name}({ast.unparse(node.args)})"
+        if node.returns is not None:
+            signature += f" -> {ast.unparse(node.returns)}"
+        decorators = {ast.unparse(d) for d in node.decorator_list}
+        kind = "method" if in_class else "function"
+        for decorator in ("property", "staticmethod", "classmethod"):
+            if decorator in decorators:
+                kind = decorator
+                break
+        return Symbol(node.name, kind, signature, node.lineno, end_line, _first_doc_line(node))
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+        signature = f"class {node.name}" + (f"({', '.join(bases)})" if bases else "")
+        symbol = Symbol(node.name, "class", signature, node.lineno, end_line, _first_doc_line(node))
+        for child in node.body:
+            child_symbol = _python_symbol(child, in_class=True)
+            if child_symbol is not None:
+                symbol.children.append(child_symbol)
+        return symbol
+    if isinstance(node, (ast.Assign, ast.AnnAssign)) and not in_class:
+        # Modül seviyesi sabitler (DEFAULT_..._SETTINGS gibi)
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        names = [t.id for t in targets if isinstance(t, ast.Name) and t.id.isupper()]
+        if names:
+            return Symbol(names[0], "constant", names[0], node.lineno, end_line)
+    return None
+
+
+def outline_python(source: str) -> List[Symbol]:
+    tree = ast.parse(source)
+    symbols = [_python_symbol(node, in_class=False) for node in tree.body]
+    return [symbol for symbol in symbols if symbol is not None]
+
+
+register_outliner([".py", ".pyi"], outline_python)
+
+
+def format_outline(path: str, symbols: List[Symbol], include_private: bool = False, depth: int = 2) -> str:
+    """Indented outline: one line per symbol with its line range and first doc line."""
+    lines = [path]
+
+    def visit(items: List[Symbol], level: int) -> None:
+        for symbol in items:
+            if not include_private and symbol.name.startswith("_") and symbol.name != "__init__":
+                continue
+            location = f"L{symbol.line}" if symbol.end_line == symbol.line else f"L{symbol.line}-{symbol.end_line}"
+            doc = f" — {symbol.doc}" if symbol.doc else ""
+            lines.append(f"{'  ' * level}{symbol.signature}  # {location}{doc}")
+            if level < depth:
+                visit(symbol.children, level + 1)
+
+    visit(symbols, 1)
+    return "\n".join(lines)
+
+
+class SymbolIndex:
+    """
+    Per-file symbol outlines (classes, functions, signatures, first docstring
+    lines) for the languages in OUTLINERS. Entries are keyed by relative path
+    and invalidated by (mtime_ns, size); the cache is persisted as JSON so
+    later runs only re-parse files that changed.
+    """
+
+    def __init__(self, root: str, settings: Optional[dict] = None):
+        self.settings = settings or get_settings("symbol_index", DEFAULT_SYMBOL_INDEX_SETTINGS)
+        self.root = os.path.realpath(root)
+        cache_file = Path(self.settings["cache_file"])
+        self.cache_path = cache_file if cache_file.is_absolute() else Path(self.root) / cache_file
+        self._entries: Dict[str, dict] = {}
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.parsed = 0
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION:
+            self._entries = data.get("files", {})
+
+    def save(self) -> None:
+        from memory.json_store import write_json_atomic
+
+        with self._lock:
+            if not self._dirty:
+                return
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.cache_path, {"version": CACHE_VERSION, "files": self._entries})
+            self._dirty = False
+
+    @staticmethod
+    def supports(path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in OUTLINERS
+
+    def outline(self, relative_path: str) -> Tuple[List[Symbol], Optional[str]]:
+        """(symbols, error) for one file; re-parsed only when its mtime or size changed."""
+        relative_path = relative_path.replace(os.sep, "/")
+        full_path = os.path.join(self.root, relative_path)
+        outliner = OUTLINERS.get(os.path.splitext(relative_path)[1].lower())
+        if outliner is None:
+            return [], "no outliner for this file type"
+        stat = os.stat(full_path)
+        if stat.st_size > self.settings["max_file_bytes"]:
+            return [], f"file too large to outline ({stat.st_size} bytes)"
+
+        with self._lock:
+            self._load()
+            entry = self._entries.get(relative_path)
+            if entry is None or (entry["mtime_ns"], entry["size"]) != (stat.st_mtime_ns, stat.st_size):
+                error = None
+                symbols: List[Symbol] = []
+                try:
+                    with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+                        symbols = outliner(f.read())
+                except SyntaxError as e:
+                    error = f"syntax error at line {e.lineno}: {e.msg}"
+                except Exception as e:
+                    logger.warning(f"Outline failed for {relative_path}: {e}")
+                    error = str(e)
+                entry = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "symbols": [asdict(s) for s in symbols],
+                    "error": error,
+                }
+                self._entries[relative_path] = entry
+                self._dirty = True
+                self.parsed += 1
+            return [Symbol.from_dict(s) for s in entry["symbols"]], entry["error"]
+
+    def workspace_files(self) -> List[str]:
+        return [path for path, _ in iter_workspace_files(self.root, IgnoreRules(self.root)) if self.supports(path)]
+
+    def top_level_summary(self, max_symbols: Optional[int] = None) -> str:
+        """Top-level classes and functions of the workspace (no methods, no docs), capped at max_symbols."""
+        max_symbols = max_symbols or self.settings["setup_max_symbols"]
+        lines: List[str] = []
+        shown = 0
+        files = self.workspace_files()
+        for index, path in enumerate(files):
+            symbols, _ = self.outline(path)
+            names = [
+                s.signature.split("(")[0] if s.kind == "class" else s.name + "()"
+                for s in symbols
+                if s.kind in ("class", "function") and not s.name.startswith("_")
+            ]
+            if not names:
+                continue
+            if shown + len(names) > max_symbols:
+                lines.append(f"... ({len(files) - index} more files; use the outline tool)")
+                break
+            lines.append(f"{path}: {', '.join(names)}")
+            shown += len(names)
+        self.save()
+        return "\n".join(lines)
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: str) -> SymbolIndex:
+    """Process-wide symbol index per workspace root."""
+    key = os.path.realpath(root)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = SymbolIndex(key)
+        return _indexes[key]
@@ -0,0 +1,430 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.settings import get_settings
+from core.workspace import IgnoreRules, iter_workspace_files
+from logger import logger
+
+DEFAULT_VECTOR_STORE_SETTINGS = {
+    # Çalışma alanı köküne göre: vectors.f32 (memmap) + vectors.json (id/metadata)
+    "directory": ".ai_index/vectors",
+    # 100k x 192 float32 = 75 MB; sorgu süresi bu matrisin bir kez okunmasıyla sınırlı
+    "dim": 192,
+    "initial_capacity": 1024,
+    # Dosyalar satır pencerelerine bölünerek gömülür
+    "chunk_lines": 40,
+    "chunk_overlap": 5,
+    "max_file_bytes": 262144,
+    # Rapor metinleri bağlam için metadata'da saklanır (kırpılarak)
+    "report_max_chars": 4000,
+}
+
+STORE_VERSION = 1
+VECTORS_NAME = "vectors.f32"
+META_NAME = "vectors.json"
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+_CAMEL = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+class Embedder(ABC):
+    """
+    Text -> L2-normalised float32 vectors. Subclasses set `name` (stored with
+    the index; a different embedder or dim means the store is rebuilt) and
+    implement embed().
+    """
+
+    name: str = "embedder"
+    dim: int = 0
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix with unit-length rows (all zeros for empty text)."""
+
+
+@lru_cache(maxsize=262144)
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    # crc32 süreçler arası sabittir (hash() rastgele tohumlanır)
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, (1.0 if h & 0x80000000 else -1.0)
+
+
+class HashingEmbedder(Embedder):
+    """
+    Offline default: signed feature hashing of words, identifier sub-words
+    (camelCase / snake_case) and character trigrams, with log term frequency.
+    No model download or network; similar identifiers and wording land close.
+    """
+
+    def __init__(self, dim: int = 192):
+        self.dim = dim
+        self.name = f"hashing-v1-{dim}"
+
+    @staticmethod
+    def features(text: str) -> Counter:
+        counts: Counter = Counter()
+        for word in _WORD.findall(text):
+            lower = word.lower()
+            counts[lower] += 2
+            parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+            if len(parts) > 1:
+                counts.update(p for p in parts if len(p) > 1)
+            padded = f"#{lower}#"
+            counts.update(f"3:{padded[i : i + 3]}" for i in range(len(padded) - 2))
+        return counts
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self.features(text).items():
+                index, sign = _bucket(feature, self.dim)
+                vectors[row, index] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+@dataclass
+class VectorHit:
+    id: str
+    score: float
+    metadata: Dict[str, Any]
+
+
+class VectorStore:
+    """
+    Local embedding index: a (capacity x dim) float32 matrix in a memory-mapped
+    file plus a JSON table of ids and metadata (row i <-> ids[i]). Adds are
+    upserts; deleted rows are tombstoned and reused by later adds, so the
+    matrix never needs compaction. Queries are one matrix product over the
+    live rows followed by argpartition top-k.
+
+    Changes are written to the memmap immediately; call save() (or close())
+    to persist the id/metadata table.
+    """
+
+    def __init__(self, directory: str, embedder: Optional[Embedder] = None, settings: Optional[dict] = None):
+        self.settings = settings or get_settings("vector_store", DEFAULT_VECTOR_STORE_SETTINGS)
+        self.directory = Path(directory)
+        self.embedder = embedder or HashingEmbedder(self.settings["dim"])
+        self.dim = self.embedder.dim
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []
+        self._metadata: List[Optional[dict]] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._kinds: Dict[str, int] = {}
+        self._kind_of_row = np.zeros(0, dtype=np.int16)
+        self._alive = np.zeros(0, dtype=bool)
+        self._matrix: Optional[np.memmap] = None
+        self._load()
+
+    # --- persistence -------------------------------------------------------
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    def _open(self, capacity: int, create: bool) -> None:
+        path = self.directory / VECTORS_NAME
+        if create or not path.exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(path, "wb") as f:
+                f.truncate(capacity * self.dim * 4)
+        self._matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _load(self) -> None:
+        meta_path = self.directory / META_NAME
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = None
+        vectors = self.directory / VECTORS_NAME
+        if (
+            meta is None
+            or meta.get("version") != STORE_VERSION
+            or meta.get("embedder") != self.embedder.name
+            or not vectors.exists()
+            or vectors.stat().st_size < len(meta["ids"]) * self.dim * 4
+        ):
+            if meta is not None:
+                logger.warning(f"Vector store at {self.directory} is incompatible; starting empty.")
+            self._open(self.settings["initial_capacity"], create=True)
+            return
+
+        self._open(vectors.stat().st_size // (self.dim * 4), create=False)
+        self._ids = meta["ids"]
+        self._metadata = meta["metadata"]
+        self._rows = {item: row for row, item in enumerate(self._ids) if item is not None}
+        self._free = [row for row, item in enumerate(self._ids) if item is None]
+        self._alive = np.array([item is not None for item in self._ids], dtype=bool)
+        self._kind_of_row = np.array([self._kind_code(m) for m in self._metadata], dtype=np.int16)
+
+    def save(self) -> None:
+        from memory.json_store import write_json_atomic
+
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(
+                self.directory / META_NAME,
+                {
+                    "version": STORE_VERSION,
+                    "embedder": self.embedder.name,
+                    "dim": self.dim,
+                    "ids": self._ids,
+                    "metadata": self._metadata,
+                },
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self.save()
+            self._matrix = None
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(self.capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        self._matrix.flush()
+        self._matrix = None
+        with open(self.directory / VECTORS_NAME, "r+b") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._open(capacity, create=False)
+
+    # --- mutations ---------------------------------------------------------
+
+    def _kind_code(self, metadata: Optional[dict]) -> int:
+        if not metadata:
+            return 0
+        kind = metadata.get("kind", "")
+        return self._kinds.setdefault(kind, len(self._kinds) + 1)
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadatas: Optional[Sequence[dict]] = None) -> None:
+        """Embeds and stores texts; an existing id is overwritten in place."""
+        if not ids:
+            return
+        metadatas = metadatas or [{} for _ in ids]
+        # Aynı id bir batch'te iki kez gelirse sonuncusu geçerli
+        last = {item: i for i, item in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            ids, texts, metadatas = [ids[i] for i in keep], [texts[i] for i in keep], [metadatas[i] for i in keep]
+        vectors = self.embedder.embed(texts)
+        with self._lock:
+            rows = []
+            for item in ids:
+                row = self._rows.get(item)
+                if row is None:
+                    row = self._free.pop() if self._free else len(self._ids)
+                    if row == len(self._ids):
+                        self._ids.append(None)
+                        self._metadata.append(None)
+                rows.append(row)
+            if len(self._ids) > self.capacity:
+                self._grow(len(self._ids))
+            if len(self._alive) < len(self._ids):
+                extra = len(self._ids) - len(self._alive)
+                self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+                self._kind_of_row = np.concatenate([self._kind_of_row, np.zeros(extra, dtype=np.int16)])
+
+            index = np.array(rows)
+            self._matrix[index] = vectors
+            for row, item, metadata in zip(rows, ids, metadatas):
+                self._ids[row] = item
+                self._metadata[row] = dict(metadata)
+                self._rows[item] = row
+                self._alive[row] = True
+                self._kind_of_row[row] = self._kind_code(metadata)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Tombstones the given ids; their rows are reused by later adds."""
+        removed = 0
+        with self._lock:
+            for item in ids:
+                row = self._rows.pop(item, None)
+                if row is None:
+                    continue
+                self._ids[row] = None
+                self._metadata[row] = None
+                self._alive[row] = False
+                self._matrix[row] = 0.0
+                self._free.append(row)
+                removed += 1
+        return removed
+
+    # --- queries -----------------------------------------------------------
+
+    def search(self, text: str, k: int = 10, kind: Optional[str] = None) -> List[VectorHit]:
+        return self.search_batch([text], k, kind)[0]
+
+    def search_batch(self, texts: Sequence[str], k: int = 10, kind: Optional[str] = None) -> List[List[VectorHit]]:
+        """Top-k cosine hits per query; all queries share one matrix product."""
+        queries = self.embedder.embed(texts)
+        with self._lock:
+            count = len(self._ids)
+            if count == 0:
+                return [[] for _ in texts]
+            mask = self._alive[:count]
+            if kind is not None:
+                mask = mask & (self._kind_of_row[:count] == self._kinds.get(kind, -1))
+            valid = int(mask.sum())
+            if valid == 0:
+                return [[] for _ in texts]
+            # Matris tek geçişte okunur (bellek bant genişliği sınırlı); sonuç (queries x rows)
+            scores = np.ascontiguousarray((np.asarray(self._matrix[:count]) @ queries.T).T)
+            if valid < count:
+                scores[:, ~mask] = -np.inf
+            k = min(k, valid)
+
+            results = []
+            for row_scores in scores:
+                top = np.argpartition(row_scores, -k)[-k:]
+                top = top[np.argsort(-row_scores[top])]
+                results.append([VectorHit(self._ids[row], float(row_scores[row]), self._metadata[row]) for row in top])
+            return results
+
+    def items(self, kind: Optional[str] = None) -> Iterable[Tuple[str, dict]]:
+        with self._lock:
+            return [
+                (item, metadata)
+                for item, metadata in zip(self._ids, self._metadata)
+                if item is not None and (kind is None or metadata.get("kind") == kind)
+            ]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = Counter(m.get("kind", "") for m in self._metadata if m)
+            return {
+                "embedder": self.embedder.name,
+                "vectors": len(self._rows),
+                "capacity": self.capacity,
+                "free_rows": len(self._free),
+                "kinds": dict(kinds),
+            }
+
+
+# --- indexing helpers --------------------------------------------------------
+
+
+def chunk_lines(text: str, size: int, overlap: int) -> List[Tuple[int, int, str]]:
+    """(start_line, end_line, text) windows of `size` lines overlapping by `overlap`."""
+    lines = text.splitlines()
+    step = max(1, size - overlap)
+    chunks = []
+    for start in range(0, max(len(lines), 1), step):
+        window = lines[start : start + size]
+        if window and any(line.strip() for line in window):
+            chunks.append((start + 1, start + len(window), "\n".join(window)))
+        if start + size >= len(lines):
+            break
+    return chunks
+
+
+def workspace_files(root: str, max_file_bytes: int) -> Dict[str, Tuple[int, int]]:
+    """{relative path: (mtime_ns, size)} of the files sync_files would embed."""
+    return {
+        path: (stat.st_mtime_ns, stat.st_size)
+        for path, stat in iter_workspace_files(root, IgnoreRules(root, extra_patterns=["/.ai_index/"]))
+        if stat.st_size <= max_file_bytes
+    }
+
+
+def sync_files(
+    store: VectorStore, root: str, current: Optional[Dict[str, Tuple[int, int]]] = None
+) -> Dict[str, int]:
+    """Re-embeds chunks of new or modified text files under root and drops removed ones."""
+    from core.file_cache import is_binary
+
+    settings = store.settings
+    if current is None:
+        current = workspace_files(root, settings["max_file_bytes"])
+    indexed: Dict[str, Tuple[int, int]] = {}
+    chunk_ids: Dict[str, List[str]] = {}
+    for item, metadata in store.items(kind="file"):
+        indexed[metadata["path"]] = (metadata["mtime_ns"], metadata["size"])
+        chunk_ids.setdefault(metadata["path"], []).append(item)
+
+    stale = [path for path, signature in indexed.items() if current.get(path) != signature]
+    removed = store.delete(item for path in stale for item in chunk_ids[path])
+
+    added = 0
+    for path, (mtime_ns, size) in current.items():
+        if indexed.get(path) == (mtime_ns, size):
+            continue
+        try:
+            with open(os.path.join(root, path), "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        if is_binary(data[:8192]):
+            continue
+        chunks = chunk_lines(data.decode("utf-8", errors="replace"), settings["chunk_lines"], settings["chunk_overlap"])
+        store.add(
+            [f"file:{path}:{start}" for start, _, _ in chunks],
+            # Yol da gömülür: "auth" araması auth.py'yi de bulsun
+            [f"{path}\n{text}" for _, _, text in chunks],
+            [
+                {"kind": "file", "path": path, "start_line": start, "end_line": end, "mtime_ns": mtime_ns, "size": size}
+                for start, end, _ in chunks
+            ],
+        )
+        added += len(chunks)
+    return {"files": len(current), "chunks_added": added, "chunks_removed": removed}
+
+
+def sync_tasks(store: VectorStore, tasks: Sequence[dict]) -> Dict[str, int]:
+    """Mirrors manifest tasks into the store (re-embedding only changed ones)."""
+    existing = dict(store.items(kind="task"))
+    wanted = {}
+    for task in tasks:
+        text = "\n".join(str(task.get(key) or "") for key in ("title", "description", "outcome"))
+        digest = zlib.crc32(text.encode("utf-8"))
+        wanted[f"task:{task['id']}"] = (text, {"kind": "task", "task_id": task["id"], "status": task.get("status"), "digest": digest})
+
+    changed = [item for item, (_, metadata) in wanted.items() if existing.get(item, {}).get("digest") != metadata["digest"]]
+    store.add(changed, [wanted[item][0] for item in changed], [wanted[item][1] for item in changed])
+    removed = store.delete(item for item in existing if item not in wanted)
+    return {"tasks": len(wanted), "updated": len(changed), "removed": removed}
+
+
+def add_report(store: VectorStore, run_id: str, request: str, report: str) -> None:
+    """Stores a finished architect report; its (trimmed) text is kept for later context."""
+    limit = store.settings["report_max_chars"]
+    store.add(
+        [f"report:{run_id}"],
+        [f"{request}\n{report}"],
+        [{"kind": "report", "run_id": run_id, "request": request[:300], "text": report[:limit], "created_at": time.time()}],
+    )
+
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(root: str) -> VectorStore:
+    """Process-wide store per workspace root (directory from vector_store settings)."""
+    key = os.path.realpath(root)
+    with _stores_lock:
+        if key not in _stores:
+            settings = get_settings("vector_store", DEFAULT_VECTOR_STORE_SETTINGS)
+            directory = Path(settings["directory"])
+            _stores[key] = VectorStore(str(directory if directory.is_absolute() else Path(key) / directory), settings=settings)
+        return _stores[key]
@@ -1,8 +1,12 @@
 import asyncio
+import json
 import os
 import sys
-from mcp.server.fastmcp import FastMCP
-from langchain_core.messages import HumanMessage
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from mcp.server.fastmcp import Context, FastMCP
 
 from pathlib import Path
 import sys
@@ -11,39 +15,252 @@ import os
 # Proje kök dizinini path'e ekle (Modüllerin bulunması için)
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from agents.main_agent.agent_flow import create_main_agent
+from core.budget import UsageMeter, format_usage
+from core.checkpointer import DEFAULT_CHECKPOINTER_SETTINGS, checkpointer_stats, close_checkpointers
+from core.fast_path import try_fast_path
+from core.file_cache import file_cache_stats
+from core.finalization import POLICIES, finalization_stats, format_finalization
+from core.http_clients import http_client_stats
+from core.llm_factory import close_llms, hedging_stats
+from core.progress import ProgressCallback, astream_run
+from core.rate_limiter import rate_limiter_stats
+from core.request_coalescer import RequestCoalescer
+from core.request_context import DeadlineExceeded, RequestContext, request_scope
+from core.scheduler import QueueFullError, RunScheduler
+from core.settings import get_settings
+from core.telemetry import prometheus_snapshot, telemetry_summary
 from memory.json_store import JSONStore
+from memory.run_store import RunStore
+from logger import logger
+
+DEFAULT_SERVER_SETTINGS = {
+    # "request": her istek kendi thread'inde, "session": aynı MCP oturumu aynı thread'i paylaşır
+    "thread_scope": "request",
+    "recursion_limit": 100,
+    # Aynı anda gelen özdeş istekler tek bir graph çalışmasını paylaşır
+    "coalesce_requests": True,
+    "result_cache_ttl_seconds": 15,
+    "result_cache_size": 64,
+    # Admission control: aynı anda en fazla N graph çalışır, gerisi kuyrukta bekler
+    "max_concurrent_runs": 4,
+    "max_queue_size": 64,
+}
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Releases pooled provider connections and the checkpoint DB on shutdown."""
+    try:
+        yield {}
+    finally:
+        await close_llms()
+        await close_checkpointers()
+
 
 # MCP Sunucusunu Başlat
-mcp = FastMCP("PromptArchitect")
+mcp = FastMCP("PromptArchitect", lifespan=lifespan)
 
-@mcp.tool()
-async def architect_request(request: str) -> str:
-    """
-    Acts as the primary "Project Architect" and "Orchestration Engine" for this coding environment.
-    
-    CRITICAL: This tool MUST be the FIRST step for any coding task, feature request, or refactoring.
-    Do not attempt to write code or modify files until this tool has been executed.
+_run_store: Optional[RunStore] = None
+_coalescer: Optional[RequestCoalescer] = None
+_scheduler: Optional[RunScheduler] = None
 
-    This tool triggers the internal multi-agent system (LangGraph) to:
-    1. Analyze the user's high-level request against the current project context.
-    2. Decompose the request into specific, actionable tasks using the Task Manager.
-    3. Update the persistent project manifest (.ai_state.json) with new tasks, status, and architectural rules.
-    4. Generate a detailed "Architected Prompt" (implementation plan) for the Developer to follow.
 
-    Args:
-        request (str): The user's raw coding request, feature description, or bug report (e.g., "Add JWT auth", "Refactor the API").
+def get_manifest_path() -> Path:
+    return Path(__file__).resolve().parent.parent / ".ai_state.json"
 
-    Returns:
-        str: A summary of the architectural plan and confirmation that the project manifest (.ai_state.json) has been updated.
+
+def get_run_store() -> RunStore:
+    global _run_store
+    if _run_store is None:
+        _run_store = RunStore()
+    return _run_store
+
+
+def get_coalescer() -> RequestCoalescer:
+    global _coalescer
+    if _coalescer is None:
+        settings = get_settings("server", DEFAULT_SERVER_SETTINGS)
+        _coalescer = RequestCoalescer(
+            result_ttl_seconds=settings["result_cache_ttl_seconds"],
+            max_cached_results=settings["result_cache_size"],
+        )
+    return _coalescer
+
+
+def get_scheduler() -> RunScheduler:
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings("server", DEFAULT_SERVER_SETTINGS)
+        _scheduler = RunScheduler(
+            max_concurrent_runs=settings["max_concurrent_runs"],
+            max_queue_size=settings["max_queue_size"],
+        )
+    return _scheduler
+
+
+def make_thread_id(ctx: Optional[Context] = None, run_id: Optional[str] = None) -> str:
+    """Builds the checkpointer thread ID for a request according to `server.thread_scope`."""
+    settings = get_settings("server", DEFAULT_SERVER_SETTINGS)
+    if settings["thread_scope"] == "session" and ctx is not None:
+        try:
+            session_key = ctx.client_id or str(id(ctx.session))
+            return f"mcp_session_{session_key}"
+        except Exception:
+            pass
+    return f"mcp_request_{run_id or uuid.uuid4().hex}"
+
+
+async def execute_run(
+    app,
+    graph_input: Optional[dict],
+    config: dict,
+    run_id: str,
+    on_progress: Optional[ProgressCallback] = None,
+) -> dict:
     """
+    Runs (or, with graph_input=None, resumes) the graph for a registered run,
+    recording every completed node so the run can be resumed after a crash.
+    Node transitions are reported through `on_progress` while the run is going.
+    """
+    run_store = get_run_store()
     try:
+        await astream_run(
+            app,
+            graph_input,
+            config,
+            on_node=lambda node_name: run_store.update_node(run_id, node_name),
+            on_progress=on_progress,
+        )
+    except asyncio.CancelledError:
+        run_store.finish(run_id, "interrupted", "Cancelled by client.")
+        raise
+    except DeadlineExceeded as e:
+        run_store.finish(run_id, "timed_out", str(e))
+        raise
+    except Exception as e:
+        run_store.finish(run_id, "failed", str(e))
+        raise
+
+    run_store.finish(run_id, "completed")
+    snapshot = await app.aget_state(config)
+    return snapshot.values
+
+
+def progress_reporter(ctx: Optional[Context]) -> Optional[ProgressCallback]:
+    """MCP progress notifications (one step per node/tool transition) for the calling client."""
+    if ctx is None:
+        return None
+    step = 0
+
+    async def report(message: str) -> None:
+        nonlocal step
+        step += 1
+        await ctx.report_progress(step, None, message)
+
+    return report
+
+
+def format_timeout(error: DeadlineExceeded, run_id: str) -> str:
+    """Timeout result with a machine-readable line saying where the run stopped."""
+    details = {
+        "status": "timed_out",
+        "run_id": run_id,
+        "node": error.node,
+        "elapsed_seconds": round(error.elapsed, 1),
+        "timeout_seconds": error.timeout,
+        "usage": error.usage,
+    }
+    return (
+        f"❌ ARCHITECT TIMEOUT: The request timed out at node '{error.node}' "
+        f"after {error.elapsed:.1f}s.\n{json.dumps(details)}\n"
+        f"Completed steps were checkpointed. Retry with resume_architect_run(run_id=\"{run_id}\")."
+    )
+
+
+def format_report(final_state: dict, run_id: str) -> str:
+    last_message = final_state["messages"][-1]
+    return (
+        f"✅ ARCHITECTURE PLAN COMPLETE.\n\nArchitect Report:\n{last_message.content}\n\n"
+        f"System Note: The .ai_state.json manifest has been updated with new tasks. "
+        f"You may now proceed with implementation based on these tasks. (Run ID: {run_id})\n"
+        f"{format_usage(final_state.get('usage'))}\n"
+        f"{format_finalization(final_state.get('finalization'))}"
+    ).rstrip()
+
+
+def format_fast_path(messages: list) -> str:
+    failed = any(m.startswith("Error") for m in messages)
+    header = "❌ MANIFEST UPDATE FAILED" if failed else "✅ MANIFEST UPDATED"
+    lines = "\n".join(f"- {m}" for m in messages)
+    return f"{header} (fast path, no LLM calls).\n\n{lines}"
+
+
+@mcp.resource("metrics://memory")
+def memory_metrics() -> str:
+    """Checkpointer memory usage (threads, checkpoints, approx bytes, evictions) and the file content cache as JSON."""
+    return json.dumps({**checkpointer_stats(), "file_cache": file_cache_stats()}, indent=2)
+
+
+@mcp.resource("metrics://scheduler")
+def scheduler_metrics() -> str:
+    """Run queue depth, wait times and per-provider rate limiter state as JSON."""
+    return json.dumps(
+        {"scheduler": get_scheduler().stats(), "rate_limits": rate_limiter_stats()}, indent=2
+    )
+
+
+@mcp.resource("metrics://llm")
+def llm_metrics() -> str:
+    """Hedging counters, circuit breaker states, shared HTTP pool usage and finalization savings as JSON."""
+    return json.dumps(
+        {
+            "hedging": hedging_stats(),
+            "http_pools": http_client_stats(),
+            "finalization": finalization_stats(),
+        },
+        indent=2,
+    )
+
+
+@mcp.resource("metrics://coalescing")
+def coalescing_metrics() -> str:
+    """Request coalescing counters (executed, coalesced, cache hits) as JSON."""
+    return json.dumps(get_coalescer().stats(), indent=2)
+
 
-        root_dir = Path(__file__).resolve().parent.parent
-        manifest_path = root_dir / ".ai_state.json"
+@mcp.resource("metrics://stages")
+def stage_metrics() -> str:
+    """p50/p95 latency, counts and errors per stage (graph node, LLM call, tool, manifest I/O) as JSON."""
+    return json.dumps(telemetry_summary(), indent=2)
 
-        store = JSONStore(filename=str(manifest_path))
 
+@mcp.resource("metrics://prometheus", mime_type="text/plain")
+def prometheus_metrics() -> str:
+    """Span latency histograms, error and LLM token counters in Prometheus text format."""
+    return prometheus_snapshot()
+
+
+async def run_architect_request(
+    request: str,
+    ctx: Optional[Context] = None,
+    finalization: Optional[str] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> str:
+    """
+    Runs the full architect graph for a single request (no deduplication).
+    Progress goes to `on_progress` if given, else to the caller's `ctx`.
+    """
+    try:
+        # "mark T3 completed" gibi mekanik komutlar graph'a ve LLM'e gitmeden uygulanır
+        fast_path = await asyncio.to_thread(try_fast_path, request, str(get_manifest_path()))
+        if fast_path is not None:
+            return format_fast_path(fast_path)
+
+        # Ağır importlar (LangGraph, LangChain) sunucu açılışını değil ilk isteği bekletir
+        from agents.main_agent.agent_flow import create_main_agent
+        from langchain_core.messages import HumanMessage
+
+        store = JSONStore(filename=str(get_manifest_path()))
 
         # 1. Main Agent'ı oluştur (Senin agent_flow.py dosyanı kullanır)
         app = await create_main_agent()
@@ -62,18 +279,161 @@ async def architect_request(request: str) -> str:
             "manifest": store.load(), # Mevcut durumu yükle
             "history": [],
             "current_agent": "start",
+            "finalization_policy": finalization,
         }
-        config = {"configurable": {"thread_id": "mcp_architect_session"}, "recursion_limit": 100}
+        settings = get_settings("server", DEFAULT_SERVER_SETTINGS)
+        run_id = RunStore.new_run_id()
+        thread_id = make_thread_id(ctx, run_id)
+        config = {
+            "configurable": {"thread_id": thread_id},
+            "recursion_limit": settings["recursion_limit"],
+        }
+        budgets = UsageMeter.from_settings().budgets()
+        get_run_store().start(run_id, thread_id, request, source="mcp", budgets=budgets)
 
-        # 4. Graph'ı çalıştır
-        final_state = await app.ainvoke(initial_state, config=config)
+        # 4. Graph'ı çalıştır (scheduler slotu alındıktan sonra)
+        try:
+            async with get_scheduler().slot():
+                # Deadline slot alındıktan sonra başlar: kuyrukta bekleme çalışma süresinden yemesin
+                with request_scope(RequestContext.from_settings(run_id, **budgets)):
+                    final_state = await execute_run(
+                        app, initial_state, config, run_id, on_progress=on_progress or progress_reporter(ctx)
+                    )
+        except DeadlineExceeded as e:
+            return format_timeout(e, run_id)
+        except QueueFullError as e:
+            get_run_store().finish(run_id, "failed", str(e))
+            return f"❌ ARCHITECT BUSY: {str(e)} Please retry shortly."
+        except Exception as e:
+            return (
+                f"❌ ARCHITECT ERROR: An error occurred during the planning phase: {str(e)}\n"
+                f"Completed steps were checkpointed. Retry with resume_architect_run(run_id=\"{run_id}\")."
+            )
 
         # 5. Sonucu Dön
-        last_message = final_state["messages"][-1]
-        return f"✅ ARCHITECTURE PLAN COMPLETE.\n\nArchitect Report:\n{last_message.content}\n\nSystem Note: The .ai_state.json manifest has been updated with new tasks. You may now proceed with implementation based on these tasks."
+        return format_report(final_state, run_id)
 
     except Exception as e:
         return f"❌ ARCHITECT ERROR: An error occurred during the planning phase: {str(e)}"
 
+
+@mcp.tool()
+async def architect_request(
+    request: str, ctx: Optional[Context] = None, finalization: Optional[str] = None
+) -> str:
+    """
+    Acts as the primary "Project Architect" and "Orchestration Engine" for this coding environment.
+    
+    CRITICAL: This tool MUST be the FIRST step for any coding task, feature request, or refactoring.
+    Do not attempt to write code or modify files until this tool has been executed.
+
+    This tool triggers the internal multi-agent system (LangGraph) to:
+    1. Analyze the user's high-level request against the current project context.
+    2. Decompose the request into specific, actionable tasks using the Task Manager.
+    3. Update the persistent project manifest (.ai_state.json) with new tasks, status, and architectural rules.
+    4. Generate a detailed "Architected Prompt" (implementation plan) for the Developer to follow.
+
+    Args:
+        request (str): The user's raw coding request, feature description, or bug report (e.g., "Add JWT auth", "Refactor the API").
+        finalization (str, optional): How the final report is produced: "reuse" (the agent's last answer as is),
+            "template" (summary of manifest changes, no LLM call), "llm" (a dedicated summary call) or
+            "auto" (reuse a complete answer, otherwise decide). Defaults to finalization.policy in config.
+
+    Returns:
+        str: A summary of the architectural plan and confirmation that the project manifest (.ai_state.json) has been updated.
+    """
+    if finalization is not None and finalization not in POLICIES:
+        return f"❌ ARCHITECT ERROR: Unknown finalization policy '{finalization}'. Use one of: {', '.join(POLICIES)}."
+
+    settings = get_settings("server", DEFAULT_SERVER_SETTINGS)
+    if not settings["coalesce_requests"]:
+        return await run_architect_request(request, ctx, finalization)
+
+    # Aynı istek + aynı manifest sürümü (+ aynı policy) = aynı sonuç; tekrar çalıştırma.
+    # Çalışan run ise sürümsüz anahtarla bulunur: run kendi yazdıklarıyla sürümü değiştirir,
+    # LLM aşamasında gelen aynı istek yine de ona bağlanmalı.
+    store = JSONStore(filename=str(get_manifest_path()))
+    key_request = f"{request}\x00finalization={finalization}" if finalization else request
+    coalescer = get_coalescer()
+    inflight_key = RequestCoalescer.make_key(key_request)
+    return await coalescer.run(
+        RequestCoalescer.make_key(key_request, store.version()),
+        # İlerleme yalnızca ilk çağırana değil, bağlanan her çağırana gider
+        lambda: run_architect_request(request, ctx, finalization, on_progress=coalescer.fanout(inflight_key)),
+        inflight_key=inflight_key,
+        listener=progress_reporter(ctx),
+        post_key=lambda: RequestCoalescer.make_key(key_request, store.version()),
+        cacheable=lambda result: not result.startswith("❌"),
+    )
+
+
+@mcp.tool()
+async def resume_architect_run(run_id: str, ctx: Optional[Context] = None) -> str:
+    """
+    Resumes an interrupted or failed architect_request run from its last completed node,
+    without repeating the LLM calls that already succeeded.
+
+    Args:
+        run_id (str): The Run ID reported by architect_request.
+
+    Returns:
+        str: The architect report of the resumed run, or why it could not be resumed.
+    """
+    try:
+        run = get_run_store().get(run_id)
+        if run is None:
+            return f"❌ ARCHITECT ERROR: Unknown run ID '{run_id}'."
+
+        from agents.main_agent.agent_flow import create_main_agent
+
+        app = await create_main_agent()
+        settings = get_settings("server", DEFAULT_SERVER_SETTINGS)
+        config = {
+            "configurable": {"thread_id": run["thread_id"]},
+            "recursion_limit": settings["recursion_limit"],
+        }
+
+        snapshot = await app.aget_state(config)
+        if not snapshot.values:
+            return (
+                f"❌ ARCHITECT ERROR: No checkpoints left for run '{run_id}' "
+                f"(expired, cleaned up, or the in-memory checkpointer was restarted)."
+            )
+        if not snapshot.next:
+            get_run_store().finish(run_id, "completed")
+            return format_report(snapshot.values, run_id)
+
+        get_run_store().finish(run_id, "running")
+        # Kayıtlı bütçelerle ve şimdiye kadar harcananla devam et (bütçe sıfırlanmasın)
+        context = RequestContext.from_settings(run_id, **(run["budgets"] or {}))
+        context.usage.restore(snapshot.values.get("usage"))
+        # Yarım kalmış run'lar öncelikli: LLM maliyetinin bir kısmı zaten ödendi
+        async with get_scheduler().slot(priority=-1):
+            with request_scope(context):
+                final_state = await execute_run(
+                    app, None, config, run_id, on_progress=progress_reporter(ctx)
+                )
+        return format_report(final_state, run_id)
+
+    except DeadlineExceeded as e:
+        return format_timeout(e, run_id)
+    except QueueFullError as e:
+        return f"❌ ARCHITECT BUSY: {str(e)} Please retry shortly."
+    except Exception as e:
+        return f"❌ ARCHITECT ERROR: Could not resume run '{run_id}': {str(e)}"
+
+
+def prepare_run_store():
+    """Marks runs orphaned by a previous process and applies checkpoint retention."""
+    try:
+        settings = get_settings("checkpointer", DEFAULT_CHECKPOINTER_SETTINGS)
+        run_store = get_run_store()
+        run_store.mark_interrupted()
+        run_store.cleanup(settings["retention_days"])
+    except Exception as e:
+        logger.error(f"Run store maintenance failed: {e}")
+
+
 if __name__ == "__main__":
+    prepare_run_store()
     mcp.run()
\ No newline at end of file
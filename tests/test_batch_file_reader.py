@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+import core.file_cache as file_cache_module
+from agents.task_manager.tools.batch_file_reader import DEFAULT_BATCH_READER_SETTINGS, BatchFileReader
+from core.file_cache import FileContentCache
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_cache_module, "_file_cache", FileContentCache(max_entries=8))
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "auth.py").write_text("def login():\n    return 'jwt'\n")
+    (tmp_path / "src" / "util.py").write_text("def helper():\n    return 1\n")
+    (tmp_path / "src" / "big.py").write_text("".join(f"value_{i} = {i}\n" for i in range(2000)))
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "dep.py").write_text("x = 1\n")
+    return BatchFileReader(base_dir=str(tmp_path))
+
+
+def test_globs_are_read_in_one_call_within_budget(project):
+    result = project._run(["src/*.py", "**/*.py"], token_budget=1000)
+
+    assert result.startswith("Read 3 of 3 files")
+    # Küçük dosyalar önce ve tam; büyük dosya kalan bütçeye sığacak kadar kesilir
+    assert result.index("src/auth.py") < result.index("src/big.py")
+    assert "read_file(relative_path='src/big.py', start_line=" in result
+    assert "node_modules" not in result
+    used = int(result.split(", ")[1].split("/")[0])
+    assert used <= 1000
+
+
+def test_query_relevance_wins_over_size(project):
+    result = project._run(["src/util.py", "src/auth.py"], query="jwt login")
+
+    assert result.index("--- Content: src/auth.py") < result.index("--- Content: src/util.py")
+
+
+def test_budget_exhaustion_skips_instead_of_tiny_fragments(project, monkeypatch):
+    settings = {**DEFAULT_BATCH_READER_SETTINGS, "min_file_tokens": 500}
+    monkeypatch.setattr(
+        "agents.task_manager.tools.batch_file_reader.get_settings",
+        lambda section, defaults: settings if section == "read_files" else defaults,
+    )
+
+    result = project._run(["src/util.py", "src/big.py"], token_budget=300)
+
+    assert "- src/big.py: skipped, token budget exhausted" in result
+    assert "--- Content: src/util.py" in result
+
+
+def test_same_path_protections_as_read_file(project, tmp_path):
+    (tmp_path.parent / "secret.txt").write_text("secret")
+
+    result = project._run(["../secret.txt", "../*.txt", "src/auth.py"])
+
+    assert "secret" not in result.split("Files:")[0]
+    assert "Access denied: ../secret.txt" in result
+    assert project._run(["../secret.txt"]).startswith("Error: No readable files matched.")
+
+
+def test_max_files_keeps_query_relevant_paths(project, monkeypatch):
+    settings = {**DEFAULT_BATCH_READER_SETTINGS, "max_files": 1}
+    monkeypatch.setattr(
+        "agents.task_manager.tools.batch_file_reader.get_settings",
+        lambda section, defaults: settings if section == "read_files" else defaults,
+    )
+
+    result = project._run(["src/*.py"], query="util helper")
+
+    assert result.startswith("Read 1 of 1 files")
+    assert "--- Content: src/util.py" in result
+    assert "2 matching files skipped (max_files=1)" in result
+
+
+def test_recursive_glob_does_not_walk_ignored_dirs(project, tmp_path, monkeypatch):
+    (tmp_path / "src" / "pkg").mkdir()
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("y = 2\n")
+    walked = []
+    real_scandir = os.scandir
+    monkeypatch.setattr("os.scandir", lambda path=".": walked.append(str(path)) or real_scandir(path))
+
+    result = project._run(["**/*.py"], token_budget=1000)
+
+    assert "--- Content: src/pkg/mod.py" in result and "--- Content: src/auth.py" in result
+    assert not any("node_modules" in path for path in walked)
@@ -0,0 +1,94 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+import core.llm_invoker as llm_invoker
+from agents.main_agent.agent_flow import route_after_decide
+from agents.task_manager.agent_flow import should_continue
+from core.budget import UsageMeter, format_usage
+from core.request_context import RequestContext, current_usage, request_scope
+
+PRICING = {"gpt-4o": [2.5, 10.0], "gpt-4o-mini": [0.15, 0.6]}
+
+
+def _reply(input_tokens=1000, output_tokens=200, model="gpt-4o-mini-2024-07-18"):
+    return AIMessage(
+        content="ok",
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+        response_metadata={"model_name": model},
+    )
+
+
+def test_meter_prices_by_longest_model_prefix():
+    meter = UsageMeter(pricing=PRICING)
+    meter.record(None, [], _reply())
+
+    snapshot = meter.snapshot()
+    assert snapshot["llm_calls"] == 1
+    assert snapshot["total_tokens"] == 1200
+    # gpt-4o-mini fiyatı, gpt-4o değil
+    assert snapshot["cost_usd"] == pytest.approx((1000 * 0.15 + 200 * 0.6) / 1_000_000)
+
+
+def test_meter_estimates_tokens_and_flags_unpriced_models():
+    meter = UsageMeter(pricing=PRICING)
+    meter.record(None, [HumanMessage(content="x" * 400)], AIMessage(content="y" * 40))
+
+    snapshot = meter.snapshot()
+    assert snapshot["input_tokens"] > 0 and snapshot["output_tokens"] > 0
+    assert snapshot["unpriced_models"] == ["unknown"]
+
+
+@pytest.mark.parametrize(
+    "limits, expected",
+    [
+        ({"max_llm_calls": 2}, "llm_calls"),
+        ({"max_total_tokens": 2000}, "total_tokens"),
+        ({"max_cost_usd": 0.0001}, "cost_usd"),
+        ({"max_llm_calls": 5}, None),
+    ],
+)
+def test_meter_reports_first_exhausted_budget(limits, expected):
+    meter = UsageMeter(pricing=PRICING, **limits)
+    meter.record(None, [], _reply())
+    meter.record(None, [], _reply())
+
+    assert meter.exhausted() == expected
+
+
+async def test_ainvoke_llm_records_usage_in_request_context():
+    llm = GenericFakeChatModel(messages=iter([_reply(), _reply()]))
+
+    with request_scope(RequestContext("run-1", usage=UsageMeter(max_llm_calls=2, pricing=PRICING))):
+        await llm_invoker.ainvoke_llm(llm, [HumanMessage(content="hi")], provider="fake")
+        assert current_usage()["exhausted"] is None
+        await llm_invoker.ainvoke_llm(llm, [HumanMessage(content="hi")], provider="fake")
+        usage = current_usage()
+
+    assert usage["llm_calls"] == 2
+    assert usage["exhausted"] == "llm_calls"
+    assert current_usage() is None
+
+
+def test_routing_degrades_to_final_response_when_budget_is_exhausted():
+    usage = {"exhausted": "cost_usd"}
+    tool_call = AIMessage(content="", tool_calls=[{"name": "manage_tasks", "args": {}, "id": "1"}])
+
+    assert route_after_decide({"next_node": "decide_agent"}) == "decide_agent"
+    assert route_after_decide({"next_node": "decide_agent", "usage": usage}) == "final_response_node"
+    assert should_continue({"messages": [tool_call]}) == "tools"
+    assert should_continue({"messages": [tool_call], "usage": usage}) == "end"
+
+
+def test_format_usage_shows_limits_and_exhausted_budget():
+    meter = UsageMeter(max_llm_calls=1, pricing=PRICING)
+    meter.record(None, [], _reply())
+
+    text = format_usage(meter.snapshot())
+    assert "1/1 LLM calls" in text
+    assert "1,200 tokens" in text
+    assert "llm_calls budget reached" in text
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+import core.llm_factory as llm_factory
+from core.cassette import CassetteMiss, use_cassette
+from core.llm_invoker import ainvoke_llm
+
+
+@pytest.fixture(autouse=True)
+def fresh_models(monkeypatch):
+    monkeypatch.setattr(llm_factory, "_llm_cache", {})
+
+
+class _Tool:
+    name = "route_to_task_manager"
+
+
+async def _session():
+    """decide_agent's scripted session: a routing tool call, then the answer."""
+    llm = llm_factory.get_llm("main_agent", "decide_agent").bind_tools([_Tool()])
+    messages = [SystemMessage(content="You are the orchestrator."), HumanMessage(content="Add JWT auth")]
+    first = await ainvoke_llm(llm, messages)
+    messages += [first, ToolMessage(content="Task added.", tool_call_id=first.tool_calls[0]["id"])]
+    second = await ainvoke_llm(llm, messages)
+    return first, second
+
+
+async def test_record_then_replay_without_provider(tmp_path, monkeypatch):
+    path = tmp_path / "session.json"
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    with use_cassette(str(path), "record", session="run-1"):
+        recorded = await _session()
+
+    data = json.loads(path.read_text())
+    assert data["session"] == "run-1"
+    assert [i["key"] for i in data["interactions"]] == ["main_agent.decide_agent"] * 2
+    assert data["interactions"][0]["request"]["tools"] == ["route_to_task_manager"]
+    assert data["interactions"][0]["response"]["data"]["tool_calls"][0]["name"] == "route_to_task_manager"
+    assert data["interactions"][0]["latency_seconds"] >= 0
+
+    # Replay gerçek istemci kurmaz: anahtar yokken OpenAI seçili olsa da çalışmalı
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with use_cassette(str(path), "replay") as cassette:
+        replayed = await _session()
+
+    assert cassette.served == 2
+    assert replayed[0].tool_calls == recorded[0].tool_calls
+    assert replayed[1].content == recorded[1].content
+    assert replayed[1].usage_metadata == recorded[1].usage_metadata
+
+
+async def test_replay_prefers_matching_request_then_recorded_order(tmp_path, monkeypatch):
+    path = tmp_path / "session.json"
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    with use_cassette(str(path), "record"):
+        llm = llm_factory.get_llm("main_agent", "final_response")
+        await ainvoke_llm(llm, [HumanMessage(content="first")])
+        await ainvoke_llm(llm, [HumanMessage(content="second")])
+
+    with use_cassette(str(path), "replay") as cassette:
+        llm = llm_factory.get_llm("main_agent", "final_response")
+        await ainvoke_llm(llm, [HumanMessage(content="second")])
+        assert cassette.served == 1 and 1 in cassette._used
+        # Kayıtta eşi olmayan istek sıradaki kullanılmamış cevabı alır
+        await ainvoke_llm(llm, [HumanMessage(content="changed prompt")])
+        with pytest.raises(CassetteMiss):
+            await ainvoke_llm(llm, [HumanMessage(content="third")])
+
+
+async def test_replay_can_simulate_recorded_latency(tmp_path, monkeypatch):
+    path = tmp_path / "session.json"
+    path.write_text(
+        json.dumps(
+            {
+                "version": 1,
+                "interactions": [
+                    {
+                        "index": 0,
+                        "key": "task_manager.analysis",
+                        "latency_seconds": 0.2,
+                        "fingerprint": "",
+                        "request": {"messages": [], "tools": []},
+                        "response": {"type": "ai", "data": AIMessage(content="done").model_dump()},
+                    }
+                ],
+            }
+        )
+    )
+
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr("core.cassette.asyncio.sleep", fake_sleep)
+    with use_cassette(str(path), "replay", simulate_latency=True):
+        response = await ainvoke_llm(llm_factory.get_llm("task_manager", "analysis"), [HumanMessage(content="x")])
+
+    assert response.content == "done"
+    assert sleeps == [0.2]
@@ -0,0 +1,48 @@
+import operator
+from typing import List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import Annotated
+
+from core.memory_saver import BoundedMemorySaver
+
+
+class CounterState(TypedDict):
+    steps: Annotated[List[int], operator.add]
+
+
+def _build_graph(saver):
+    workflow = StateGraph(CounterState)
+    workflow.add_node("a", lambda state: {"steps": [1]})
+    workflow.add_node("b", lambda state: {"steps": [2]})
+    workflow.add_edge(START, "a")
+    workflow.add_edge("a", "b")
+    workflow.add_edge("b", END)
+    return workflow.compile(checkpointer=saver)
+
+
+async def test_threads_are_evicted_lru():
+    saver = BoundedMemorySaver(max_threads=3, thread_ttl_seconds=None)
+    graph = _build_graph(saver)
+
+    for i in range(10):
+        await graph.ainvoke({"steps": []}, config={"configurable": {"thread_id": f"t{i}"}})
+
+    stats = saver.stats()
+    assert stats["threads"] == 3
+    assert stats["threads_evicted_lru"] == 7
+    assert set(saver.storage) == {"t7", "t8", "t9"}
+
+
+async def test_checkpoints_per_thread_are_capped():
+    saver = BoundedMemorySaver(max_checkpoints_per_thread=3)
+    graph = _build_graph(saver)
+    config = {"configurable": {"thread_id": "same"}}
+
+    for _ in range(5):
+        await graph.ainvoke({"steps": []}, config=config)
+
+    assert saver.stats()["checkpoints"] == 3
+    # Son durum hâlâ okunabilir olmalı
+    state = await graph.aget_state(config)
+    assert state.values["steps"][-2:] == [1, 2]
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+import memory.code_index as code_index_module
+from agents.task_manager.tools.code_search import CodeSearch
+from memory.code_index import DEFAULT_CODE_SEARCH_SETTINGS, TrigramIndex, required_literals
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(code_index_module, "_indexes", {})
+    (tmp_path / ".gitignore").write_text("generated/\n*.log\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "auth.py").write_text("import jwt\n\n\ndef create_token(user):\n    return jwt.encode(user)\n")
+    (tmp_path / "src" / "util.py").write_text("def helper():\n    return 'Token helper'\n")
+    (tmp_path / "generated").mkdir()
+    (tmp_path / "generated" / "out.py").write_text("def create_token(): pass\n")
+    (tmp_path / "debug.log").write_text("create_token called\n")
+    (tmp_path / "image.bin").write_bytes(b"\x00create_token\x00" * 10)
+    return tmp_path
+
+
+def make_index(root):
+    index = TrigramIndex(str(root), dict(DEFAULT_CODE_SEARCH_SETTINGS))
+    index.update()
+    return index
+
+
+def test_literal_search_uses_index_and_respects_ignores(project):
+    index = make_index(project)
+
+    matches, stats = index.search("create_token", context_lines=1)
+
+    assert [(m.path, m.line_number) for m in matches] == [("src/auth.py", 4)]
+    assert matches[0].before == [""] and matches[0].after == ["    return jwt.encode(user)"]
+    # Yalnızca trigramları tutan dosya aday olarak okunur
+    assert stats["candidates"] == 1
+    assert {entry[0] for entry in index.files} == {".gitignore", "image.bin", "src/auth.py", "src/util.py"}
+    index.close()
+
+
+def test_regex_and_case_sensitivity(project):
+    index = make_index(project)
+
+    assert [m.path for m in index.search(r"def \w+\(", regex=True)[0]] == ["src/auth.py", "src/util.py"]
+    assert [m.path for m in index.search("token helper")[0]] == ["src/util.py"]
+    assert index.search("token helper", case_sensitive=True)[0] == []
+    assert required_literals(r"jwt\.encode\(user") == ["jwt.encode(user"]
+    assert required_literals(r"(foo|bar)baz") == []
+    assert required_literals(r"colou?r_name") == ["colo", "r_name"]
+    index.close()
+
+
+def test_incremental_update_and_reload_from_disk(project):
+    index = make_index(project)
+    (project / "src" / "util.py").write_text("def refresh_token():\n    pass\n")
+    os.utime(project / "src" / "util.py", ns=(1, 1))
+    (project / "src" / "auth.py").unlink()
+
+    result = index.update()
+
+    assert (result["updated"], result["removed"]) == (1, 1)
+    assert index.search("create_token")[0] == []
+    assert [m.path for m in index.search("refresh_token")[0]] == ["src/util.py"]
+    index.close()
+
+    reloaded = TrigramIndex(str(project), dict(DEFAULT_CODE_SEARCH_SETTINGS))
+    assert reloaded.load()
+    assert [m.line for m in reloaded.search("refresh_token")[0]] == ["def refresh_token():"]
+    assert reloaded.update()["updated"] == 0
+    reloaded.close()
+
+
+def test_search_code_tool_formats_grep_style_output(project):
+    tool = CodeSearch(base_dir=str(project))
+
+    result = tool._run("jwt.encode", path_glob="src/*.py")
+
+    assert result.startswith("1 matches in 1 files:")
+    assert "src/auth.py:5:     return jwt.encode(user)" in result
+    assert "src/auth.py-4- def create_token(user):" in result
+    assert tool._run("no_such_symbol").startswith("No matches")
+    assert (project / ".ai_index" / "code_trigrams.bin").exists()
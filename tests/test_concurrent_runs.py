@@ -0,0 +1,165 @@
+import asyncio
+import random
+import re
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import agents.main_agent.agent_flow as main_flow
+import agents.main_agent.node.decide_agent_node as decide_module
+import agents.main_agent.node.final_response_node as final_module
+import agents.main_agent.node.setup_node as setup_node_module
+import agents.task_manager.node.analysis_agent as analysis_module
+from agents.task_manager.tools.task_manager import ManageTasks
+from core.checkpointer import get_checkpointer
+from core.progress import NODE_LABELS, astream_run
+from core.request_context import RequestContext, request_scope
+from memory.json_store import JSONStore
+
+RUNS = 8
+
+
+class ScriptedRouterModel(BaseChatModel):
+    """
+    Deterministic stand-in for both agents. The decide role routes once to
+    the task manager and then answers with what the sub-agent reported; the
+    analysis role reports which request and which run it was given.
+    """
+
+    role: str
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-router"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        # Rastgele gecikme: eşzamanlı çalıştırmalar birbirinin arasına girsin
+        await asyncio.sleep(random.uniform(0, 0.02))
+        user_request = next(m.content for m in messages if isinstance(m, HumanMessage))
+        run = re.search(r"run-\d+", user_request).group(0)
+
+        if self.role == "analysis":
+            routed = messages[-1].content
+            message = AIMessage(content=f"task manager handled '{routed}' for {run}")
+        else:
+            results = [m.content for m in messages if isinstance(m, ToolMessage)]
+            if not results:
+                message = AIMessage(
+                    content="",
+                    tool_calls=[
+                        {"name": "route_to_task_manager", "args": {"request": f"plan {run}"}, "id": f"call-{run}"}
+                    ],
+                )
+            else:
+                message = AIMessage(content=f"{run} result: {results[-1]} " + "." * 200)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+async def _setup(state):
+    return {
+        "messages": [SystemMessage(content="You are the orchestrator.")],
+        "current_agent": "main_agent",
+        "next_node": "decide_agent",
+        "history": ["setup (test)"],
+    }
+
+
+async def test_parallel_runs_keep_task_manager_state_isolated(monkeypatch):
+    monkeypatch.setattr(main_flow, "setup_node", _setup)
+    monkeypatch.setattr(decide_module, "get_llm", lambda *a: ScriptedRouterModel(role="decide"))
+    monkeypatch.setattr(analysis_module, "get_llm", lambda *a: ScriptedRouterModel(role="analysis"))
+    monkeypatch.setattr(final_module, "get_llm", lambda *a: ScriptedRouterModel(role="decide"))
+    app = await main_flow.create_main_agent()
+
+    async def run(i: int):
+        run_id = f"run-{i}"
+        with request_scope(RequestContext(run_id)):
+            state = await app.ainvoke(
+                {
+                    "messages": [HumanMessage(content=f"User Request: {run_id}")],
+                    "manifest": {"status": {}, "tasks": []},
+                    "history": [],
+                    "current_agent": "start",
+                },
+                {"configurable": {"thread_id": f"thread-{i}"}},
+            )
+        return run_id, state
+
+    results = await asyncio.gather(*(run(i) for i in range(RUNS)))
+
+    for run_id, state in results:
+        answer = state["messages"][-1].content
+        # Alt ajan bu çalıştırmanın isteğini ve mesajlarını görmüş olmalı, başkasınınkini değil
+        assert f"handled 'plan {run_id}' for {run_id}" in answer
+        others = set(re.findall(r"run-\d+", answer)) - {run_id}
+        assert not others, (run_id, answer)
+
+    # Her yönlendirme çağrısı alt ajanı kendi thread'inde çalıştırır
+    saver = get_checkpointer("task_manager")
+    for run_id, _ in results:
+        config = {"configurable": {"thread_id": f"task_manager:{run_id}:call-{run_id}"}}
+        assert saver.get_tuple(config) is not None, run_id
+
+
+async def test_task_manager_nodes_still_stream_to_the_parent_run(monkeypatch):
+    monkeypatch.setattr(main_flow, "setup_node", _setup)
+    monkeypatch.setattr(decide_module, "get_llm", lambda *a: ScriptedRouterModel(role="decide"))
+    monkeypatch.setattr(analysis_module, "get_llm", lambda *a: ScriptedRouterModel(role="analysis"))
+    monkeypatch.setattr(final_module, "get_llm", lambda *a: ScriptedRouterModel(role="decide"))
+    app = await main_flow.create_main_agent()
+    labels = []
+
+    async def on_progress(message: str) -> None:
+        labels.append(message)
+
+    with request_scope(RequestContext("run-stream")):
+        await astream_run(
+            app,
+            {
+                "messages": [HumanMessage(content="User Request: run-99")],
+                "manifest": {"status": {}, "tasks": []},
+                "history": [],
+                "current_agent": "start",
+            },
+            {"configurable": {"thread_id": "thread-stream"}},
+            on_progress=on_progress,
+        )
+
+    # Alt ajan kendi thread'inde çalışsa da düğümleri üst run'ın ilerlemesinde görünmeli
+    assert NODE_LABELS["analysis"] in labels
+    assert labels.index(NODE_LABELS["decide_agent"]) < labels.index(NODE_LABELS["analysis"])
+
+
+async def test_setup_keeps_tasks_written_during_context_build(tmp_path, monkeypatch):
+    manifest_path = tmp_path / ".ai_state.json"
+    JSONStore(str(manifest_path)).save(JSONStore(str(manifest_path)).load_default_template())
+    seen_tasks = []
+
+    def build_while_another_run_adds_a_task(root, request, tasks):
+        seen_tasks.append(list(tasks))
+        # setup bağlamı kurarken paralel bir run manifest'e görev yazıyor
+        ManageTasks(filename=str(manifest_path))._run(action="add", task_id="T1", title="Concurrent task")
+        return ""
+
+    monkeypatch.setattr(setup_node_module, "JSONStore", lambda filename: JSONStore(str(manifest_path)))
+    monkeypatch.setattr(setup_node_module, "build_relevant_context", build_while_another_run_adds_a_task)
+    monkeypatch.setattr(
+        setup_node_module,
+        "get_settings",
+        lambda section, defaults: {**defaults, "enabled": True, "include_in_setup": False},
+    )
+
+    updates = await setup_node_module.setup_node({"messages": [HumanMessage(content="Add JWT auth")]})
+
+    assert seen_tasks == [[]]
+    saved = JSONStore(str(manifest_path)).load()
+    assert [t["id"] for t in saved["tasks"]] == ["T1"]
+    assert saved["project_meta"]["root_directory"] == updates["manifest"]["project_meta"]["root_directory"]
+    assert [t["id"] for t in updates["manifest"]["tasks"]] == ["T1"]
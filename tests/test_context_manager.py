@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from core.history_compactor import get_token_counter
+from memory.context_manager import DEFAULT_CONTEXT_SETTINGS, ContextManager
+from memory.symbol_index import DEFAULT_SYMBOL_INDEX_SETTINGS, SymbolIndex
+from memory.vector_store import DEFAULT_VECTOR_STORE_SETTINGS, VectorStore
+
+AUTH = '''
+def issue_jwt_token(user_id: str) -> str:
+    """Signs a JWT access token for the user."""
+    return sign(user_id)
+
+
+def verify_jwt_token(token: str) -> bool:
+    """Checks the JWT signature and expiry."""
+    return check(token)
+'''
+
+CHART = '''
+def render_chart(data):
+    """Draws a bar chart of monthly sales."""
+    return plot(data)
+'''
+
+
+@pytest.fixture
+def manager(tmp_path):
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "auth.py").write_text(AUTH)
+    (root / "src" / "chart.py").write_text(CHART)
+    store = VectorStore(str(tmp_path / "vectors"), settings=dict(DEFAULT_VECTOR_STORE_SETTINGS))
+    symbols = SymbolIndex(str(root), {**DEFAULT_SYMBOL_INDEX_SETTINGS, "cache_file": str(tmp_path / "symbols.json")})
+    return ContextManager(str(root), dict(DEFAULT_CONTEXT_SETTINGS), store=store, symbols=symbols)
+
+
+TASKS = [
+    {"id": "T1", "title": "Add JWT refresh tokens", "status": "in_progress", "description": "Extend auth with refresh"},
+    {"id": "T2", "title": "Monthly sales dashboard", "status": "completed", "description": "Charts"},
+]
+
+
+def test_relevant_snippets_are_selected_and_bounded(manager):
+    text, stats = manager.build("verify the jwt token expiry", TASKS)
+
+    assert "--- file: src/auth.py (lines 1-" in text
+    assert "Task T1 [in_progress] Add JWT refresh tokens" in text
+    assert "render_chart" not in text
+    assert stats["tokens"] <= stats["budget"] and stats["included"] >= 2
+    assert get_token_counter().count_text(text) <= manager.settings["token_budget"]
+
+
+def test_token_budget_is_strict(manager):
+    manager.settings = {**manager.settings, "token_budget": 60}
+
+    text, stats = manager.build("jwt token", TASKS)
+
+    assert 0 < stats["tokens"] <= 60
+    assert get_token_counter().count_text(text) <= 60
+
+
+def test_cache_per_request_and_workspace_version(manager):
+    first, stats = manager.build("jwt token", TASKS)
+    again, cached = manager.build("jwt token", TASKS)
+    assert again == first and cached["cached"] and not stats["cached"]
+
+    auth = os.path.join(manager.root, "src", "auth.py")
+    with open(auth, "a") as f:
+        f.write("\n\ndef revoke_jwt_token(token):\n    return blacklist(token)\n")
+    os.utime(auth, ns=(10**18, 10**18))
+    changed, stats = manager.build("jwt token", TASKS)
+    assert not stats["cached"] and "revoke_jwt_token" in changed
+
+
+def test_reports_are_recorded_and_reused(manager):
+    manager.record_report("run-1", "Add JWT auth", "Planned token issuing, verification and refresh tasks.")
+
+    text, stats = manager.build("jwt auth plan", TASKS)
+
+    assert "--- report: Past report for: Add JWT auth ---" in text
+    assert not stats["cached"]
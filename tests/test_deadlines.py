@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+import core.llm_invoker as llm_invoker
+from agents.main_agent.agent_flow import route_after_decide
+from core.progress import astream_run
+from core.request_context import DeadlineExceeded, RequestContext, request_scope
+from memory.json_store import write_json_atomic
+
+
+class MiniState(TypedDict):
+    messages: Annotated[List, add_messages]
+
+
+def _slow_app(cancelled: list):
+    sub = StateGraph(MiniState)
+
+    async def analysis(state):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("analysis")
+            raise
+        return {}
+
+    sub.add_node("analysis", analysis)
+    sub.add_edge(START, "analysis")
+    sub.add_edge("analysis", END)
+    task_manager = sub.compile()
+
+    async def decide_agent(state):
+        await task_manager.ainvoke(state)
+        return {}
+
+    graph = StateGraph(MiniState)
+    graph.add_node("decide_agent", decide_agent)
+    graph.add_edge(START, "decide_agent")
+    graph.add_edge("decide_agent", END)
+    return graph.compile()
+
+
+async def test_deadline_cancels_nested_node_and_names_it():
+    cancelled = []
+    start = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded) as info:
+        with request_scope(RequestContext("run-1", timeout_seconds=0.2)):
+            await astream_run(_slow_app(cancelled), {"messages": [HumanMessage(content="hi")]}, {})
+
+    assert time.monotonic() - start < 2
+    assert info.value.node == "decide_agent/analysis"
+    assert cancelled == ["analysis"]
+
+
+class FailingChatModel(BaseChatModel):
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "failing-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        raise ConnectionError("upstream reset")
+
+
+async def test_llm_retry_does_not_sleep_past_deadline(monkeypatch):
+    monkeypatch.setattr(llm_invoker, "backoff_delay", lambda *args: 10.0)
+    llm = FailingChatModel()
+    start = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded):
+        with request_scope(RequestContext("run-2", timeout_seconds=1.0)):
+            await llm_invoker.ainvoke_llm(llm, [HumanMessage(content="hi")], provider="fake")
+
+    assert llm.calls == 1
+    assert time.monotonic() - start < 1.0
+
+
+async def test_expired_request_makes_no_llm_call():
+    llm = FailingChatModel()
+    context = RequestContext("run-3", timeout_seconds=0.01)
+    await asyncio.sleep(0.02)
+
+    with pytest.raises(DeadlineExceeded):
+        with request_scope(context):
+            await llm_invoker.ainvoke_llm(llm, [HumanMessage(content="hi")], provider="fake")
+    assert llm.calls == 0
+
+
+def test_react_loop_wraps_up_near_deadline():
+    state = {"next_node": "decide_agent"}
+
+    assert route_after_decide(state) == "decide_agent"
+    with request_scope(RequestContext("run-4", timeout_seconds=5)):
+        # Varsayılan finalize_reserve_seconds (20s) kalan süreden büyük
+        assert route_after_decide(state) == "final_response_node"
+
+
+def test_atomic_write_keeps_old_manifest_on_failure(tmp_path):
+    path = tmp_path / ".ai_state.json"
+    write_json_atomic(path, {"tasks": ["T1"]})
+
+    with pytest.raises(TypeError):
+        write_json_atomic(path, {"tasks": [object()]})
+
+    assert json.loads(path.read_text()) == {"tasks": ["T1"]}
+    assert [p.name for p in tmp_path.iterdir()] == [".ai_state.json"]
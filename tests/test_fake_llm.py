@@ -0,0 +1,58 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+import core.llm_factory as llm_factory
+from core.fake_llm import ScriptedChatModel, load_scripts
+from core.llm_invoker import ainvoke_llm
+
+
+def _model(**kwargs):
+    script = [
+        {"tool_calls": [{"name": "manage_tasks", "args": {"action": "add", "task_id": "T1"}}]},
+        "done",
+    ]
+    return ScriptedChatModel(script=script, **kwargs)
+
+
+def test_turn_follows_conversation_position_not_call_count():
+    model = _model(tool_names=["manage_tasks"])
+    first = model.invoke([SystemMessage(content="sys"), HumanMessage(content="add T1")])
+    assert first.tool_calls[0]["name"] == "manage_tasks"
+    assert first.usage_metadata["input_tokens"] > 0
+
+    followup = [
+        HumanMessage(content="add T1"),
+        first,
+        ToolMessage(content="added", tool_call_id=first.tool_calls[0]["id"]),
+    ]
+    assert model.invoke(followup).content == "done"
+    # Yeni kullanıcı mesajı betiği baştan başlatır; aynı model tekrar kullanılabilir
+    assert model.invoke(followup + [AIMessage(content="done"), HumanMessage(content="again")]).tool_calls
+
+
+def test_scripted_tool_must_be_bound():
+    model = _model().bind_tools([])
+    with pytest.raises(ValueError, match="not bound"):
+        model.invoke([HumanMessage(content="add T1")])
+
+
+def test_script_file_overrides_node(tmp_path):
+    script_file = tmp_path / "scripts.yaml"
+    script_file.write_text("main_agent.decide_agent:\n  - custom answer\n", encoding="utf-8")
+
+    scripts = load_scripts(str(script_file))
+    assert scripts["main_agent.decide_agent"] == ["custom answer"]
+    assert "task_manager.analysis" in scripts
+
+
+async def test_factory_builds_scripted_model_per_node(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setattr(llm_factory, "_llm_cache", {})
+
+    decide = llm_factory.get_llm("main_agent", "decide_agent")
+    analysis = llm_factory.get_llm("task_manager", "analysis")
+
+    assert isinstance(decide, ScriptedChatModel) and decide.model_name == "scripted"
+    assert decide.script != analysis.script
+    response = await ainvoke_llm(analysis, [HumanMessage(content="add a task")])
+    assert response.tool_calls[0]["name"] == "manage_tasks"
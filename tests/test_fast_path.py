@@ -0,0 +1,170 @@
+import json
+import threading
+
+import pytest
+
+import core.fast_path as fast_path
+from agents.task_manager.tools.task_manager import ManageTasks
+from core.fast_path import apply_command, parse_command, try_fast_path
+
+MANIFEST = {
+    "project_meta": {"name": "demo", "tech_stack": [], "architecture": "", "root_directory": "."},
+    "status": {"current_phase": "Planning", "active_goal": "", "last_update": ""},
+    "tasks": [
+        {"id": "T1", "title": "Setup project", "status": "completed", "dependencies": []},
+        {"id": "T2", "title": "Design schema", "status": "in_progress", "dependencies": ["T1"]},
+        {"id": "T3", "title": "Login and signup", "status": "todo", "dependencies": ["T2"]},
+    ],
+    "global_rules": [],
+}
+
+MATCHED = [
+    ("mark T3 completed", {"action": "set_status", "task_ids": ["T3"], "status": "completed"}),
+    ("Mark T3 as done.", {"action": "set_status", "task_ids": ["T3"], "status": "completed"}),
+    ("please mark t2 as in progress", {"action": "set_status", "task_ids": ["T2"], "status": "in_progress"}),
+    ("set T1 to todo", {"action": "set_status", "task_ids": ["T1"], "status": "todo"}),
+    ("mark T2 and T3 completed", {"action": "set_status", "task_ids": ["T2", "T3"], "status": "completed"}),
+    ("mark Design schema as done", {"action": "set_status", "task_ids": ["T2"], "status": "completed"}),
+    ("mark 'Login and signup' in progress", {"action": "set_status", "task_ids": ["T3"], "status": "in_progress"}),
+    ("T3 is done", {"action": "set_status", "task_ids": ["T3"], "status": "completed"}),
+    ("complete T3", {"action": "set_status", "task_ids": ["T3"], "status": "completed"}),
+    ("start working on task Design schema", {"action": "set_status", "task_ids": ["T2"], "status": "in_progress"}),
+    ("reopen T1", {"action": "set_status", "task_ids": ["T1"], "status": "todo"}),
+    ("add task: Write docs", {"action": "add_task", "task_id": "T4", "title": "Write docs", "dependencies": []}),
+    ("add task 'Write docs'", {"action": "add_task", "task_id": "T4", "title": "Write docs"}),
+    (
+        "add task named X depending on T2",
+        {"action": "add_task", "task_id": "T4", "title": "X", "dependencies": ["T2"]},
+    ),
+    (
+        "Create a new task called 'Add JWT auth' depending on T1 and T2",
+        {"action": "add_task", "task_id": "T4", "title": "Add JWT auth", "dependencies": ["T1", "T2"]},
+    ),
+    (
+        "add task T9: Write integration tests (depends on T3) as in progress",
+        {"action": "add_task", "task_id": "T9", "title": "Write integration tests", "status": "in_progress"},
+    ),
+    ("delete task T1", {"action": "delete_task", "task_ids": ["T1"]}),
+    ("remove tasks T1, T2", {"action": "delete_task", "task_ids": ["T1", "T2"]}),
+    ("T3 depends on T1", {"action": "set_dependencies", "task_ids": ["T3"], "dependencies": ["T1"]}),
+    ("set phase to Testing", {"action": "set_phase", "value": "Testing"}),
+    ("Change the current phase to 'Beta release'", {"action": "set_phase", "value": "Beta release"}),
+    ("move to the Testing phase", {"action": "set_phase", "value": "Testing"}),
+    ("set active goal to Ship the MVP", {"action": "set_goal", "value": "Ship the MVP"}),
+    ("update goal: Public beta", {"action": "set_goal", "value": "Public beta"}),
+]
+
+NOT_MATCHED = [
+    "Add JWT auth",
+    "Refactor the API",
+    "Design and implement a JWT-based authentication system",
+    "add tests for the task manager",
+    "mark T9 completed",  # bilinmeyen görev
+    "mark T3 and T9 completed",
+    "complete the authentication system",
+    "complete Design schema",  # başlık fiil kipinde yalnızca "task" ile kabul edilir
+    "what is the status of T3?",
+    "add task",
+    "add task T2: Duplicate id",
+    "add task Billing depending on T7",
+    "T3 depends on Payments",
+    "set up the phase detection module for the build pipeline\nthen deploy",
+    "start the dev server",
+    "update the phase detection module to support nested graphs",
+    "update goal tracking to store history in sqlite",
+    "set the goal field on the manifest schema to be optional",
+    "add task list pagination to the API",
+    "create task queue using celery depending on T2",
+    "move to the next phase",
+    "set phase to the previous one",
+    "set the goal to be optional",
+    "add task 'Write docs' and also refactor the API",
+]
+
+
+@pytest.mark.parametrize("request_text, expected", MATCHED)
+def test_grammar_recognizes_manifest_commands(request_text, expected):
+    command = parse_command(request_text, MANIFEST)
+
+    assert command is not None, request_text
+    for key, value in expected.items():
+        assert getattr(command, key) == value, (request_text, key)
+
+
+@pytest.mark.parametrize("request_text", NOT_MATCHED)
+def test_everything_else_falls_through_to_the_graph(request_text):
+    assert parse_command(request_text, MANIFEST) is None
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    path = tmp_path / ".ai_state.json"
+    path.write_text(json.dumps(MANIFEST))
+    return path
+
+
+def _load(path):
+    return json.loads(path.read_text())
+
+
+def test_fast_path_applies_commands_to_the_manifest(manifest_path):
+    assert try_fast_path("mark T2 and T3 completed", str(manifest_path)) == [
+        "Task 'T2' updated.",
+        "Task 'T3' updated.",
+    ]
+    try_fast_path("add task: Write docs depending on T3", str(manifest_path))
+    try_fast_path("T3 depends on T1", str(manifest_path))
+    try_fast_path("set phase to Testing", str(manifest_path))
+
+    manifest = _load(manifest_path)
+    tasks = {t["id"]: t for t in manifest["tasks"]}
+    assert [tasks[i]["status"] for i in ("T1", "T2", "T3")] == ["completed"] * 3
+    assert tasks["T4"]["title"] == "Write docs"
+    assert tasks["T4"]["dependencies"] == ["T3"]
+    assert tasks["T3"]["dependencies"] == ["T2", "T1"]
+    assert manifest["status"]["current_phase"] == "Testing"
+
+
+def test_fast_path_leaves_unrecognized_requests_untouched(manifest_path):
+    before = manifest_path.read_text()
+
+    assert try_fast_path("Refactor the API", str(manifest_path)) is None
+    assert manifest_path.read_text() == before
+
+
+def test_fast_path_can_be_disabled(manifest_path, monkeypatch):
+    monkeypatch.setattr(
+        "core.fast_path.get_settings", lambda section, defaults: {"enabled": False}
+    )
+    assert try_fast_path("mark T3 completed", str(manifest_path)) is None
+    assert _load(manifest_path)["tasks"][2]["status"] == "todo"
+
+
+def test_delete_goes_through_task_tool(manifest_path):
+    command = parse_command("delete task T1", _load(manifest_path))
+
+    assert apply_command(command, str(manifest_path)) == ["Task 'T1' deleted successfully."]
+    assert [t["id"] for t in _load(manifest_path)["tasks"]] == ["T2", "T3"]
+
+
+def test_dependency_merge_holds_the_manifest_lock(manifest_path, monkeypatch):
+    writer = threading.Thread(
+        target=ManageTasks(filename=str(manifest_path))._run,
+        kwargs={"action": "add", "task_id": "T4", "title": "Concurrent task"},
+    )
+    real_write = fast_path.write_json_atomic
+
+    def write_while_another_run_adds_a_task(path, data):
+        writer.start()
+        writer.join(0.2)
+        # Kilit tutuluyor: diğer run yükle-yaz arasına giremez, sırasını bekler
+        assert writer.is_alive()
+        real_write(path, data)
+
+    monkeypatch.setattr(fast_path, "write_json_atomic", write_while_another_run_adds_a_task)
+
+    assert try_fast_path("T3 depends on T1", str(manifest_path)) == ["Task 'T3' updated."]
+    writer.join()
+    tasks = {t["id"]: t for t in _load(manifest_path)["tasks"]}
+    assert tasks["T3"]["dependencies"] == ["T2", "T1"]
+    assert tasks["T4"]["title"] == "Concurrent task"
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+import core.file_cache as file_cache_module
+from agents.task_manager.tools.file_reader import FileReader
+from core.file_cache import DEFAULT_FILE_READER_SETTINGS, FileContentCache
+
+
+@pytest.fixture
+def reader(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_cache_module, "_file_cache", FileContentCache(max_entries=8))
+    return FileReader(base_dir=str(tmp_path))
+
+
+def _settings(monkeypatch, **overrides):
+    settings = {**DEFAULT_FILE_READER_SETTINGS, **overrides}
+    monkeypatch.setattr(
+        "agents.task_manager.tools.file_reader.get_settings", lambda section, defaults: settings
+    )
+
+
+def test_small_file_is_returned_whole(reader, tmp_path):
+    (tmp_path / "state.py").write_text("a = 1\nb = 2\n")
+
+    assert reader._run("state.py") == "--- Content: state.py ---\na = 1\nb = 2\n\n"
+
+
+def test_truncates_at_line_boundary_with_next_range(reader, tmp_path, monkeypatch):
+    _settings(monkeypatch, max_bytes=20)
+    (tmp_path / "big.txt").write_text("".join(f"line {i:02d}\n" for i in range(1, 11)))  # 8 bayt/satır
+
+    first = reader._run("big.txt")
+    assert "line 01\nline 02\n" in first and "line 03" not in first
+    assert "Next range: start_line=3]" in first
+
+    ranged = reader._run("big.txt", start_line=9, end_line=10)
+    assert "(lines 9-10)" in ranged and "line 09\nline 10\n" in ranged and "truncated" not in ranged
+
+
+def test_long_single_line_continues_by_bytes(reader, tmp_path, monkeypatch):
+    _settings(monkeypatch, max_bytes=10)
+    (tmp_path / "bundle.min.js").write_text("x" * 25)
+
+    assert "Next range: byte_offset=10]" in reader._run("bundle.min.js")
+    tail = reader._run("bundle.min.js", byte_offset=20)
+    assert "(bytes 20-25 of 25)" in tail and "truncated" not in tail
+
+
+def test_large_files_are_read_through_mmap(reader, tmp_path, monkeypatch):
+    _settings(monkeypatch, mmap_threshold_bytes=100, max_bytes=64)
+    (tmp_path / "lock.json").write_text("".join(f'"pkg-{i}": "1.0.{i}",\n' for i in range(500)))
+
+    result = reader._run("lock.json", start_line=250, end_line=251)
+    assert '"pkg-249": "1.0.249",\n"pkg-250": "1.0.250",\n' in result
+    # mmap'li dosyalar önbelleğe alınmaz
+    assert file_cache_module.get_file_cache().stats()["entries"] == 0
+
+
+def test_binary_files_are_not_returned(reader, tmp_path):
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR")
+
+    assert reader._run("logo.png").startswith("Binary file logo.png (")
+
+
+def test_cache_hits_until_file_changes(reader, tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text("v1\n")
+    reader._run("notes.md")
+    reader._run("notes.md")
+    assert file_cache_module.get_file_cache().stats()["hits"] == 1
+
+    path.write_text("version 2\n")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+    assert "version 2" in reader._run("notes.md")
+    assert file_cache_module.get_file_cache().stats()["entries"] == 1
+
+
+def test_path_traversal_is_denied(reader, tmp_path):
+    outside = tmp_path.parent / f"{tmp_path.name}-secret.txt"
+    outside.write_text("secret")
+
+    assert reader._run(f"../{outside.name}").startswith("Error: Access denied")
+    assert reader._run("../../etc/passwd").startswith("Error: Access denied")
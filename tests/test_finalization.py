@@ -0,0 +1,102 @@
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+import agents.main_agent.node.final_response_node as final_module
+from core.finalization import FinalizationStats, choose_policy, recent_messages, render_template
+
+LONG_ANSWER = "## Architected Prompt\n" + "Implement the JWT middleware in src/auth.py. " * 10
+
+MANIFEST_BEFORE = {
+    "status": {"current_phase": "Planning", "active_goal": "Auth"},
+    "tasks": [
+        {"id": "T1", "title": "Setup project", "status": "in_progress"},
+        {"id": "T2", "title": "Old spike", "status": "todo"},
+    ],
+}
+MANIFEST_AFTER = {
+    "status": {"current_phase": "Development", "active_goal": "Auth"},
+    "tasks": [
+        {"id": "T1", "title": "Setup project", "status": "completed"},
+        {"id": "T3", "title": "Add JWT middleware", "status": "todo"},
+    ],
+}
+
+
+def _state(last_message, **extra):
+    state = {
+        "messages": [HumanMessage(content="Add JWT auth"), last_message],
+        "manifest": MANIFEST_AFTER,
+        "initial_manifest": MANIFEST_BEFORE,
+        "history": [],
+    }
+    state.update(extra)
+    return state
+
+
+def test_auto_policy_picks_by_answer_completeness_and_budget():
+    assert choose_policy(_state(AIMessage(content=LONG_ANSWER)))[0] == "reuse"
+    assert choose_policy(_state(AIMessage(content="Done.")))[0] == "llm"
+    truncated = AIMessage(content=LONG_ANSWER, response_metadata={"finish_reason": "length"})
+    assert choose_policy(_state(truncated))[0] == "llm"
+    exhausted = _state(AIMessage(content="Done."), usage={"exhausted": "cost_usd"})
+    assert choose_policy(exhausted) == ("template", "cost_usd budget exhausted")
+
+
+def test_per_request_policy_overrides_auto():
+    assert choose_policy(_state(AIMessage(content=LONG_ANSWER), finalization_policy="llm"))[0] == "llm"
+    assert choose_policy(_state(AIMessage(content="Done."), finalization_policy="reuse"))[0] == "reuse"
+    # Kullanılacak AI cevabı yoksa reuse, LLM'siz template'e düşer
+    tool_result = ToolMessage(content="ok", tool_call_id="1")
+    assert choose_policy(_state(tool_result, finalization_policy="reuse"))[0] == "template"
+
+
+def test_template_summarizes_manifest_changes():
+    text = render_template(_state(AIMessage(content="Planned the auth work.")))
+
+    assert text.startswith("Planned the auth work.")
+    assert "- Task T1: in_progress → completed" in text
+    assert "- Added task T3: Add JWT middleware (todo)" in text
+    assert "- Removed task T2: Old spike" in text
+    assert "- Phase: Development" in text
+
+
+def test_recent_messages_never_start_with_orphan_tool_message():
+    call = AIMessage(content="", tool_calls=[{"name": "t", "args": {}, "id": "1"}])
+    messages = [
+        SystemMessage(content="sys"),
+        HumanMessage(content="hi"),
+        call,
+        ToolMessage(content="a", tool_call_id="1"),
+        ToolMessage(content="b", tool_call_id="1"),
+        AIMessage(content="x"),
+        AIMessage(content="y"),
+    ]
+
+    assert recent_messages(messages, 4)[0] is call
+    assert recent_messages(messages, 2) == messages[-2:]
+
+
+async def test_reuse_skips_llm_and_reports_saved_latency(monkeypatch):
+    stats = FinalizationStats(estimated_llm_seconds=3.0)
+    monkeypatch.setattr(final_module, "get_finalization_stats", lambda: stats)
+    monkeypatch.setattr(final_module, "get_llm", lambda *a: (_ for _ in ()).throw(AssertionError("LLM called")))
+
+    updates = await final_module.final_response_node(_state(AIMessage(content=LONG_ANSWER)))
+
+    assert "messages" not in updates
+    assert updates["finalization"]["policy"] == "reuse"
+    assert 2.9 < updates["finalization"]["saved_seconds"] <= 3.0
+    assert stats.snapshot()["runs"]["reuse"] == 1
+
+
+async def test_llm_policy_still_calls_the_model(monkeypatch):
+    stats = FinalizationStats()
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="summary")]))
+    monkeypatch.setattr(final_module, "get_finalization_stats", lambda: stats)
+    monkeypatch.setattr(final_module, "get_llm", lambda *a: llm)
+
+    updates = await final_module.final_response_node(_state(AIMessage(content="Done.")))
+
+    assert updates["messages"][0].content == "summary"
+    assert updates["finalization"]["policy"] == "llm"
+    assert stats.snapshot()["llm_latency_samples"] == 1
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from core.hedging import CircuitBreaker, HedgedChatModel
+
+
+class DelayedFakeChatModel(BaseChatModel):
+    """Answers `reply` after the next scripted delay; a negative delay raises instead."""
+
+    reply: str
+    delays: List[float]
+    calls: int = 0
+    cancelled: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "delayed-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        try:
+            await asyncio.sleep(abs(delay))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if delay < 0:
+            raise ConnectionError(f"{self.reply} unavailable")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+
+def _hedged(primary, backup, **kwargs):
+    return HedgedChatModel(
+        candidates=[primary, backup],
+        initial_hedge_delay=0.05,
+        min_hedge_delay=0.01,
+        max_hedge_delay=1.0,
+        **kwargs,
+    )
+
+
+async def test_fast_primary_is_not_hedged():
+    primary = DelayedFakeChatModel(reply="primary", delays=[0.0])
+    backup = DelayedFakeChatModel(reply="backup", delays=[0.0])
+    model = _hedged(primary, backup)
+
+    result = await model.ainvoke([HumanMessage(content="hi")])
+
+    assert result.content == "primary"
+    assert backup.calls == 0
+
+
+async def test_slow_primary_is_hedged_and_cancelled():
+    primary = DelayedFakeChatModel(reply="primary", delays=[2.0])
+    backup = DelayedFakeChatModel(reply="backup", delays=[0.01])
+    model = _hedged(primary, backup)
+
+    start = time.monotonic()
+    result = await model.ainvoke([HumanMessage(content="hi")])
+
+    assert result.content == "backup"
+    assert time.monotonic() - start < 0.5
+    assert primary.cancelled == 1
+    assert model.state.counters["hedged"] == 1
+    assert model.state.counters["backup_wins"] == 1
+
+
+async def test_hedge_delay_follows_latency_percentile():
+    primary = DelayedFakeChatModel(reply="primary", delays=[0.0])
+    model = _hedged(primary, DelayedFakeChatModel(reply="backup", delays=[0.0]), min_samples=5)
+    model.state.latencies[0].extend([0.1, 0.1, 0.1, 0.1, 0.2, 0.3])
+
+    assert model.hedge_delay(0) == pytest.approx(0.3)
+
+
+async def test_failing_primary_fails_over_and_trips_breaker():
+    primary = DelayedFakeChatModel(reply="primary", delays=[-0.001])
+    backup = DelayedFakeChatModel(reply="backup", delays=[0.0])
+    model = _hedged(primary, backup)
+    model.state.breakers[0].failure_threshold = 2
+
+    for _ in range(3):
+        result = await model.ainvoke([HumanMessage(content="hi")])
+        assert result.content == "backup"
+
+    # Devre açıldıktan sonra birincil aday hiç çağrılmaz
+    assert primary.calls == 2
+    assert model.state.breakers[0].state == "open"
+    assert model.state.counters["failovers"] == 2
+
+
+async def test_all_candidates_failing_raises():
+    model = _hedged(
+        DelayedFakeChatModel(reply="a", delays=[-0.001]),
+        DelayedFakeChatModel(reply="b", delays=[-0.001]),
+    )
+    with pytest.raises(ConnectionError):
+        await model.ainvoke([HumanMessage(content="hi")])
+
+
+def test_circuit_breaker_half_opens_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    # Yarı açıkken tek deneme çağrısı: sonuç gelene kadar diğerleri reddedilir
+    assert breaker.acquire() == "probe" and breaker.acquire() is None
+    breaker.release()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+async def test_half_open_circuit_lets_one_trial_call_through():
+    primary = DelayedFakeChatModel(reply="primary", delays=[0.05])
+    backup = DelayedFakeChatModel(reply="backup", delays=[0.0])
+    model = HedgedChatModel(candidates=[primary, backup], initial_hedge_delay=1.0, max_hedge_delay=1.0)
+    breaker = model.state.breakers[0]
+    breaker.reset_timeout = 0.0
+    breaker.opened_at = time.monotonic()
+
+    results = await asyncio.gather(*(model.ainvoke([HumanMessage(content="hi")]) for _ in range(5)))
+
+    assert primary.calls == 1
+    assert sorted(r.content for r in results) == ["backup"] * 4 + ["primary"]
+    assert breaker.state == "closed" and not breaker.probing
@@ -0,0 +1,63 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from core.history_compactor import HeuristicTokenCounter, compact_messages
+
+
+def _tool_turn(i: int, size: int = 4000):
+    call_id = f"call_{i}"
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "read_file", "args": {"relative_path": f"f{i}.py"}, "id": call_id}],
+        ),
+        ToolMessage(content="x" * size, tool_call_id=call_id, name="read_file"),
+    ]
+
+
+def _history(turns: int):
+    messages = [SystemMessage(content="system prompt"), HumanMessage(content="original request")]
+    for i in range(turns):
+        messages += _tool_turn(i)
+    return messages
+
+
+def test_small_history_is_untouched():
+    messages = _history(1)
+    assert compact_messages(messages, max_tokens=100_000) == messages
+
+
+def test_compaction_keeps_system_request_and_recent_pairs():
+    messages = _history(20)
+    counter = HeuristicTokenCounter()
+    compacted = compact_messages(
+        messages, max_tokens=5000, keep_recent_turns=2, tool_result_preview_chars=100, counter=counter
+    )
+
+    assert counter.count_messages(compacted) < counter.count_messages(messages)
+    assert compacted[0].content == "system prompt"
+    assert compacted[1].content == "original request"
+    # Son iki tur (tool_call + ToolMessage) aynen korunmalı
+    assert compacted[-4:] == messages[-4:]
+
+
+def test_compaction_never_orphans_tool_messages():
+    compacted = compact_messages(
+        _history(30), max_tokens=3000, keep_recent_turns=3, tool_result_preview_chars=50
+    )
+
+    open_ids = set()
+    for message in compacted:
+        if isinstance(message, AIMessage) and message.tool_calls:
+            open_ids = {tc["id"] for tc in message.tool_calls}
+        elif isinstance(message, ToolMessage):
+            assert message.tool_call_id in open_ids
+
+
+def test_older_tool_results_are_elided():
+    compacted = compact_messages(
+        _history(6), max_tokens=5000, keep_recent_turns=1, tool_result_preview_chars=100
+    )
+    older_results = [m for m in compacted[:-2] if isinstance(m, ToolMessage)]
+
+    assert older_results
+    assert all(m.content.startswith("[Elided older 'read_file' result") for m in older_results)
@@ -0,0 +1,73 @@
+import pytest
+
+import core.http_clients as http_clients
+import core.llm_factory as llm_factory
+import core.settings as settings
+
+HTTP_CONFIG = {
+    "http": {
+        "max_connections": 8,
+        "max_keepalive_connections": 4,
+        "keepalive_expiry_seconds": 30.0,
+        "connect_timeout_seconds": 3.0,
+        "read_timeout_seconds": 45.0,
+        "http2": False,
+    },
+    "models": {"main_agent": {"final_response": {"max_tokens": 4096}}},
+}
+
+
+@pytest.fixture
+def http_config(monkeypatch):
+    monkeypatch.setattr(settings, "load_config", lambda *args: HTTP_CONFIG)
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(llm_factory, "_llm_cache", {})
+    monkeypatch.setattr(http_clients, "_clients", {})
+
+
+async def test_models_share_one_pool_per_provider(http_config):
+    decide = llm_factory.get_llm("main_agent", "decide_agent")
+    final = llm_factory.get_llm("main_agent", "final_response")
+
+    assert decide is not final
+    shared = http_clients.get_async_http_client("openai")
+    assert decide.http_async_client is shared
+    assert final.http_async_client is shared
+    assert shared._transport._pool._max_connections == 8
+    assert shared.timeout.connect == 3.0
+
+
+async def test_anthropic_models_use_shared_pool(http_config, monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "anthropic")
+    llm = llm_factory.get_llm("main_agent", "decide_agent")
+
+    assert llm._async_client._client is http_clients.get_async_http_client("anthropic")
+
+
+async def test_anthropic_falls_back_to_default_client_when_internals_change(http_config, monkeypatch):
+    from langchain_anthropic import ChatAnthropic
+
+    monkeypatch.setenv("LLM_PROVIDER", "anthropic")
+    # langchain-anthropic'in yeni bir sürümü _client_params'ı kaldırmış gibi
+    monkeypatch.setattr(ChatAnthropic, "_client_params", property(lambda self: None), raising=False)
+
+    llm = llm_factory.get_llm("main_agent", "decide_agent")
+
+    assert isinstance(llm, ChatAnthropic)
+    assert "_async_client" not in vars(llm)
+    assert llm_factory.provider_of(llm) == "anthropic"
+
+
+async def test_close_llms_closes_pools_and_drops_cached_models(http_config):
+    llm = llm_factory.get_llm("main_agent", "decide_agent")
+    client = http_clients.get_async_http_client("openai")
+
+    await llm_factory.close_llms()
+
+    assert client.is_closed
+    assert http_clients.http_client_stats() == {}
+    fresh = llm_factory.get_llm("main_agent", "decide_agent")
+    assert fresh is not llm
+    assert not fresh.http_async_client.is_closed
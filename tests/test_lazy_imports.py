@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+# LangGraph (graph derleme ve checkpointer) da ancak bir run başlarken yüklenmeli
+LAZY_MODULES = ("langchain_openai", "langchain_anthropic", "langchain_google_genai", "langgraph")
+
+
+@pytest.mark.parametrize("module", ["cli", "server", "core.llm_factory"])
+def test_entry_points_do_not_import_provider_sdks_or_langgraph(module):
+    probe = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", probe], cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+
+    assert proc.stdout.strip() == ""
@@ -0,0 +1,66 @@
+import gc
+
+import pytest
+
+import core.llm_factory as llm_factory
+import core.settings as settings
+
+MODELS_CONFIG = {
+    "models": {
+        "default": {"provider": "openai", "model": "gpt-4o", "timeout": 120},
+        "main_agent": {
+            "decide_agent": {"model": "gpt-4o-mini", "max_tokens": 512, "timeout": 30},
+            "final_response": {"provider": "anthropic"},
+        },
+        "task_manager": {"default": {"model": "gpt-4o-mini"}},
+    }
+}
+
+
+@pytest.fixture
+def models_config(monkeypatch):
+    monkeypatch.setattr(settings, "load_config", lambda *args: MODELS_CONFIG)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr(llm_factory, "_llm_cache", {})
+
+
+def test_node_overrides_agent_and_default(models_config):
+    spec = llm_factory.resolve_model_spec("main_agent", "decide_agent")
+
+    assert spec["provider"] == "openai"
+    assert spec["model"] == "gpt-4o-mini"
+    assert spec["max_tokens"] == 512
+    assert spec["timeout"] == 30
+
+
+def test_provider_switch_resets_model(models_config):
+    spec = llm_factory.resolve_model_spec("main_agent", "final_response")
+
+    assert spec["provider"] == "anthropic"
+    assert spec["model"] == llm_factory.DEFAULT_MODELS["anthropic"]
+    assert spec["timeout"] == 120
+
+
+def test_one_client_per_distinct_configuration(models_config):
+    decide = llm_factory.get_llm("main_agent", "decide_agent")
+    analysis = llm_factory.get_llm("task_manager", "analysis")
+
+    assert analysis is llm_factory.get_llm("task_manager", "analysis")
+    assert decide is not analysis  # max_tokens/timeout farklı
+    assert llm_factory.provider_of(decide.bind_tools([])) == "openai"
+    assert llm_factory.provider_of(llm_factory.get_llm("main_agent", "final_response")) == "anthropic"
+
+
+def test_provider_registry_does_not_outlive_the_model():
+    from core.fake_llm import ScriptedChatModel
+
+    model = ScriptedChatModel(script=["ok"])
+    llm_factory._register_provider(model, "anthropic")
+    key = id(model)
+    assert llm_factory._registered_provider(model) == "anthropic"
+
+    # Toplanan modelin kaydı silinir; aynı id'yi alan yeni nesne onu devralamaz
+    del model
+    gc.collect()
+    assert key not in llm_factory._providers_by_id
@@ -0,0 +1,86 @@
+from typing import Annotated, List, TypedDict
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from core.progress import astream_run, report_progress
+
+
+class MiniState(TypedDict):
+    messages: Annotated[List, add_messages]
+
+
+def _build_app():
+    sub = StateGraph(MiniState)
+
+    async def analysis(state):
+        return {"messages": [AIMessage(content="task added")]}
+
+    sub.add_node("analysis", analysis)
+    sub.add_edge(START, "analysis")
+    sub.add_edge("analysis", END)
+    task_manager = sub.compile()
+
+    async def decide_agent(state):
+        report_progress("Running tool route_to_task_manager")
+        await task_manager.ainvoke({"messages": [HumanMessage(content="add task")]})
+        return {"messages": [AIMessage(content="delegated")]}
+
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="final plan ready")]))
+
+    async def final_response(state):
+        return {"messages": [await llm.ainvoke(state["messages"])]}
+
+    graph = StateGraph(MiniState)
+    graph.add_node("decide_agent", decide_agent)
+    graph.add_node("final_response", final_response)
+    graph.add_edge(START, "decide_agent")
+    graph.add_edge("decide_agent", "final_response")
+    graph.add_edge("final_response", END)
+    return graph.compile()
+
+
+async def test_astream_run_reports_nodes_progress_and_tokens():
+    nodes, progress, tokens = [], [], []
+
+    async def on_progress(message):
+        progress.append(message)
+
+    await astream_run(
+        _build_app(),
+        {"messages": [HumanMessage(content="hi")]},
+        {},
+        on_node=nodes.append,
+        on_progress=on_progress,
+        on_token=tokens.append,
+    )
+
+    assert nodes == ["decide_agent", "final_response"]
+    assert progress == [
+        "Deciding next step",
+        "Running tool route_to_task_manager",
+        "Task manager: analysing request",
+        "Finalizing architect report",
+    ]
+    # Yalnızca final_response token'ları akar, ilk token cevap bitmeden gelir
+    assert len(tokens) > 1
+    assert "".join(tokens) == "final plan ready"
+
+
+async def test_failing_progress_callback_does_not_break_the_run():
+    nodes = []
+
+    async def broken(message):
+        raise RuntimeError("client went away")
+
+    await astream_run(
+        _build_app(), {"messages": [HumanMessage(content="hi")]}, {}, on_node=nodes.append, on_progress=broken
+    )
+
+    assert nodes == ["decide_agent", "final_response"]
+
+
+def test_report_progress_outside_graph_is_noop():
+    report_progress("nothing listens")
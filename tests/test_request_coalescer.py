@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from core.request_coalescer import RequestCoalescer
+
+
+def test_key_normalizes_request_text():
+    assert RequestCoalescer.make_key("Add  JWT auth\n", "v1") == RequestCoalescer.make_key(
+        "add jwt AUTH", "v1"
+    )
+    assert RequestCoalescer.make_key("add jwt auth", "v1") != RequestCoalescer.make_key(
+        "add jwt auth", "v2"
+    )
+
+
+async def test_identical_concurrent_requests_share_one_run():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "report"
+
+    key = RequestCoalescer.make_key("add jwt auth", "v1")
+    results = await asyncio.gather(*(coalescer.run(key, factory) for _ in range(5)))
+
+    assert results == ["report"] * 5
+    assert len(calls) == 1
+    assert coalescer.stats()["coalesced"] == 4
+
+
+async def test_finished_result_is_cached_under_post_run_version():
+    coalescer = RequestCoalescer(result_ttl_seconds=60)
+    version = {"value": "v1"}
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        version["value"] = "v2"  # istek manifest'i değiştirir
+        return "report"
+
+    key = lambda: RequestCoalescer.make_key("add jwt auth", version["value"])
+    await coalescer.run(key(), factory, post_key=key)
+    # Replay: manifest artık v2, ama sonuç hâlâ cache'de
+    assert await coalescer.run(key(), factory, post_key=key) == "report"
+    assert len(calls) == 1
+
+
+async def test_errors_are_not_cached():
+    coalescer = RequestCoalescer()
+
+    async def factory():
+        return "❌ failed"
+
+    key = RequestCoalescer.make_key("x")
+    for _ in range(2):
+        await coalescer.run(key, factory, cacheable=lambda r: not r.startswith("❌"))
+
+    assert coalescer.stats()["executed"] == 2
+
+
+async def test_run_is_cancelled_only_when_all_waiters_leave():
+    coalescer = RequestCoalescer()
+    started = asyncio.Event()
+
+    async def factory():
+        started.set()
+        await asyncio.sleep(10)
+
+    key = RequestCoalescer.make_key("slow")
+    first = asyncio.create_task(coalescer.run(key, factory))
+    second = asyncio.create_task(coalescer.run(key, factory))
+    await started.wait()
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert coalescer.stats()["in_flight"] == 1
+
+    second.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await second
+    await asyncio.sleep(0)
+    assert coalescer.stats()["in_flight"] == 0
+
+
+class _ProgressContext:
+    """MCP Context stand-in that records progress notifications."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        self.messages.append(message)
+
+
+async def test_duplicate_arriving_mid_run_attaches_through_the_server(monkeypatch):
+    import core.llm_factory as llm_factory
+    import server
+    from memory.json_store import JSONStore
+    from memory.run_store import RunStore
+
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("FAKE_LLM_LATENCY", "0.15")
+    monkeypatch.setattr(llm_factory, "_llm_cache", {})
+    monkeypatch.setattr(server, "_coalescer", None)
+    monkeypatch.setattr(server, "_scheduler", None)
+    monkeypatch.setattr(server, "_run_store", RunStore(":memory:"))
+
+    manifest_path = server.get_manifest_path()
+    backup = manifest_path.read_bytes() if manifest_path.exists() else None
+    store = JSONStore(str(manifest_path))
+    store.save(store.load_default_template())
+    first_ctx, second_ctx = _ProgressContext(), _ProgressContext()
+    try:
+        before = store.version()
+        first = asyncio.create_task(server.architect_request("Add JWT auth", first_ctx))
+        # Run manifest'i yazdıktan sonra (setup / task manager) gelen aynı istek
+        while store.version() == before and not first.done():
+            await asyncio.sleep(0.01)
+        assert not first.done()
+        second = await server.architect_request("add  JWT auth", second_ctx)
+
+        assert second == await first and second.startswith("✅")
+        stats = server.get_coalescer().stats()
+        assert (stats["executed"], stats["coalesced"]) == (1, 1)
+        # Bağlanan çağıran da ilerleme bildirimi alır
+        assert first_ctx.messages and second_ctx.messages
+    finally:
+        if backup is not None:
+            manifest_path.write_bytes(backup)
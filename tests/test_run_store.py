@@ -0,0 +1,156 @@
+import operator
+import time
+from typing import List, TypedDict
+
+import aiosqlite
+import pytest
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import Annotated
+
+import core.settings as settings
+from core.budget import UsageMeter
+from core.checkpointer import checkpoint_db_path
+from memory.run_store import RunStore
+
+
+class StepState(TypedDict):
+    steps: Annotated[List[str], operator.add]
+
+
+def _build_graph(saver, calls: List[str], fail_on: str = None):
+    def make_node(name):
+        def node(state):
+            calls.append(name)
+            if name == fail_on:
+                raise TimeoutError(f"provider timeout in {name}")
+            return {"steps": [name]}
+
+        return node
+
+    workflow = StateGraph(StepState)
+    for name in ("setup", "decide", "final"):
+        workflow.add_node(name, make_node(name))
+    workflow.add_edge(START, "setup")
+    workflow.add_edge("setup", "decide")
+    workflow.add_edge("decide", "final")
+    workflow.add_edge("final", END)
+    return workflow.compile(checkpointer=saver)
+
+
+async def test_interrupted_run_resumes_from_last_completed_node(tmp_path):
+    db_path = tmp_path / "checkpoints.sqlite"
+    run_store = RunStore(str(db_path))
+    run_id = RunStore.new_run_id()
+    config = {"configurable": {"thread_id": run_id}}
+    run_store.start(run_id, run_id, "request")
+
+    calls: List[str] = []
+    async with aiosqlite.connect(str(db_path)) as conn:
+        graph = _build_graph(AsyncSqliteSaver(conn), calls, fail_on="final")
+        with pytest.raises(TimeoutError):
+            await graph.ainvoke({"steps": []}, config=config)
+
+    # Yeni süreç: aynı veritabanından devam et
+    calls.clear()
+    async with aiosqlite.connect(str(db_path)) as conn:
+        graph = _build_graph(AsyncSqliteSaver(conn), calls)
+        result = await graph.ainvoke(None, config=config)
+
+    assert calls == ["final"]
+    assert result["steps"] == ["setup", "decide", "final"]
+
+
+async def test_cleanup_removes_expired_runs_and_checkpoints(tmp_path):
+    db_path = tmp_path / "checkpoints.sqlite"
+    run_store = RunStore(str(db_path))
+
+    async with aiosqlite.connect(str(db_path)) as conn:
+        graph = _build_graph(AsyncSqliteSaver(conn), [])
+        for run_id in ("old", "new"):
+            run_store.start(run_id, run_id, "request")
+            await graph.ainvoke({"steps": []}, config={"configurable": {"thread_id": run_id}})
+            run_store.finish(run_id, "completed")
+
+    with run_store._connection() as conn:
+        conn.execute(
+            "UPDATE architect_runs SET updated_at = ? WHERE run_id = 'old'",
+            (time.time() - 30 * 86400,),
+        )
+
+    deleted = run_store.cleanup(retention_days=7)
+
+    assert deleted["runs"] == 1
+    assert deleted["checkpoints"] > 0
+    assert run_store.get("old") is None
+    assert run_store.get("new") is not None
+    with run_store._connection() as conn:
+        threads = {r[0] for r in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")}
+    assert threads == {"new"}
+
+
+async def test_cleanup_removes_task_manager_threads_of_expired_runs(tmp_path):
+    from agents.main_agent.tools.route_task_manager import task_manager_thread_id
+    from core.request_context import RequestContext, request_scope
+
+    db_path = tmp_path / "checkpoints.sqlite"
+    run_store = RunStore(str(db_path))
+
+    async with aiosqlite.connect(str(db_path)) as conn:
+        graph = _build_graph(AsyncSqliteSaver(conn), [])
+        for run_id in ("old", "new"):
+            run_store.start(run_id, run_id, "request")
+            await graph.ainvoke({"steps": []}, config={"configurable": {"thread_id": run_id}})
+            # Run task manager'a yönlendirdi: alt ajan kendi thread'ine checkpoint yazar
+            with request_scope(RequestContext(run_id)):
+                sub_thread = task_manager_thread_id(f"call_{run_id}")
+            await graph.ainvoke({"steps": []}, config={"configurable": {"thread_id": sub_thread}})
+            run_store.finish(run_id, "completed")
+
+    with run_store._connection() as conn:
+        conn.execute("UPDATE architect_runs SET updated_at = ? WHERE run_id = 'old'", (time.time() - 30 * 86400,))
+
+    run_store.cleanup(retention_days=7)
+
+    with run_store._connection() as conn:
+        threads = {r[0] for r in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")}
+        writes = {r[0] for r in conn.execute("SELECT DISTINCT thread_id FROM writes")}
+    assert threads == {"new", "task_manager:new:call_new"}
+    assert writes <= threads
+
+
+def test_mark_interrupted(tmp_path):
+    run_store = RunStore(str(tmp_path / "runs.sqlite"))
+    run_store.start("r1", "r1", "request")
+
+    assert run_store.mark_interrupted() == 1
+    assert run_store.get("r1")["status"] == "interrupted"
+
+
+def test_budgets_are_stored_with_the_run(tmp_path):
+    run_store = RunStore(str(tmp_path / "runs.sqlite"))
+    meter = UsageMeter(max_llm_calls=5, max_cost_usd=0.1)
+    run_store.start("r1", "r1", "request", budgets=meter.budgets())
+
+    budgets = RunStore(str(tmp_path / "runs.sqlite")).get("r1")["budgets"]
+    assert budgets == {"max_llm_calls": 5, "max_total_tokens": 0, "max_cost_usd": 0.1}
+
+    # Resume: aynı limitler, checkpoint'teki harcama üzerinden devam
+    resumed = UsageMeter(**budgets)
+    resumed.restore({"llm_calls": 5, "input_tokens": 900, "output_tokens": 100, "cost_usd": 0.01})
+    assert resumed.total_tokens == 1000 and resumed.exhausted() == "llm_calls"
+
+
+def test_memory_backend_creates_no_database_file(tmp_path, monkeypatch):
+    db_path = tmp_path / "checkpoints.sqlite"
+    config = {"checkpointer": {"backend": "memory", "sqlite_path": str(db_path)}}
+    monkeypatch.setattr(settings, "load_config", lambda *args: config)
+
+    run_store = RunStore()
+    run_store.start("r1", "r1", "request")
+    run_store.finish("r1", "completed")
+
+    assert run_store.db_path == ":memory:"
+    assert run_store.get("r1")["status"] == "completed"
+    assert run_store.cleanup(retention_days=7) == {"runs": 0, "checkpoints": 0, "writes": 0}
+    assert checkpoint_db_path() == db_path and not db_path.exists()
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import core.llm_invoker as llm_invoker
+from core.rate_limiter import ProviderRateLimiter, TokenBucket
+from core.scheduler import QueueFullError, RunScheduler
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class RateLimitedFakeChatModel(BaseChatModel):
+    """Local fake provider: allows `limit` calls per `window` seconds, then answers 429."""
+
+    limit: int = 2
+    window: float = 0.2
+    calls: List[float] = []
+    rejected: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "rate-limited-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        now = time.monotonic()
+        recent = [t for t in self.calls if now - t < self.window]
+        if len(recent) >= self.limit:
+            self.rejected += 1
+            raise FakeRateLimitError("429 Too Many Requests")
+        self.calls.append(now)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+async def test_scheduler_bounds_concurrency_and_reports_queue():
+    scheduler = RunScheduler(max_concurrent_runs=2, max_queue_size=10)
+    active, peak = 0, 0
+
+    async def run():
+        nonlocal active, peak
+        async with scheduler.slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+
+    await asyncio.gather(*(run() for _ in range(6)))
+
+    stats = scheduler.stats()
+    assert peak == 2
+    assert stats["admitted"] == 6
+    assert stats["queue_depth"] == 0
+    assert stats["wait_seconds"]["max"] > 0
+
+
+async def test_scheduler_serves_priority_then_fifo():
+    scheduler = RunScheduler(max_concurrent_runs=1)
+    order = []
+
+    async def run(name, priority):
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    await scheduler.acquire()  # slotu meşgul et
+    tasks = [
+        asyncio.create_task(run("low-1", 5)),
+        asyncio.create_task(run("low-2", 5)),
+        asyncio.create_task(run("high", 0)),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queue_depth"] == 3
+    scheduler.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["high", "low-1", "low-2"]
+
+
+async def test_scheduler_rejects_when_queue_full():
+    scheduler = RunScheduler(max_concurrent_runs=1, max_queue_size=1)
+    await scheduler.acquire()
+    waiting = asyncio.create_task(scheduler.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueFullError):
+        await scheduler.acquire()
+    assert scheduler.stats()["rejected"] == 1
+
+    waiting.cancel()
+
+
+async def test_token_bucket_throttles_bursts():
+    bucket = TokenBucket(rate=100, capacity=2)
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    assert time.monotonic() - start >= 0.015
+
+
+async def test_ainvoke_llm_retries_rate_limits(monkeypatch):
+    model = RateLimitedFakeChatModel(limit=1, window=0.05, calls=[])
+    monkeypatch.setattr(llm_invoker, "get_rate_limiter", lambda provider: None)
+    monkeypatch.setattr(llm_invoker, "backoff_delay", lambda attempt, base, cap: 0.03)
+
+    results = [
+        await llm_invoker.ainvoke_llm(model, [HumanMessage(content="hi")], provider="fake")
+        for _ in range(3)
+    ]
+
+    assert [r.content for r in results] == ["ok"] * 3
+    assert model.rejected > 0
+
+
+async def test_provider_limiter_prevents_429s(monkeypatch):
+    model = RateLimitedFakeChatModel(limit=3, window=0.2, calls=[])
+    limiter = ProviderRateLimiter("fake", requests_per_minute=300, tokens_per_minute=10**6)
+    # 2'lik burst + 5/s dolum: herhangi 0.2s penceresinde en fazla 3 istek
+    limiter.requests = TokenBucket(rate=5, capacity=2)
+    monkeypatch.setattr(llm_invoker, "get_rate_limiter", lambda provider: limiter)
+
+    await asyncio.gather(
+        *(llm_invoker.ainvoke_llm(model, [HumanMessage(content="hi")], provider="fake") for _ in range(5))
+    )
+
+    assert model.rejected == 0
+    assert limiter.stats()["throttled"] > 0
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+import memory.symbol_index as symbol_index_module
+from agents.task_manager.tools.outline import Outline
+from memory.symbol_index import DEFAULT_SYMBOL_INDEX_SETTINGS, SymbolIndex, outline_python
+
+SOURCE = '''
+MAX_RETRIES = 3
+
+
+class Client(Base, metaclass=Meta):
+    """HTTP client for the API.
+
+    Longer description.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+
+    @property
+    def host(self) -> str:
+        return self.url
+
+    async def fetch(self, path: str, retries: int = MAX_RETRIES) -> dict:
+        """Fetches one resource."""
+        return {}
+
+    def _private(self):
+        pass
+
+
+def build_client(url):
+    return Client(url)
+'''
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(symbol_index_module, "_indexes", {})
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "client.py").write_text(SOURCE)
+    (tmp_path / "src" / "broken.py").write_text("def oops(:\n")
+    (tmp_path / "src" / "notes.txt").write_text("not code\n")
+    (tmp_path / "venv").mkdir()
+    (tmp_path / "venv" / "lib.py").write_text("def vendored(): pass\n")
+    return tmp_path
+
+
+def test_python_outline_has_signatures_lines_and_docs():
+    symbols = outline_python(SOURCE)
+
+    assert [(s.kind, s.name) for s in symbols] == [
+        ("constant", "MAX_RETRIES"),
+        ("class", "Client"),
+        ("function", "build_client"),
+    ]
+    client = symbols[1]
+    assert client.signature == "class Client(Base, metaclass=Meta)"
+    assert client.doc == "HTTP client for the API."
+    assert [(c.kind, c.name) for c in client.children] == [
+        ("method", "__init__"),
+        ("property", "host"),
+        ("method", "fetch"),
+        ("method", "_private"),
+    ]
+    fetch = client.children[2]
+    assert fetch.signature == "async def fetch(self, path: str, retries: int=MAX_RETRIES) -> dict"
+    assert (fetch.line, fetch.end_line, fetch.doc) == (18, 20, "Fetches one resource.")
+
+
+def test_outline_cache_is_persisted_and_invalidated_by_mtime(project):
+    settings = dict(DEFAULT_SYMBOL_INDEX_SETTINGS)
+    index = SymbolIndex(str(project), settings)
+    index.outline("src/client.py")
+    index.save()
+
+    reloaded = SymbolIndex(str(project), settings)
+    symbols, error = reloaded.outline("src/client.py")
+    assert error is None and symbols[1].children[2].name == "fetch"
+    assert reloaded.parsed == 0
+
+    (project / "src" / "client.py").write_text("def only(): pass\n")
+    os.utime(project / "src" / "client.py", ns=(1, 1))
+    assert [s.name for s in reloaded.outline("src/client.py")[0]] == ["only"]
+    assert reloaded.parsed == 1
+
+
+def test_outline_tool_and_top_level_summary(project):
+    result = Outline(base_dir=str(project))._run(["src"])
+
+    assert "src/client.py\n" in result
+    assert "    async def fetch(self, path: str, retries: int=MAX_RETRIES) -> dict  # L18-20 — Fetches one resource." in result
+    assert "_private" not in result
+    assert "src/broken.py\n  (syntax error at line 1" in result
+    assert "notes.txt" not in result and "venv" not in result
+    assert (project / ".ai_index" / "symbols.json").exists()
+
+    summary = SymbolIndex(str(project), dict(DEFAULT_SYMBOL_INDEX_SETTINGS)).top_level_summary()
+    assert summary == "src/client.py: class Client, build_client()"
@@ -0,0 +1,98 @@
+import json
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import ToolNode
+
+import core.telemetry as telemetry_module
+from core.llm_invoker import ainvoke_llm
+from core.progress import astream_run
+from core.request_context import RequestContext, request_scope
+from core.telemetry import Telemetry
+from memory.json_store import write_json_atomic
+
+
+class MiniState(TypedDict):
+    messages: Annotated[List, add_messages]
+
+
+@tool
+def add_task(title: str) -> str:
+    """Adds a task."""
+    return f"added {title}"
+
+
+@pytest.fixture
+def telemetry(tmp_path, monkeypatch):
+    recorder = Telemetry(trace_path=str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(telemetry_module, "_telemetry", recorder)
+    return recorder
+
+
+def _app():
+    llm = GenericFakeChatModel(
+        messages=iter(
+            [
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": "add_task", "args": {"title": "docs"}, "id": "1"}],
+                    usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150},
+                    response_metadata={"model_name": "gpt-4o-mini"},
+                )
+            ]
+        )
+    )
+
+    async def decide_agent(state):
+        return {"messages": [await ainvoke_llm(llm, state["messages"], provider="fake")]}
+
+    graph = StateGraph(MiniState)
+    graph.add_node("decide_agent", decide_agent)
+    graph.add_node("tools", ToolNode([add_task]))
+    graph.add_edge(START, "decide_agent")
+    graph.add_edge("decide_agent", "tools")
+    graph.add_edge("tools", END)
+    return graph.compile()
+
+
+async def test_run_records_node_llm_and_tool_spans(telemetry, tmp_path):
+    with request_scope(RequestContext("run-1")):
+        await astream_run(_app(), {"messages": [HumanMessage(content="hi")]}, {})
+
+    spans = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    by_kind = {(s["kind"], s["name"]): s for s in spans}
+
+    assert {("node", "decide_agent"), ("node", "tools"), ("llm", "fake"), ("tool", "add_task")} <= set(by_kind)
+    llm_span = by_kind[("llm", "fake")]
+    assert llm_span["model"] == "gpt-4o-mini"
+    assert (llm_span["prompt_tokens"], llm_span["completion_tokens"]) == (120, 30)
+    assert llm_span["node"] == "decide_agent"
+    assert all(s["run_id"] == "run-1" for s in spans)
+    assert telemetry.summary()["node/decide_agent"]["count"] == 1
+
+
+def test_manifest_writes_are_spans(telemetry, tmp_path):
+    write_json_atomic(tmp_path / ".ai_state.json", {"tasks": []})
+
+    assert telemetry.summary()["manifest_io/write"]["count"] == 1
+
+
+def test_prometheus_snapshot_and_trace_replay(telemetry, tmp_path):
+    for duration in (0.02, 0.04, 0.3):
+        telemetry.record("llm", "openai", duration, model="gpt-4o", prompt_tokens=10, completion_tokens=5)
+    telemetry.record("tool", "manage_tasks", 0.5, status="error", error="ValueError")
+
+    text = telemetry.prometheus_text()
+    assert 'promptarchitect_span_duration_seconds_bucket{kind="llm",name="openai",le="0.05"} 2' in text
+    assert 'promptarchitect_span_duration_seconds_count{kind="llm",name="openai"} 3' in text
+    assert 'promptarchitect_span_latency_seconds{kind="llm",name="openai",quantile="0.5"} 0.040000' in text
+    assert 'promptarchitect_span_errors_total{kind="tool",name="manage_tasks"} 1' in text
+    assert 'promptarchitect_llm_tokens_total{model="gpt-4o",type="prompt"} 30' in text
+
+    replayed = Telemetry.from_jsonl(str(tmp_path / "traces.jsonl"))
+    assert replayed.summary() == telemetry.summary()
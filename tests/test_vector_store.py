@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+import pytest
+
+from memory.vector_store import (
+    DEFAULT_VECTOR_STORE_SETTINGS,
+    Embedder,
+    HashingEmbedder,
+    VectorStore,
+    add_report,
+    chunk_lines,
+    sync_files,
+    sync_tasks,
+)
+
+
+@pytest.fixture
+def settings():
+    return {**DEFAULT_VECTOR_STORE_SETTINGS, "initial_capacity": 2, "chunk_lines": 4, "chunk_overlap": 1}
+
+
+def test_hashing_embedder_is_deterministic_and_normalised():
+    embedder = HashingEmbedder(dim=64)
+    vectors = embedder.embed(["getUserToken(request)", "get_user_token", "render chart colours", ""])
+
+    assert vectors.dtype == np.float32 and vectors.shape == (4, 64)
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    assert not vectors[3].any()
+    # camelCase ve snake_case aynı alt kelimeleri paylaşır
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+    assert np.array_equal(vectors, HashingEmbedder(dim=64).embed(["getUserToken(request)", "get_user_token", "render chart colours", ""]))
+
+
+def test_embedder_requires_embed():
+    class Incomplete(Embedder):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_add_search_delete_and_reuse_rows(tmp_path, settings):
+    store = VectorStore(str(tmp_path), settings=settings)
+    store.add(
+        ["a", "b", "c"],
+        ["jwt token authentication middleware", "database connection pool", "password hashing for login"],
+        [{"kind": "file"}, {"kind": "file"}, {"kind": "task"}],
+    )
+    assert store.capacity >= 3
+
+    hits = store.search("jwt authentication", k=2)
+    assert [h.id for h in hits][0] == "a" and hits[0].score > hits[1].score
+    assert [h.id for h in store.search("login password", k=5, kind="task")] == ["c"]
+
+    assert store.delete(["a", "missing"]) == 1
+    assert "a" not in [h.id for h in store.search("jwt authentication", k=5)]
+    store.add(["d"], ["jwt refresh tokens"], [{"kind": "file"}])
+    # Silinen satır yeniden kullanılır, matris büyümez
+    assert len(store) == 3 and store.stats()["free_rows"] == 0
+
+    batch = store.search_batch(["jwt", "database pool"], k=1)
+    assert [hits[0].id for hits in batch] == ["d", "b"]
+
+
+def test_store_persists_and_rebuilds_on_embedder_change(tmp_path, settings):
+    store = VectorStore(str(tmp_path), settings=settings)
+    store.add(["x"], ["vector memory"], [{"kind": "report", "text": "hello"}])
+    store.close()
+
+    reloaded = VectorStore(str(tmp_path), settings=settings)
+    hits = reloaded.search("memory vector", k=1)
+    assert hits[0].id == "x" and hits[0].metadata["text"] == "hello"
+
+    other = VectorStore(str(tmp_path), embedder=HashingEmbedder(dim=32), settings=settings)
+    assert len(other) == 0
+
+
+def test_sync_files_tasks_and_reports_incrementally(tmp_path, settings):
+    project = tmp_path / "project"
+    (project / "src").mkdir(parents=True)
+    (project / "src" / "auth.py").write_text("\n".join(f"def check_token_{i}(): pass" for i in range(6)))
+    (project / "src" / "db.py").write_text("def connect():\n    return pool\n")
+    store = VectorStore(str(tmp_path / "index"), settings=settings)
+
+    first = sync_files(store, str(project))
+    assert first == {"files": 2, "chunks_added": 3, "chunks_removed": 0}
+    assert sync_files(store, str(project))["chunks_added"] == 0
+
+    (project / "src" / "db.py").write_text("def connect_replica():\n    return pool\n")
+    os.utime(project / "src" / "db.py", ns=(1, 1))
+    assert sync_files(store, str(project)) == {"files": 2, "chunks_added": 1, "chunks_removed": 1}
+    top = store.search("connect replica", k=1, kind="file")[0]
+    assert (top.metadata["path"], top.metadata["start_line"]) == ("src/db.py", 1)
+
+    tasks = [{"id": "T1", "title": "Add JWT auth"}, {"id": "T2", "title": "Set up database"}]
+    assert sync_tasks(store, tasks)["updated"] == 2
+    assert sync_tasks(store, tasks[:1]) == {"tasks": 1, "updated": 0, "removed": 1}
+
+    add_report(store, "run-1", "Add JWT auth", "Created tasks for token issuing.")
+    assert store.search("jwt token", k=1, kind="report")[0].metadata["run_id"] == "run-1"
+
+
+def test_chunk_lines_overlap():
+    assert chunk_lines("a\nb\nc\nd\ne", size=3, overlap=1) == [(1, 3, "a\nb\nc"), (3, 5, "c\nd\ne")]
+    assert chunk_lines("", size=3, overlap=1) == []